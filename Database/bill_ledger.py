@@ -0,0 +1,254 @@
+"""Bill ledger storage.
+
+BillDB keeps one row per computed bill. Bills are passed around as the
+same dicts `download_pdf` builds for `generate_bill_pdf` (keys: name,
+account, address, type, month, kwh, rate, fixed, base, env, vat, total).
+
+BillingMonth is stored as "YYYY-MM" and CustomerType in lower case so
+the history and month queries can be answered from the indexes. An
+account has at most one bill per billing month: writing a bill for an
+(account, month) already in the ledger replaces it.
+"""
+import math
+import sqlite3
+from datetime import datetime
+
+from Database import revenue_rollup
+
+BILL_COLUMNS = ("account", "name", "address", "type", "month",
+                "kwh", "rate", "fixed", "base", "env", "vat", "total")
+
+_SELECT = ("SELECT AccountNumber, CustomerName, Address, CustomerType, BillingMonth, "
+           "Kwh, Rate, Fixed, BaseCharge, EnvFee, Vat, Total FROM BillDB")
+
+_MONTH_FORMATS = ("%Y-%m", "%Y-%m-%d", "%m/%d/%y", "%m/%d/%Y", "%d/%m/%Y")
+
+DEFAULT_BATCH_SIZE = 5000
+_KEY_BATCH = 500  # (account, month) pairs per existence query
+
+
+def ensure_table(conn: sqlite3.Connection):
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS BillDB (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            AccountNumber TEXT NOT NULL,
+            CustomerName TEXT,
+            Address TEXT,
+            CustomerType TEXT NOT NULL,
+            BillingMonth TEXT NOT NULL,
+            Kwh REAL NOT NULL,
+            Rate REAL,
+            Fixed REAL,
+            BaseCharge REAL,
+            EnvFee REAL,
+            Vat REAL,
+            Total REAL,
+            CreatedAt TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.commit()
+    revenue_rollup.ensure_tables(conn)
+    try:
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_bill_account_month ON BillDB (AccountNumber, BillingMonth)")
+    except sqlite3.IntegrityError:
+        # ledgers written before the constraint: keep the latest bill of each
+        # (account, month); the delete trigger takes the others out of the rollups
+        with conn:
+            conn.execute("DELETE FROM BillDB WHERE id NOT IN "
+                         "(SELECT MAX(id) FROM BillDB GROUP BY AccountNumber, BillingMonth)")
+        cur.execute("CREATE UNIQUE INDEX uq_bill_account_month ON BillDB (AccountNumber, BillingMonth)")
+    cur.execute("DROP INDEX IF EXISTS idx_bill_account_month")  # superseded by the unique index
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bill_month_type ON BillDB (BillingMonth, CustomerType)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bill_type_month ON BillDB (CustomerType, BillingMonth)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bill_type_kwh ON BillDB (CustomerType, Kwh)")
+    conn.commit()
+
+
+def normalize_month(value):
+    """Return a billing month as "YYYY-MM"; unknown formats are kept as given."""
+    text = str(value).strip()
+    for fmt in _MONTH_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m")
+        except ValueError:
+            continue
+    return text
+
+
+def _row(bill):
+    row = [bill[key] for key in BILL_COLUMNS]
+    row[3] = str(row[3]).strip().lower()
+    row[4] = normalize_month(row[4])
+    if not math.isfinite(float(row[5])):
+        raise ValueError(f"bill for account {row[0]} ({row[4]}): kWh must be a finite number, got {row[5]!r}")
+    return tuple(row)
+
+
+def _bill(row):
+    return dict(zip(BILL_COLUMNS, row))
+
+
+def _existing_keys(conn, keys):
+    found = set()
+    for i in range(0, len(keys), _KEY_BATCH):
+        batch = keys[i:i + _KEY_BATCH]
+        found.update(conn.execute(
+            "SELECT AccountNumber, BillingMonth FROM BillDB WHERE (AccountNumber, BillingMonth) IN "
+            f"(VALUES {', '.join(['(?, ?)'] * len(batch))})", [value for key in batch for value in key]))
+    return found
+
+
+def insert_bills(conn: sqlite3.Connection, bills, commit=True):
+    """Write an iterable of bill dicts, replacing any bill of the same account and month.
+
+    New bills go in with a single executemany and replacements with
+    another; within the batch the last bill of an (account, month) wins.
+    The month / customer-type revenue rollups are updated in the same
+    transaction (see revenue_rollup). Returns the number of bills written.
+    """
+    rows = {}
+    for bill in bills:
+        row = _row(bill)
+        rows[(str(row[0]), row[4])] = row
+    existing = _existing_keys(conn, list(rows))
+    new_rows = [row for key, row in rows.items() if key not in existing]
+    cur = conn.cursor()
+    cur.executemany(
+        "INSERT INTO BillDB (AccountNumber, CustomerName, Address, CustomerType, BillingMonth, "
+        "Kwh, Rate, Fixed, BaseCharge, EnvFee, Vat, Total) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        new_rows,
+    )
+    if existing:
+        # the update trigger moves replaced bills out of / into the rollups
+        cur.executemany(
+            "UPDATE BillDB SET CustomerName = ?, Address = ?, CustomerType = ?, Kwh = ?, Rate = ?, Fixed = ?, "
+            "BaseCharge = ?, EnvFee = ?, Vat = ?, Total = ?, CreatedAt = CURRENT_TIMESTAMP "
+            "WHERE AccountNumber = ? AND BillingMonth = ?",
+            [row[1:4] + row[5:] + (row[0], row[4]) for key, row in rows.items() if key in existing],
+        )
+    revenue_rollup.add_rows(conn, new_rows, BILL_COLUMNS)
+    if commit:
+        conn.commit()
+    return len(rows)
+
+
+def record_bills(conn: sqlite3.Connection, bills):
+    """Insert bills in one transaction; nothing is written if any row fails."""
+    with conn:
+        return insert_bills(conn, bills, commit=False)
+
+
+class BillWriter:
+    """Buffers bills and writes them batch_size at a time, one transaction per batch.
+
+    Use as a context manager so the last partial batch is flushed:
+
+        with BillWriter(conn) as writer:
+            for bill in bills:
+                writer.add(bill)
+    """
+
+    def __init__(self, conn: sqlite3.Connection, batch_size=DEFAULT_BATCH_SIZE):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.pending = []
+        self.written = 0
+
+    def add(self, bill):
+        self.pending.append(bill)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            record_bills(self.conn, self.pending)
+            self.written += len(self.pending)
+            self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+
+def customer_history(conn: sqlite3.Connection, account, start_month=None, end_month=None):
+    """Bills for one account, oldest first (uses uq_bill_account_month)."""
+    sql = _SELECT + " WHERE AccountNumber = ?"
+    params = [str(account)]
+    if start_month is not None:
+        sql += " AND BillingMonth >= ?"
+        params.append(normalize_month(start_month))
+    if end_month is not None:
+        sql += " AND BillingMonth <= ?"
+        params.append(normalize_month(end_month))
+    sql += " ORDER BY BillingMonth, id"
+    return [_bill(row) for row in conn.execute(sql, params)]
+
+
+def bills_for_month(conn: sqlite3.Connection, month, customer_type=None):
+    """All bills of a billing month, optionally for one customer type (uses idx_bill_month_type)."""
+    sql = _SELECT + " WHERE BillingMonth = ?"
+    params = [normalize_month(month)]
+    if customer_type is not None:
+        sql += " AND CustomerType = ?"
+        params.append(customer_type.strip().lower())
+    return [_bill(row) for row in conn.execute(sql, params)]
+
+
+def bills_for_type(conn: sqlite3.Connection, customer_type, start_month=None, end_month=None):
+    """Bills of one customer type, optionally within a month range (uses idx_bill_type_month)."""
+    sql = _SELECT + " WHERE CustomerType = ?"
+    params = [customer_type.strip().lower()]
+    if start_month is not None:
+        sql += " AND BillingMonth >= ?"
+        params.append(normalize_month(start_month))
+    if end_month is not None:
+        sql += " AND BillingMonth <= ?"
+        params.append(normalize_month(end_month))
+    return [_bill(row) for row in conn.execute(sql, params)]
+
+
+def customer_types(conn: sqlite3.Connection):
+    """Distinct customer types present in the ledger."""
+    return [row[0] for row in conn.execute("SELECT DISTINCT CustomerType FROM BillDB")]
+
+
+def bills_above_kwh(conn: sqlite3.Connection, customer_type, kwh, month=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield lists of (id, bill dict) for bills of a type with Kwh > kwh (uses idx_bill_type_kwh).
+
+    kwh=None selects every bill of the type.
+    """
+    sql = "SELECT id, " + _SELECT[len("SELECT "):] + " WHERE CustomerType = ?"
+    params = [customer_type]
+    if kwh is not None:
+        sql += " AND Kwh > ?"
+        params.append(kwh)
+    if month is not None:
+        sql += " AND BillingMonth = ?"
+        params.append(normalize_month(month))
+    cur = conn.execute(sql, params)
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        yield [(row[0], _bill(row[1:])) for row in rows]
+
+
+def update_bill_amounts(conn: sqlite3.Connection, bills, commit=True):
+    """Rewrite the computed amounts of existing bills.
+
+    bills: iterable of (id, bill dict) pairs
+    """
+    cur = conn.cursor()
+    cur.executemany(
+        "UPDATE BillDB SET Rate = ?, Fixed = ?, BaseCharge = ?, EnvFee = ?, Vat = ?, Total = ? WHERE id = ?",
+        ((b["rate"], b["fixed"], b["base"], b["env"], b["vat"], b["total"], bill_id) for bill_id, b in bills),
+    )
+    if commit:
+        conn.commit()
+    return cur.rowcount
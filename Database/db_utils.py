@@ -1,9 +1,161 @@
 """Database helper utilities for account operations.
 
 Provides simple wrappers around sqlite3 connection to create accounts,
-verify credentials and update passwords.
+verify credentials and update passwords, plus a small pool of
+long-lived connections so the UI does not reconnect on every click.
+Passwords are stored as salted hashes (see Database/passwords.py).
 """
+import atexit
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
+
+import metrics
+from Database import bill_ledger, email_filter, passwords
+
+DEFAULT_POOL_SIZE = 4
+
+# Applied to every pooled connection. WAL lets readers run alongside the
+# writer and, with synchronous=NORMAL, commits no longer fsync each time.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connection created by ConnectionPool.
+
+    schema_ready is set once the pool has checked the schema for this
+    database, so the helpers below can skip ensure_table. db_path lets
+    user_exists find the database's email filter (Database/email_filter.py).
+    """
+    schema_ready = False
+    db_path = None
+
+
+class ConnectionPool:
+    """A small LIFO pool of long-lived connections to one database file."""
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, factory=PooledConnection, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        ensure_schema_once(conn, self.db_path)
+        conn.schema_ready = True
+        conn.db_path = self.db_path
+        return conn
+
+    def acquire(self, timeout=None):
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get(timeout=timeout)
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def get_pool(db_path, size=DEFAULT_POOL_SIZE) -> ConnectionPool:
+    """Return the shared pool for db_path, creating it on first use."""
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db_path)
+            if pool is None:
+                pool = _pools[db_path] = ConnectionPool(db_path, size)
+    return pool
+
+
+@contextmanager
+def connection(db_path):
+    """Borrow a pooled connection to db_path for the duration of a with-block."""
+    with get_pool(db_path).connection() as conn:
+        yield conn
+
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+atexit.register(close_pools)
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    """Create every table the account system needs."""
+    ensure_table(conn)
+    bill_ledger.ensure_table(conn)
+
+
+def ensure_schema_once(conn: sqlite3.Connection, db_path):
+    """Run ensure_schema the first time db_path is opened in this process."""
+    if db_path in _schema_ready:
+        return
+    with _schema_lock:
+        if db_path not in _schema_ready:
+            ensure_schema(conn)
+            _schema_ready.add(db_path)
+
+
+def _ensure(conn):
+    if not getattr(conn, "schema_ready", False):
+        ensure_table(conn)
 
 
 def ensure_table(conn: sqlite3.Connection):
@@ -22,32 +174,110 @@ def ensure_table(conn: sqlite3.Connection):
     conn.commit()
 
 
+@metrics.timed("db_utils.create_account")
 def create_account(conn: sqlite3.Connection, first, last, email, password):
-    ensure_table(conn)
+    """Raises sqlite3.IntegrityError if the email is taken, usually before spending time on the hash.
+
+    The existence check trusts the email filter's misses; an account added
+    by another process since its last refresh is still caught by the
+    UNIQUE constraint on insert.
+    """
+    _ensure(conn)
+    if user_exists(conn, email, trust_filter=True):
+        raise sqlite3.IntegrityError("UNIQUE constraint failed: AccountDB.Email")
     cur = conn.cursor()
     cur.execute(
         "INSERT INTO AccountDB (FirstName, LastName, Email, Password) VALUES (?, ?, ?, ?)",
-        (first, last, email, password),
+        (first, last, email, passwords.hash_password(password)),
     )
     conn.commit()
+    email_filter.add(conn, email)
 
 
+@metrics.timed("db_utils.verify_user")
 def verify_user(conn: sqlite3.Connection, email, password) -> bool:
-    ensure_table(conn)
+    """Check credentials; plaintext or outdated hashes are upgraded on success."""
+    _ensure(conn)
     cur = conn.cursor()
-    cur.execute("SELECT 1 FROM AccountDB WHERE Email = ? AND Password = ?", (email, password))
-    return cur.fetchone() is not None
+    cur.execute("SELECT Password FROM AccountDB WHERE Email = ?", (email,))
+    row = cur.fetchone()
+    if row is None or not passwords.check_password(password, row[0]):
+        return False
+    if passwords.needs_rehash(row[0]):
+        cur.execute("UPDATE AccountDB SET Password = ? WHERE Email = ? AND Password = ?",
+                    (passwords.hash_password(password), email, row[0]))
+        conn.commit()
+    return True
 
 
-def user_exists(conn: sqlite3.Connection, email) -> bool:
-    ensure_table(conn)
+@metrics.timed("db_utils.user_exists")
+def user_exists(conn: sqlite3.Connection, email, trust_filter=False) -> bool:
+    """True if an account is registered under email.
+
+    trust_filter: on a pooled connection, let an email filter miss answer
+    False without a query. The filter can lag accounts created by other
+    processes by up to email_filter.REFRESH_INTERVAL, so only callers that
+    are backed by the UNIQUE constraint (create_account) should pass it.
+    """
+    _ensure(conn)
+    index = email_filter.index_for(conn) if trust_filter else None
+    if index is not None and not index.might_contain(conn, email):
+        return False
     cur = conn.cursor()
     cur.execute("SELECT 1 FROM AccountDB WHERE Email = ?", (email,))
-    return cur.fetchone() is not None
+    found = cur.fetchone() is not None
+    if index is not None:
+        index.record(found)
+    return found
 
 
+@metrics.timed("db_utils.update_password")
 def update_password(conn: sqlite3.Connection, email, new_password):
-    ensure_table(conn)
+    _ensure(conn)
     cur = conn.cursor()
-    cur.execute("UPDATE AccountDB SET Password = ? WHERE Email = ?", (new_password, email))
+    cur.execute("UPDATE AccountDB SET Password = ? WHERE Email = ?", (passwords.hash_password(new_password), email))
     conn.commit()
+
+
+@metrics.timed("db_utils.bulk_create_accounts")
+def bulk_create_accounts(conn: sqlite3.Connection, accounts):
+    """Insert many accounts in one transaction with executemany.
+
+    accounts: list of (first, last, email, password) tuples; the password
+        must already be hashed (see Database/passwords.py)
+
+    Rows whose email is already registered, or repeated within the batch,
+    are skipped instead of aborting the batch. Returns (inserted, duplicates)
+    where duplicates is the list of skipped tuples.
+    """
+    _ensure(conn)
+    cur = conn.cursor()
+    inserted = 0
+    duplicates = []
+    with conn:
+        if not conn.in_transaction:
+            # take the write lock first so no other writer can add a clashing email
+            cur.execute("BEGIN IMMEDIATE")
+        emails = list({row[2] for row in accounts})
+        existing = set()
+        for i in range(0, len(emails), 500):
+            chunk = emails[i:i + 500]
+            cur.execute(
+                f"SELECT Email FROM AccountDB WHERE Email IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            existing.update(email for (email,) in cur.fetchall())
+
+        fresh = []
+        for row in accounts:
+            if row[2] in existing:
+                duplicates.append(row)
+            else:
+                existing.add(row[2])
+                fresh.append(row)
+        cur.executemany(
+            "INSERT INTO AccountDB (FirstName, LastName, Email, Password) VALUES (?, ?, ?, ?)", fresh
+        )
+        inserted = len(fresh)
+    for row in fresh:
+        email_filter.add(conn, row[2])
+    return inserted, duplicates
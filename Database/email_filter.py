@@ -0,0 +1,222 @@
+"""In-memory Bloom filter of registered emails.
+
+`db_utils.create_account` asks the filter first (through
+`user_exists(..., trust_filter=True)`): a miss returns False without
+touching SQLite, a possible hit goes on to the real query. Other
+`user_exists` callers always query, because a miss is only definite for
+rows the filter has seen.
+
+There is one filter per database path, built from AccountDB on first use
+(or ahead of time with `preload`) and kept current by `add`, which
+db_utils calls from `create_account` and `bulk_create_accounts`. Rows
+written by other processes are picked up incrementally (by AccountDB.id)
+at most every REFRESH_INTERVAL seconds; until then they are misses, which
+create_account tolerates since the UNIQUE constraint rejects the insert.
+
+A Bloom filter never forgets an email, so it can only err towards "maybe"
+and the database stays the authority. The false-positive rate is set with
+`set_false_positive_rate`; `stats()` reports how many checks skipped the
+database and how many "maybe" answers turned out to be false positives.
+"""
+import math
+import threading
+import time
+
+FALSE_POSITIVE_RATE = 0.01
+MIN_CAPACITY = 1024
+GROWTH = 2          # a rebuilt filter has room for GROWTH x the current accounts
+REFRESH_INTERVAL = 1.0
+
+_MASK64 = (1 << 64) - 1
+_MIX = 0x9E3779B97F4A7C15
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+_enabled = True
+
+
+class BloomFilter:
+    """Bit array sized for `capacity` items at false-positive rate `fp_rate`."""
+
+    def __init__(self, capacity, fp_rate=FALSE_POSITIVE_RATE):
+        self.capacity = max(int(capacity), 1)
+        self.fp_rate = fp_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _probes(self, item):
+        # Double hashing seeded from the str hash: the filter lives in one
+        # process, so hash randomization across runs does not matter, and
+        # str hashes are cached on the object.
+        h = hash(item) & _MASK64
+        h2 = ((h * _MIX) & _MASK64) >> 31 | 1
+        return h, h2
+
+    def add(self, item):
+        """Set item's bits; count only grows if at least one bit was new (i.e. item is new)."""
+        h1, h2 = self._probes(item)
+        bits, size = self.bits, self.size
+        new = False
+        for _ in range(self.hashes):
+            pos = h1 % size
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                new = True
+            h1 += h2
+        if new:
+            self.count += 1
+
+    def __contains__(self, item):
+        # probes are generated one at a time so a miss usually stops after one or two
+        h1, h2 = self._probes(item)
+        bits, size = self.bits, self.size
+        for _ in range(self.hashes):
+            pos = h1 % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+            h1 += h2
+        return True
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+
+class EmailIndex:
+    """Bloom filter of AccountDB emails for one database, with counters."""
+
+    def __init__(self, fp_rate=FALSE_POSITIVE_RATE):
+        self.fp_rate = fp_rate
+        self.filter = None
+        self.last_id = 0
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        self.checks = 0
+        self.bypassed = 0
+        self.confirmed = 0
+        self.false_positives = 0
+
+    def _load(self, conn):
+        total = conn.execute("SELECT COUNT(*) FROM AccountDB").fetchone()[0]
+        bloom = BloomFilter(max(MIN_CAPACITY, total * GROWTH), self.fp_rate)
+        last_id = 0
+        for row_id, email in conn.execute("SELECT id, Email FROM AccountDB WHERE Email IS NOT NULL"):
+            bloom.add(email)
+            last_id = max(last_id, row_id)
+        self.filter, self.last_id = bloom, last_id
+        self.checked_at = time.monotonic()
+
+    def _refresh(self, conn):
+        rows = conn.execute("SELECT id, Email FROM AccountDB WHERE id > ? AND Email IS NOT NULL",
+                            (self.last_id,)).fetchall()
+        for row_id, email in rows:
+            self.filter.add(email)
+            self.last_id = max(self.last_id, row_id)
+        self.checked_at = time.monotonic()
+        if self.filter.full:
+            self._load(conn)
+
+    def ensure_loaded(self, conn):
+        if self.filter is not None and time.monotonic() - self.checked_at < REFRESH_INTERVAL:
+            return
+        with self.lock:
+            if self.filter is None:
+                self._load(conn)
+            elif time.monotonic() - self.checked_at >= REFRESH_INTERVAL:
+                self._refresh(conn)
+
+    def might_contain(self, conn, email):
+        """False means email is definitely not registered; True means ask the database."""
+        self.ensure_loaded(conn)
+        self.checks += 1
+        if email in self.filter:
+            return True
+        self.bypassed += 1
+        return False
+
+    def record(self, found):
+        """Outcome of the database query that followed a "maybe"."""
+        if found:
+            self.confirmed += 1
+        else:
+            self.false_positives += 1
+
+    def add(self, email):
+        if email is None:
+            return
+        with self.lock:
+            # before the first load there is nothing to update; the load reads the row.
+            # A filter that has filled up is rebuilt larger on the next refresh.
+            if self.filter is not None:
+                self.filter.add(email)
+
+    def stats(self):
+        maybes = self.checks - self.bypassed
+        return {
+            "checks": self.checks,
+            "bypassed": self.bypassed,
+            "confirmed": self.confirmed,
+            "false_positives": self.false_positives,
+            "bypass_rate": self.bypassed / self.checks if self.checks else 0.0,
+            "false_positive_rate": self.false_positives / maybes if maybes else 0.0,
+            "emails": self.filter.count if self.filter else 0,
+            "filter_bytes": len(self.filter.bits) if self.filter else 0,
+        }
+
+
+def index_for(conn):
+    """The EmailIndex of a pooled connection's database, or None (filter disabled or unpooled conn)."""
+    db_path = getattr(conn, "db_path", None)
+    if not _enabled or db_path is None:
+        return None
+    index = _indexes.get(db_path)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(db_path)
+            if index is None:
+                index = _indexes[db_path] = EmailIndex(FALSE_POSITIVE_RATE)
+    return index
+
+
+def add(conn, email):
+    """Record a newly created account's email (no-op until the filter is loaded)."""
+    index = index_for(conn)
+    if index is not None:
+        index.add(email)
+
+
+def preload(db_path):
+    """Build the filter for db_path now instead of on the first check."""
+    from Database import db_utils
+
+    with db_utils.connection(db_path) as conn:
+        index = index_for(conn)
+        if index is not None:
+            index.ensure_loaded(conn)
+
+
+def set_false_positive_rate(rate):
+    """Target false-positive rate for filters built from now on; drops loaded filters."""
+    global FALSE_POSITIVE_RATE
+    if not 0 < rate < 1:
+        raise ValueError("false-positive rate must be between 0 and 1")
+    FALSE_POSITIVE_RATE = rate
+    reset()
+
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def reset():
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def stats():
+    """{db_path: counters} for every loaded filter."""
+    return {db_path: index.stats() for db_path, index in list(_indexes.items())}
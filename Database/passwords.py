@@ -0,0 +1,65 @@
+"""Salted password hashing for AccountDB.
+
+Passwords are stored as "pbkdf2_sha256$<iterations>$<salt>$<hash>".
+Rows written before hashing was introduced still hold the plaintext;
+check_password accepts them and needs_rehash reports them so the caller
+can upgrade the row on the next successful login.
+"""
+import base64
+import hashlib
+import hmac
+import os
+
+ALGORITHM = "pbkdf2_sha256"
+SALT_BYTES = 16
+
+# Work factor for new hashes. Raising it makes existing hashes report
+# needs_rehash, so they are upgraded as users log in.
+iterations = 600_000
+
+
+def set_work_factor(value):
+    global iterations
+    if value < 1:
+        raise ValueError("work factor must be positive")
+    iterations = int(value)
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii")
+
+
+def hash_password(password, rounds=None):
+    rounds = rounds or iterations
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, rounds)
+    return f"{ALGORITHM}${rounds}${_b64(salt)}${_b64(digest)}"
+
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(ALGORITHM + "$")
+
+
+def check_password(password, stored):
+    """True if password matches the stored hash (or legacy plaintext)."""
+    if stored is None:
+        return False
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), str(stored).encode("utf-8"))
+    try:
+        _, rounds, salt, expected = stored.split("$")
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"),
+                                     base64.b64decode(salt), int(rounds))
+    except ValueError:
+        return False
+    return hmac.compare_digest(_b64(digest), expected)
+
+
+def needs_rehash(stored):
+    """True for plaintext rows and hashes made with a lower work factor."""
+    if not is_hashed(stored):
+        return True
+    try:
+        return int(stored.split("$")[1]) < iterations
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,192 @@
+"""Revenue rollups per billing month and customer type.
+
+RevenueRollupDB keeps one row per (BillingMonth, CustomerType) with the
+bill count and the kWh, energy, fixed, env-fee, VAT and total sums.
+It is kept current inside the same transaction as every bill write:
+`bill_ledger.insert_bills` folds each batch into one upsert per group
+(`add_rows`), and triggers on BillDB handle updates and deletes (e.g.
+rebilling). A report therefore reads a handful of rows no matter how many
+bills the ledger holds.
+
+Sums are kept as integers (kWh in thousandths, money in centavos, see
+money.py) so incremental updates never drift from a full recompute and
+`verify` can compare the two exactly. `_scale` rounds exactly like the
+triggers' SQL ROUND.
+"""
+import sqlite3
+
+KWH_SCALE = 1000
+CENTS = 100
+
+# rollup column -> (BillDB column, bill dict key, scale)
+SUMS = {
+    "KwhMilli": ("Kwh", "kwh", KWH_SCALE),
+    "EnergyCents": ("BaseCharge", "base", CENTS),
+    "FixedCents": ("Fixed", "fixed", CENTS),
+    "EnvFeeCents": ("EnvFee", "env", CENTS),
+    "VatCents": ("Vat", "vat", CENTS),
+    "TotalCents": ("Total", "total", CENTS),
+}
+
+REPORT_KEYS = ("month", "type", "bills", "kwh", "energy", "fixed", "env", "vat", "total")
+
+
+def _scaled(row, column, scale):
+    return f"CAST(ROUND(COALESCE({row}.{column}, 0) * {scale}) AS INTEGER)"
+
+
+def _apply(row, sign):
+    """Trigger statements adding (sign=+1) or removing (sign=-1) one bill."""
+    names = ", ".join(SUMS)
+    values = ", ".join(f"{sign} * {_scaled(row, column, scale)}" for column, _, scale in SUMS.values())
+    updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in SUMS)
+    statements = (
+        f"INSERT INTO RevenueRollupDB (BillingMonth, CustomerType, Bills, {names}) "
+        f"VALUES ({row}.BillingMonth, {row}.CustomerType, {sign}, {values}) "
+        f"ON CONFLICT (BillingMonth, CustomerType) DO UPDATE SET Bills = Bills + excluded.Bills, {updates};"
+    )
+    if sign < 0:
+        statements += (f" DELETE FROM RevenueRollupDB WHERE BillingMonth = {row}.BillingMonth"
+                       f" AND CustomerType = {row}.CustomerType AND Bills = 0;")
+    return statements
+
+
+def _scale(value, scale):
+    """int(ROUND(value * scale)) with SQLite's rounding (half away from zero)."""
+    if value is None:
+        return 0
+    scaled = value * scale
+    return int(scaled + 0.5) if scaled >= 0 else -int(-scaled + 0.5)
+
+
+def _upsert_sql():
+    names = ", ".join(SUMS)
+    updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in SUMS)
+    return (f"INSERT INTO RevenueRollupDB (BillingMonth, CustomerType, Bills, {names}) "
+            f"VALUES (?, ?, ?, {', '.join('?' * len(SUMS))}) "
+            f"ON CONFLICT (BillingMonth, CustomerType) DO UPDATE SET Bills = Bills + excluded.Bills, {updates}")
+
+
+def add_rows(conn: sqlite3.Connection, rows, columns):
+    """Add freshly inserted bills to the rollups, one upsert per group.
+
+    rows: tuples of bill values in `columns` order (bill dict keys, e.g.
+    bill_ledger.BILL_COLUMNS), with month normalized and type lower-cased.
+    Runs in the caller's transaction; does not commit.
+    """
+    position = {name: i for i, name in enumerate(columns)}
+    month, customer_type = position["month"], position["type"]
+    picks = [(i, position[key], scale) for i, (_, key, scale) in enumerate(SUMS.values(), 1)]
+    groups = {}
+    for row in rows:
+        key = (row[month], row[customer_type])
+        sums = groups.get(key)
+        if sums is None:
+            sums = groups[key] = [0] * (len(SUMS) + 1)
+        sums[0] += 1
+        for i, index, scale in picks:
+            sums[i] += _scale(row[index], scale)
+    conn.executemany(_upsert_sql(), (key + tuple(sums) for key, sums in groups.items()))
+
+
+def ensure_tables(conn: sqlite3.Connection):
+    """Create the rollup table and triggers; a new table is filled from BillDB."""
+    cur = conn.cursor()
+    exists = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'RevenueRollupDB'"
+    ).fetchone()
+    columns = ",\n".join(f"            {name} INTEGER NOT NULL DEFAULT 0" for name in SUMS)
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS RevenueRollupDB (
+            BillingMonth TEXT NOT NULL,
+            CustomerType TEXT NOT NULL,
+            Bills INTEGER NOT NULL DEFAULT 0,
+{columns},
+            PRIMARY KEY (BillingMonth, CustomerType)
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_rollup_bill_delete AFTER DELETE ON BillDB "
+        f"BEGIN {_apply('OLD', -1)} END"
+    )
+    watched = ", ".join(["BillingMonth", "CustomerType"] + [column for column, _, _ in SUMS.values()])
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_rollup_bill_update AFTER UPDATE OF {watched} ON BillDB "
+        f"BEGIN {_apply('OLD', -1)} {_apply('NEW', 1)} END"
+    )
+    conn.commit()
+    if not exists:
+        rebuild(conn)
+
+
+def _recompute_sql():
+    sums = ", ".join(f"SUM({_scaled('BillDB', column, scale)})" for column, _, scale in SUMS.values())
+    return (f"SELECT BillingMonth, CustomerType, COUNT(*), {sums} FROM BillDB "
+            f"GROUP BY BillingMonth, CustomerType")
+
+
+def rebuild(conn: sqlite3.Connection):
+    """Recompute every rollup row from the raw bills; returns the number of rows."""
+    with conn:
+        conn.execute("DELETE FROM RevenueRollupDB")
+        conn.execute(f"INSERT INTO RevenueRollupDB (BillingMonth, CustomerType, Bills, {', '.join(SUMS)}) "
+                     + _recompute_sql())
+    return conn.execute("SELECT COUNT(*) FROM RevenueRollupDB").fetchone()[0]
+
+
+def verify(conn: sqlite3.Connection):
+    """Compare the rollups with a full scan of BillDB.
+
+    Returns a list of (month, type, rollup_row, recomputed_row) for every
+    group that differs; an empty list means the rollups are exact.
+    """
+    stored = {row[:2]: row[2:] for row in conn.execute(
+        f"SELECT BillingMonth, CustomerType, Bills, {', '.join(SUMS)} FROM RevenueRollupDB")}
+    actual = {row[:2]: row[2:] for row in conn.execute(_recompute_sql())}
+    return [(month, customer_type, stored.get((month, customer_type)), actual.get((month, customer_type)))
+            for month, customer_type in sorted(set(stored) | set(actual))
+            if stored.get((month, customer_type)) != actual.get((month, customer_type))]
+
+
+def _report_row(row):
+    month, customer_type, bills, kwh, *cents = row
+    return dict(zip(REPORT_KEYS, (month, customer_type, bills, kwh / KWH_SCALE, *(c / CENTS for c in cents))))
+
+
+def revenue_report(conn: sqlite3.Connection, start_month=None, end_month=None, customer_type=None):
+    """Rollup rows (dicts with REPORT_KEYS) ordered by month and type, read from RevenueRollupDB only."""
+    # imported here: bill_ledger imports this module
+    from Database.bill_ledger import normalize_month
+
+    sql = f"SELECT BillingMonth, CustomerType, Bills, {', '.join(SUMS)} FROM RevenueRollupDB WHERE 1 = 1"
+    params = []
+    if start_month is not None:
+        sql += " AND BillingMonth >= ?"
+        params.append(normalize_month(start_month))
+    if end_month is not None:
+        sql += " AND BillingMonth <= ?"
+        params.append(normalize_month(end_month))
+    if customer_type is not None:
+        sql += " AND CustomerType = ?"
+        params.append(customer_type.strip().lower())
+    sql += " ORDER BY BillingMonth, CustomerType"
+    return [_report_row(row) for row in conn.execute(sql, params)]
+
+
+def monthly_totals(conn: sqlite3.Connection, start_month=None, end_month=None):
+    """Rollups summed across customer types, one dict per month."""
+    from Database.bill_ledger import normalize_month
+
+    sums = ", ".join(f"SUM({name})" for name in SUMS)
+    sql = f"SELECT BillingMonth, 'all', SUM(Bills), {sums} FROM RevenueRollupDB WHERE 1 = 1"
+    params = []
+    if start_month is not None:
+        sql += " AND BillingMonth >= ?"
+        params.append(normalize_month(start_month))
+    if end_month is not None:
+        sql += " AND BillingMonth <= ?"
+        params.append(normalize_month(end_month))
+    sql += " GROUP BY BillingMonth ORDER BY BillingMonth"
+    return [_report_row(row) for row in conn.execute(sql, params)]
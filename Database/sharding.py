@@ -0,0 +1,261 @@
+"""Sharded account and bill storage.
+
+Accounts are routed by email and bills by account number to one of N
+SQLite files with a jump consistent hash over a BLAKE2 digest of the
+key, so the placement is stable across processes and machines and
+adding a shard (appended to the end of the list) moves only about
+1/(N+1) of the keys. Every shard is a normal AccountSystem database
+opened through the db_utils pools, so each has its own writer lock.
+
+Point operations (login, sign-up, one customer's history) touch a single
+shard. Reports fan out to every shard on a thread pool and are merged;
+sqlite3 releases the GIL while a statement runs, so shards are scanned
+in parallel.
+
+    store = ShardedStore(shard_paths("Database/shards", 4))
+    store.create_account("Ana", "Cruz", "ana@example.com", "secret")
+    store.record_bills(bills)
+    store.revenue_report(start_month="2026-01")
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from Database import bill_ledger, db_utils, email_filter, revenue_rollup
+
+DEFAULT_MOVE_BATCH = 2000
+
+
+def shard_paths(directory, count, prefix="AccountSystem"):
+    """Conventional shard file names: <directory>/<prefix>_shard00.db, ..."""
+    return [os.path.join(directory, f"{prefix}_shard{i:02d}.db") for i in range(count)]
+
+
+def _key_hash(key):
+    digest = hashlib.blake2b(str(key).strip().lower().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def jump_hash(key_hash, buckets):
+    """Lamping & Veach jump consistent hash: bucket in range(buckets) for a 64-bit hash."""
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key_hash = (key_hash * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key_hash >> 33) + 1)))
+    return b
+
+
+def shard_index(key, count):
+    """Stable shard number for an email or account number."""
+    return jump_hash(_key_hash(key), count)
+
+
+class ShardedStore:
+    """Routes account and bill operations over a list of shard database paths.
+
+    The order of `paths` is part of the placement: new shards must be
+    appended, then `rebalance` moves the keys that now belong to them.
+    Missing shard directories are created; a missing shard file starts empty.
+    """
+
+    def __init__(self, paths, workers=None):
+        if not paths:
+            raise ValueError("at least one shard path is required")
+        self.paths = list(paths)
+        for directory in {os.path.dirname(path) for path in self.paths}:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers or len(self.paths),
+                                            thread_name_prefix="shard")
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # -- routing -------------------------------------------------------
+
+    def shard_for_email(self, email):
+        return self.paths[shard_index(email, len(self.paths))]
+
+    def shard_for_account(self, account):
+        return self.paths[shard_index(account, len(self.paths))]
+
+    def _on_shard(self, path, fn, *args):
+        with db_utils.connection(path) as conn:
+            return fn(conn, *args)
+
+    def fan_out(self, fn, *args):
+        """Run fn(conn, *args) on every shard in parallel; results in shard order."""
+        futures = [self._executor.submit(self._on_shard, path, fn, *args) for path in self.paths]
+        return [future.result() for future in futures]
+
+    def _grouped(self, items, key):
+        groups = {}
+        for item in items:
+            groups.setdefault(key(item), []).append(item)
+        return groups
+
+    def _write_groups(self, groups, fn):
+        futures = [self._executor.submit(self._on_shard, path, fn, items) for path, items in groups.items()]
+        return [future.result() for future in futures]
+
+    # -- accounts (routed by email) -------------------------------------
+
+    def create_account(self, first, last, email, password):
+        return self._on_shard(self.shard_for_email(email), db_utils.create_account, first, last, email, password)
+
+    def verify_user(self, email, password):
+        return self._on_shard(self.shard_for_email(email), db_utils.verify_user, email, password)
+
+    def user_exists(self, email):
+        return self._on_shard(self.shard_for_email(email), db_utils.user_exists, email)
+
+    def update_password(self, email, new_password):
+        return self._on_shard(self.shard_for_email(email), db_utils.update_password, email, new_password)
+
+    def bulk_create_accounts(self, accounts):
+        """Like db_utils.bulk_create_accounts, with each shard's batch written in parallel."""
+        groups = self._grouped(accounts, lambda row: self.shard_for_email(row[2]))
+        inserted, duplicates = 0, []
+        for count, skipped in self._write_groups(groups, db_utils.bulk_create_accounts):
+            inserted += count
+            duplicates.extend(skipped)
+        return inserted, duplicates
+
+    # -- bills (routed by account number) --------------------------------
+
+    def record_bills(self, bills):
+        """Write bills to their shards, one transaction per shard, shards in parallel.
+
+        Each shard's batch is atomic; a failure on one shard does not undo
+        the others. Returns the number of bills written.
+        """
+        groups = self._grouped(bills, lambda bill: self.shard_for_account(bill["account"]))
+        return sum(self._write_groups(groups, bill_ledger.record_bills))
+
+    def customer_history(self, account, start_month=None, end_month=None):
+        return self._on_shard(self.shard_for_account(account), bill_ledger.customer_history,
+                              account, start_month, end_month)
+
+    def bills_for_month(self, month, customer_type=None):
+        return [bill for shard in self.fan_out(bill_ledger.bills_for_month, month, customer_type)
+                for bill in shard]
+
+    def count_bills(self):
+        return sum(self.fan_out(lambda conn: conn.execute("SELECT COUNT(*) FROM BillDB").fetchone()[0]))
+
+    def revenue_report(self, start_month=None, end_month=None, customer_type=None):
+        """revenue_rollup.revenue_report merged across shards."""
+        merged = {}
+        for rows in self.fan_out(revenue_rollup.revenue_report, start_month, end_month, customer_type):
+            for row in rows:
+                key = (row["month"], row["type"])
+                total = merged.get(key)
+                if total is None:
+                    merged[key] = dict(row)
+                else:
+                    for name in revenue_rollup.REPORT_KEYS[2:]:
+                        total[name] += row[name]
+        for row in merged.values():
+            row["kwh"] = round(row["kwh"], 3)
+            for name in revenue_rollup.REPORT_KEYS[4:]:
+                row[name] = round(row[name], 2)
+        return [merged[key] for key in sorted(merged)]
+
+
+def _ensure_move_table(conn):
+    # (source shard, source row id) of every bill copied in, so a rebalance
+    # interrupted between the copy and the delete can be re-run safely
+    conn.execute("CREATE TABLE IF NOT EXISTS ShardMoveDB (SourcePath TEXT NOT NULL, SourceId INTEGER NOT NULL, "
+                 "PRIMARY KEY (SourcePath, SourceId)) WITHOUT ROWID")
+    conn.commit()
+
+
+def _scan(source, select, batch_size):
+    """Yield the rows of `select` (id first) in id order, batch_size at a time.
+
+    Each batch is a fresh keyset query, so only one batch is held in
+    memory and rows the caller deletes in between do not disturb the scan.
+    """
+    last_id = 0
+    while True:
+        batch = source.execute(select + " WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)).fetchall()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+def _moving(batch, path, target_of, key):
+    moving = {}
+    for row in batch:
+        target = target_of(row[key])
+        if target != path:
+            moving.setdefault(target, []).append(row)
+    return moving
+
+
+def _move_accounts(source, path, target_of, batch_size, stats):
+    select = "SELECT id, FirstName, LastName, Email, Password FROM AccountDB"
+    for batch in _scan(source, select, batch_size):
+        for target, rows in _moving(batch, path, target_of, 3).items():
+            with db_utils.connection(target) as conn:
+                with conn:
+                    conn.executemany("INSERT OR IGNORE INTO AccountDB (FirstName, LastName, Email, Password) "
+                                     "VALUES (?, ?, ?, ?)", [row[1:] for row in rows])
+                for row in rows:
+                    email_filter.add(conn, row[3])
+            with source:
+                source.executemany("DELETE FROM AccountDB WHERE id = ?", [(row[0],) for row in rows])
+            stats["accounts"] += len(rows)
+
+
+def _move_bills(source, path, target_of, batch_size, stats):
+    select = "SELECT id, " + bill_ledger._SELECT[len("SELECT "):]
+    for batch in _scan(source, select, batch_size):
+        for target, rows in _moving(batch, path, target_of, 1).items():
+            with db_utils.connection(target) as conn:
+                _ensure_move_table(conn)
+                done = {source_id for (source_id,) in conn.execute(
+                    f"SELECT SourceId FROM ShardMoveDB WHERE SourcePath = ? AND SourceId IN "
+                    f"({', '.join('?' * len(rows))})", [path] + [row[0] for row in rows])}
+                fresh = [row for row in rows if row[0] not in done]
+                with conn:
+                    bill_ledger.insert_bills(conn, (bill_ledger._bill(row[1:]) for row in fresh), commit=False)
+                    conn.executemany("INSERT INTO ShardMoveDB (SourcePath, SourceId) VALUES (?, ?)",
+                                     [(path, row[0]) for row in fresh])
+            with source:
+                source.executemany("DELETE FROM BillDB WHERE id = ?", [(row[0],) for row in rows])
+            stats["bills"] += len(rows)
+
+
+def rebalance(old_paths, new_paths, batch_size=DEFAULT_MOVE_BATCH, progress=None):
+    """Move accounts and bills from the old shard layout to the new one.
+
+    new_paths must start with old_paths (shards are only ever appended).
+    Writes should be stopped while this runs. Each batch is copied to its
+    new shard and then deleted from the old one; an interrupted run can
+    simply be started again. Returns {"accounts": moved, "bills": moved}.
+    """
+    old_paths, new_paths = list(old_paths), list(new_paths)
+    if new_paths[:len(old_paths)] != old_paths:
+        raise ValueError("new shards must be appended after the existing ones, in the same order")
+    new_store = ShardedStore(new_paths, workers=1)
+    stats = {"accounts": 0, "bills": 0}
+    try:
+        for path in old_paths:
+            with db_utils.connection(path) as source:
+                _move_accounts(source, path, new_store.shard_for_email, batch_size, stats)
+                _move_bills(source, path, new_store.shard_for_account, batch_size, stats)
+            if progress:
+                print(f"{path}: {stats['accounts']:,} accounts and {stats['bills']:,} bills moved so far",
+                      file=progress)
+    finally:
+        new_store.close()
+    return stats
@@ -0,0 +1,79 @@
+"""Tariff tables in SQLite.
+
+TariffDB holds one row per customer class (fixed charge, VAT and
+environmental-fee rates) and TariffTierDB holds its tiers in order.
+A NULL TierLimit means the tier is unlimited.
+
+`python tariffs.py import tariffs.json --db <file>` stores a JSON config
+with save_config; pass the database file as the tariff source (e.g.
+`tariffs.get_tariffs(<file>)`) to bill from it.
+"""
+import sqlite3
+
+
+def ensure_tables(conn: sqlite3.Connection):
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS TariffDB (
+            CustomerType TEXT PRIMARY KEY,
+            Fixed REAL NOT NULL,
+            VatRate REAL NOT NULL,
+            EnvFeeRate REAL NOT NULL,
+            IsDefault INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS TariffTierDB (
+            CustomerType TEXT NOT NULL REFERENCES TariffDB(CustomerType),
+            TierOrder INTEGER NOT NULL,
+            TierLimit REAL,
+            Rate REAL NOT NULL,
+            PRIMARY KEY (CustomerType, TierOrder)
+        )
+        """
+    )
+    conn.commit()
+
+
+def save_config(conn: sqlite3.Connection, config):
+    """Replace the stored tariffs with a config dict (tariffs.json layout)."""
+    ensure_tables(conn)
+    vat_rate = config.get("vat_rate", 0.12)
+    env_fee_rate = config.get("env_fee_rate", 0.0025)
+    default_class = config.get("default_class", "commercial").lower()
+    with conn:
+        conn.execute("DELETE FROM TariffTierDB")
+        conn.execute("DELETE FROM TariffDB")
+        for name, spec in config["classes"].items():
+            name = name.lower()
+            conn.execute(
+                "INSERT INTO TariffDB (CustomerType, Fixed, VatRate, EnvFeeRate, IsDefault) VALUES (?, ?, ?, ?, ?)",
+                (name, spec.get("fixed", 0), spec.get("vat_rate", vat_rate),
+                 spec.get("env_fee_rate", env_fee_rate), int(name == default_class)),
+            )
+            conn.executemany(
+                "INSERT INTO TariffTierDB (CustomerType, TierOrder, TierLimit, Rate) VALUES (?, ?, ?, ?)",
+                [(name, order, limit, rate) for order, (limit, rate) in enumerate(spec["tiers"])],
+            )
+
+
+def load_config(conn: sqlite3.Connection):
+    """Read the stored tariffs back as a config dict."""
+    ensure_tables(conn)
+    cur = conn.cursor()
+    classes = {}
+    default_class = None
+    cur.execute("SELECT CustomerType, Fixed, VatRate, EnvFeeRate, IsDefault FROM TariffDB")
+    for name, fixed, vat_rate, env_fee_rate, is_default in cur.fetchall():
+        classes[name] = {"fixed": fixed, "vat_rate": vat_rate, "env_fee_rate": env_fee_rate, "tiers": []}
+        if is_default:
+            default_class = name
+    cur.execute("SELECT CustomerType, TierLimit, Rate FROM TariffTierDB ORDER BY CustomerType, TierOrder")
+    for name, limit, rate in cur.fetchall():
+        classes[name]["tiers"].append([limit, rate])
+    if not classes:
+        raise ValueError("no tariffs stored in TariffDB")
+    return {"default_class": default_class or next(iter(classes)), "classes": classes}
@@ -3,20 +3,106 @@
 Lightweight orchestrator that composes the modular login and register
 frames into a single application window.
 """
-from tkinter import Tk, Frame, messagebox
-import sqlite3
+import threading
+from tkinter import Tk, Frame, Label, Button, messagebox
 
 from register_page import build_register_frame
 from login_page import build_login_frame
-from Database import db_utils
+from Database import db_utils, email_filter
+import asset_cache
+import metrics
 from electric_bill_gui import open_main_app
 
 
 DB_PATH = "Database/AccountSystem.db"
 
+# Screens built in idle time after the login screen is up. Empty by
+# default; add "account" to make the first login feel instant at the
+# cost of a larger resident set.
+PREWARM_SCREENS = ()
+
+
+class ScreenRegistry:
+    """Stacked screens that are built the first time they are shown.
+
+    Each screen gets its own container Frame gridded into the root; the
+    builder fills it on first show. Screens registered as releasable can
+    be destroyed with release() and are rebuilt on their next show().
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.builders = {}
+        self.releasable = set()
+        self.containers = {}
+        self.current = None
+
+    def register(self, name, builder, releasable=False):
+        """builder(container) builds the screen's widgets inside container."""
+        self.builders[name] = builder
+        if releasable:
+            self.releasable.add(name)
+
+    def is_built(self, name):
+        return name in self.containers
+
+    def _build(self, name):
+        container = Frame(self.root)
+        container.grid(row=0, column=0, sticky="nsew")
+        container.lower()
+        self.containers[name] = container
+        self.builders[name](container)
+        return container
+
+    def show(self, name):
+        container = self.containers.get(name) or self._build(name)
+        container.tkraise()
+        self.current = name
+
+    def prewarm(self, *names):
+        """Build the given screens one per idle callback, without showing them."""
+        pending = [name for name in names if not self.is_built(name)]
+
+        def build_next():
+            while pending:
+                name = pending.pop(0)
+                if not self.is_built(name):
+                    self._build(name)
+                    break
+            if pending:
+                self.root.after_idle(build_next)
+
+        if pending:
+            self.root.after_idle(build_next)
+
+    def release(self, name):
+        """Destroy a releasable screen that is not being shown."""
+        if name not in self.releasable or name == self.current:
+            return False
+        container = self.containers.pop(name, None)
+        if container is None:
+            return False
+        container.destroy()
+        return True
+
+
+def build_success_frame(parent, on_continue):
+    success_frame = Frame(parent, bg="#525561")
+    success_frame.pack(fill='both', expand=True)
 
-def main():
-    root = Tk()
+    Label(success_frame, text="Registration Successful!", fg="#FFFFFF", font=("Arial", 24, "bold"), bg="#525561").pack(pady=50)
+    Label(success_frame, text="Your account has been created successfully.", fg="#FFFFFF", font=("Arial", 12), bg="#525561").pack(pady=10)
+    Button(success_frame, text="Proceed to Login", command=on_continue, bg="#206DB4", fg="white", font=("Arial", 12), padx=20, pady=10).pack(pady=20)
+    return success_frame
+
+
+def build_app(root):
+    """Register every screen with a ScreenRegistry and show the login screen.
+
+    Only the login screen is built up front; the others are built the
+    first time they are shown (or during idle time, see PREWARM_SCREENS).
+    Returns the registry.
+    """
     root.title('Electric Bill Account System')
 
     # center window
@@ -26,67 +112,75 @@ def main():
     y = (root.winfo_screenheight() // 2) - (height // 2)
     root.geometry(f"{width}x{height}+{x}+{y}")
 
-    # ensure DB/table exists
-    conn = sqlite3.connect(DB_PATH)
-    db_utils.ensure_table(conn)
-    conn.close()
-
-    # container frames
-    sign_in = Frame(root)
-    sign_up = Frame(root)
-    success = Frame(root)
-    account = Frame(root)
-    for frame in (sign_in, sign_up, success, account):
-           frame.grid(row=0, column=0, sticky="nsew")
-    
+    # ensure DB/table exists (the pool checks the schema once per process)
+    with db_utils.connection(DB_PATH):
+        pass
+    # build the email existence filter off the Tk thread (see Database/email_filter.py)
+    threading.Thread(target=email_filter.preload, args=(DB_PATH,), daemon=True).start()
+
     # Configure grid weights so frames expand to fill window
     root.grid_rowconfigure(0, weight=1)
     root.grid_columnconfigure(0, weight=1)
 
-    def show_frame(frame):
-        frame.tkraise()
+    screens = ScreenRegistry(root)
 
     # callback: after successful registration, show success screen
     def on_register_success():
-        show_frame(success)
+        screens.show("success")
+        screens.release("sign_up")
 
     # callback: from success screen, go to login
     def on_success_to_login():
-        show_frame(sign_in)
+        screens.show("sign_in")
+        screens.release("success")
 
     # callback: after successful login, show account system
     def on_login_success():
-        show_frame(account)
+        screens.show("account")
 
-    # callback: logout from account system back to login
+    # callback: logout from account system back to login; the billing
+    # screen is released so the next session starts with a clean form
     def on_logout():
-        show_frame(sign_in)
+        screens.show("sign_in")
+        screens.release("account")
 
-    # build modular UIs inside the containers
-    reg_frame = build_register_frame(sign_up, DB_PATH, on_show_login=lambda: show_frame(sign_in), on_register_success=on_register_success)
-    reg_frame.pack(fill='both', expand=True)
+    def build_sign_in(container):
+        login_frame = build_login_frame(container, DB_PATH, on_login_success=on_login_success, on_show_register=lambda: screens.show("sign_up"))
+        login_frame.pack(fill='both', expand=True)
 
-    login_frame = build_login_frame(sign_in, DB_PATH, on_login_success=on_login_success, on_show_register=lambda: show_frame(sign_up))
-    login_frame.pack(fill='both', expand=True)
+    def build_sign_up(container):
+        reg_frame = build_register_frame(container, DB_PATH, on_show_login=lambda: screens.show("sign_in"), on_register_success=on_register_success)
+        reg_frame.pack(fill='both', expand=True)
 
-    # build account/billing system frame
-    account_frame = open_main_app(parent=account, on_logout=on_logout)
-    account_frame.pack(fill='both', expand=True)
+    def build_account(container):
+        account_frame = open_main_app(parent=container, on_logout=on_logout, db_path=DB_PATH)
+        account_frame.pack(fill='both', expand=True)
 
-    # build success screen
-    from tkinter import Label, Button
-    success_frame = Frame(success, bg="#525561")
-    success_frame.pack(fill='both', expand=True)
-    
-    Label(success_frame, text="Registration Successful!", fg="#FFFFFF", font=("Arial", 24, "bold"), bg="#525561").pack(pady=50)
-    Label(success_frame, text="Your account has been created successfully.", fg="#FFFFFF", font=("Arial", 12), bg="#525561").pack(pady=10)
-    Button(success_frame, text="Proceed to Login", command=on_success_to_login, bg="#206DB4", fg="white", font=("Arial", 12), padx=20, pady=10).pack(pady=20)
+    screens.register("sign_in", build_sign_in)
+    screens.register("sign_up", build_sign_up, releasable=True)
+    screens.register("success", lambda container: build_success_frame(container, on_success_to_login), releasable=True)
+    screens.register("account", build_account, releasable=True)
 
     # show login by default
-    show_frame(sign_in)
+    screens.show("sign_in")
+    # decode the register screen's images while the user looks at the login screen
+    asset_cache.preload(root)
+    if PREWARM_SCREENS:
+        screens.prewarm(*PREWARM_SCREENS)
 
     root.resizable(False, False)
-    root.mainloop()
+    return screens
+
+
+def main():
+    metrics.configure_from_env()
+    try:
+        root = Tk()
+        build_app(root)
+        root.mainloop()
+    finally:
+        # final dump of the timings and join the exporter thread
+        metrics.stop_exporter()
 
 
 if __name__ == "__main__":
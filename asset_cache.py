@@ -0,0 +1,94 @@
+"""asset_cache.py
+
+Shared decoded images for the login and register screens.
+
+Each PNG under assets/ is decoded once per Tk interpreter and the same
+PhotoImage is handed to every caller. The cache is stored on the root
+window, which keeps the images alive for as long as the interpreter is.
+
+preload() can warm the cache in the background: the files are read on
+a worker thread and decoded on the Tk thread one image per idle
+callback, so the UI stays responsive while it runs.
+"""
+import base64
+import os
+import threading
+from tkinter import PhotoImage
+
+ASSET_DIR = "assets"
+POLL_MS = 20
+
+# images used by the login and register screens
+UI_ASSETS = (
+    "image_1.png",
+    "headerText_image.png",
+    "email.png",
+    "input_img.png",
+    "button_1.png",
+)
+
+
+def _cache(widget):
+    root = widget._root()
+    cache = getattr(root, "_asset_cache", None)
+    if cache is None:
+        cache = root._asset_cache = {}
+    return cache
+
+
+def get_image(widget, name):
+    """Return the shared PhotoImage for assets/<name> in widget's interpreter."""
+    cache = _cache(widget)
+    image = cache.get(name)
+    if image is None:
+        image = cache[name] = PhotoImage(master=widget._root(), file=os.path.join(ASSET_DIR, name))
+    return image
+
+
+def preload(widget, names=UI_ASSETS, on_done=None):
+    """Warm the cache for names without blocking the Tk thread.
+
+    on_done, if given, is called on the Tk thread once every image is ready.
+    """
+    cache = _cache(widget)
+    root = widget._root()
+    todo = [name for name in names if name not in cache]
+    raw = {}
+    files_read = threading.Event()
+
+    def read_files():
+        for name in todo:
+            try:
+                with open(os.path.join(ASSET_DIR, name), "rb") as fh:
+                    raw[name] = base64.b64encode(fh.read())
+            except OSError:
+                raw[name] = None
+        files_read.set()
+
+    # Tk calls must stay on the Tk thread, so poll for the reader instead
+    # of having it schedule callbacks itself.
+    def wait_for_files():
+        if files_read.is_set():
+            root.after_idle(decode_next)
+        else:
+            root.after(POLL_MS, wait_for_files)
+
+    def decode_next():
+        while todo:
+            name = todo.pop(0)
+            data = raw.get(name)
+            if name in cache or data is None:
+                continue
+            cache[name] = PhotoImage(master=root, data=data)
+            if todo:
+                root.after_idle(decode_next)
+                return
+        if callable(on_done):
+            on_done()
+
+    if not todo:
+        if callable(on_done):
+            root.after_idle(on_done)
+        return
+    threading.Thread(target=read_files, name="asset-preload", daemon=True).start()
+    root.after(POLL_MS, wait_for_files)
@@ -0,0 +1,113 @@
+"""auth_service.py
+
+Runs account checks off the Tk thread.
+
+Password hashing is deliberately slow, so login, sign-up and password
+changes are executed on a small thread pool. Results are queued and
+delivered back on the Tk thread by polling with widget.after(), so the
+callbacks can touch widgets and show message boxes directly.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from Database import db_utils, passwords
+
+AUTH_WORKERS = 2
+POLL_MS = 25
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="auth")
+    return _executor
+
+
+class AuthService:
+    """Account operations for one Tk screen.
+
+    widget: any widget of the screen; its after() delivers the results
+    db_path: path to the sqlite database
+    work_factor: optional PBKDF2 iteration count for new hashes
+
+    Every method takes `callback(result, error)`, called on the Tk thread;
+    error is None on success, otherwise the exception raised by the worker.
+    """
+
+    def __init__(self, widget, db_path, work_factor=None):
+        self.widget = widget
+        self.db_path = db_path
+        if work_factor is not None:
+            passwords.set_work_factor(work_factor)
+        self._results = queue.Queue()
+        self._pending = 0
+        self._polling = False
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    def verify(self, email, password, callback):
+        """callback(ok: bool, error)"""
+        self._submit(callback, self._verify, email, password)
+
+    def create_account(self, first, last, email, password, callback):
+        """callback(None, error); error is sqlite3.IntegrityError for a taken email"""
+        self._submit(callback, self._create_account, first, last, email, password)
+
+    def change_password(self, email, new_password, callback):
+        """callback(changed: bool, error); changed is False if the email is unknown"""
+        self._submit(callback, self._change_password, email, new_password)
+
+    # timed here, on the worker: the Tk handlers only queue the call
+    @metrics.timed("auth_service.verify")
+    def _verify(self, email, password):
+        with db_utils.connection(self.db_path) as conn:
+            return db_utils.verify_user(conn, email, password)
+
+    @metrics.timed("auth_service.create_account")
+    def _create_account(self, first, last, email, password):
+        with db_utils.connection(self.db_path) as conn:
+            db_utils.create_account(conn, first, last, email, password)
+
+    @metrics.timed("auth_service.change_password")
+    def _change_password(self, email, new_password):
+        with db_utils.connection(self.db_path) as conn:
+            if not db_utils.user_exists(conn, email):
+                return False
+            db_utils.update_password(conn, email, new_password)
+            return True
+
+    def _submit(self, callback, fn, *args):
+        def run():
+            try:
+                self._results.put((callback, fn(*args), None))
+            except Exception as exc:
+                self._results.put((callback, None, exc))
+
+        self._pending += 1
+        _get_executor().submit(run)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                callback, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if callable(callback):
+                callback(result, error)
+        if self._pending > 0:
+            self.widget.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
@@ -0,0 +1,60 @@
+"""bench_batch_billing.py
+
+Checks that `batch_billing.calculate_bills` matches the scalar
+`billing.calculate_bill` element for element, then times both paths.
+
+Run from the project root:
+    python benchmarks/bench_batch_billing.py [count]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from billing import calculate_bill
+from batch_billing import calculate_bills
+
+
+def make_readings(count, seed=1234):
+    rng = np.random.default_rng(seed)
+    scale = 10.0 ** rng.integers(0, 4, count)
+    units = np.round(rng.uniform(0, 2000, count) * scale) / scale
+    # tier boundaries and odd values the scalar loop treats specially
+    edge = np.array([0, -5, 0.005, 50, 100, 200, 300, 800, 49.995, 1e7])
+    units[:len(edge)] = edge[:count]
+    types = rng.choice(np.array(["residential", "commercial"]), count)
+    return units, types
+
+
+def check_equivalence(units, types):
+    batch = calculate_bills(units, types)
+    for i, (u, t) in enumerate(zip(units.tolist(), types.tolist())):
+        expected = calculate_bill(u, t)
+        got = tuple(float(col[i]) for col in batch)
+        if got != tuple(float(v) for v in expected):
+            raise AssertionError(f"mismatch for {u!r} {t!r}: scalar={expected} batch={got}")
+
+
+def main(count=200_000):
+    units, types = make_readings(count)
+    check_equivalence(units, types)
+    print(f"equivalence: {count} readings match the scalar path")
+
+    start = time.perf_counter()
+    for u, t in zip(units.tolist(), types.tolist()):
+        calculate_bill(u, t)
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    calculate_bills(units, types)
+    batch = time.perf_counter() - start
+
+    print(f"scalar: {scalar:.3f}s ({count / scalar:,.0f} bills/s)")
+    print(f"batch:  {batch:.3f}s ({count / batch:,.0f} bills/s, {scalar / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
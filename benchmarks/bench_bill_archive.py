@@ -0,0 +1,134 @@
+"""bench_bill_archive.py
+
+Size and scan speed of bill_archive.py against the BillDB table it is
+exported from. Fills a ledger with bills spread over several years,
+archives it with `archive_ledger`, then times the same questions both
+ways:
+  * revenue per month over the whole history (full scan of one column),
+  * every bill of one month,
+  * kWh and total of one customer type for a quarter (two columns),
+  * one account's history,
+and checks that both sides return the same bills and sums.
+
+Run from the project root:
+    python benchmarks/bench_bill_archive.py [bills] [--years 3] [--accounts 50000]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bill_archive
+from batch_billing import calculate_bills
+from Database import bill_ledger
+
+REPEATS = 3
+
+
+def fill_ledger(conn, count, years, accounts, seed=2026, batch_size=50_000):
+    rng = np.random.default_rng(seed)
+    months = [f"{2026 - years + 1 + m // 12}-{m % 12 + 1:02d}" for m in range(years * 12)]
+    account_ids = rng.choice(10**8, size=accounts, replace=False)
+    account_types = rng.choice(["residential", "commercial"], size=accounts, p=[0.8, 0.2])
+    for start in range(0, count, batch_size):
+        n = min(batch_size, count - start)
+        who = rng.integers(0, accounts, size=n)
+        types = account_types[who]
+        kwh = np.round(rng.gamma(2.0, 150.0, size=n), 2)
+        energy, fixed, vat, env, rate, total = calculate_bills(kwh, types)
+        month = rng.integers(0, len(months), size=n)
+        bill_ledger.insert_bills(conn, (
+            {"account": f"{account_ids[w]:08d}", "name": f"Customer {w}", "address": f"{w % 997} Rizal St, Manila",
+             "type": t, "month": months[m], "kwh": k, "rate": r, "fixed": f, "base": e, "env": v, "vat": x,
+             "total": tot}
+            for w, t, m, k, r, f, e, v, x, tot in zip(who.tolist(), types.tolist(), month.tolist(), kwh.tolist(),
+                                                      rate.tolist(), fixed.tolist(), energy.tolist(), env.tolist(),
+                                                      vat.tolist(), total.tolist())))
+    return months, account_ids
+
+
+def timed(fn):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def dir_size(root):
+    return sum(os.path.getsize(os.path.join(path, name)) for path, _, names in os.walk(root) for name in names)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bill archive vs BillDB: size and scan speed.")
+    parser.add_argument("bills", nargs="?", type=int, default=500_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--accounts", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_archive_")
+    db_path = os.path.join(workdir, "ledger.db")
+    root = os.path.join(workdir, "archive")
+    try:
+        conn = sqlite3.connect(db_path)
+        bill_ledger.ensure_table(conn)
+        start = time.perf_counter()
+        months, account_ids = fill_ledger(conn, args.bills, args.years, args.accounts)
+        conn.execute("VACUUM")
+        stored = conn.execute("SELECT COUNT(*) FROM BillDB").fetchone()[0]  # repeated account-months replace
+        print(f"{stored:,} bills over {len(months)} months in BillDB ({time.perf_counter() - start:.1f}s)")
+
+        start = time.perf_counter()
+        bill_archive.archive_ledger(conn, root)
+        print(f"archived in {time.perf_counter() - start:.1f}s")
+        db_size, archive_size = os.path.getsize(db_path), dir_size(root)
+        print(f"\nsize: SQLite file {db_size / 2**20:,.1f} MiB (table, indexes, rollups), "
+              f"archive {archive_size / 2**20:,.1f} MiB ({db_size / archive_size:.1f}x smaller)")
+
+        month = months[len(months) // 2]
+        quarter = months[len(months) // 2:len(months) // 2 + 3]
+        account = f"{account_ids[7]:08d}"
+        checks = [
+            ("revenue per month, all history",
+             lambda: dict(conn.execute("SELECT BillingMonth, ROUND(SUM(Total), 2) FROM BillDB "
+                                       "GROUP BY BillingMonth ORDER BY BillingMonth").fetchall()),
+             lambda: bill_archive.totals(root, by="month"),
+             lambda a, b: a.keys() == b.keys() and all(abs(a[m] - b[m]) < 0.01 for m in a)),
+            (f"all bills of {month}",
+             lambda: bill_ledger.bills_for_month(conn, month),
+             lambda: bill_archive.query(root, month, month),
+             lambda a, b: len(a) == len(b) and abs(sum(x["total"] for x in a) - b.sum()) < 0.01),
+            (f"residential kWh + total, {quarter[0]}..{quarter[-1]}",
+             lambda: conn.execute("SELECT Kwh, Total FROM BillDB WHERE CustomerType = ? AND BillingMonth "
+                                  "BETWEEN ? AND ?", ("residential", quarter[0], quarter[-1])).fetchall(),
+             lambda: bill_archive.query(root, quarter[0], quarter[-1], "residential", columns=("kwh", "total")),
+             lambda a, b: len(a) == len(b["total"]) and abs(sum(r[1] for r in a) - b["total"].sum()) < 0.01),
+            (f"history of account {account}",
+             lambda: bill_ledger.customer_history(conn, account),
+             lambda: bill_archive.query(root, accounts=[account]),
+             lambda a, b: sorted(x["total"] for x in a) == sorted(b.column("total").tolist())),
+        ]
+        print(f"\n{'query':<42} {'SQLite':>10} {'archive':>10} {'speedup':>8}")
+        for label, from_db, from_archive, same in checks:
+            db_s, db_result = timed(from_db)
+            archive_s, archive_result = timed(from_archive)
+            assert same(db_result, archive_result), f"{label}: results differ"
+            ratio = db_s / archive_s
+            speedup = f"{ratio:.1f}x" if ratio >= 0.1 else f"1/{1 / ratio:,.0f}x"
+            print(f"{label:<42} {db_s * 1000:>8.1f}ms {archive_s * 1000:>8.1f}ms {speedup:>8}")
+        print("\nevery query returned the same bills / sums from both stores (warm page cache, best of 3)")
+        conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""bench_bill_memory.py
+
+Compares the memory held by a run of bills stored as a list of dicts, a
+list of `bill_records.Bill` records and a `bill_records.BillTable`,
+measured with tracemalloc, and checks that all three hold the same bills
+and the same totals.
+
+Run from the project root:
+    python benchmarks/bench_bill_memory.py [count]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_billing import calculate_bills
+from bill_records import Bill, BillTable
+
+
+def make_bills(count, seed=2026):
+    """Bill dicts as `download_pdf` builds them, billed in one vectorized call."""
+    rng = random.Random(seed)
+    units = np.array([round(rng.uniform(0, 1500), 2) for _ in range(count)])
+    types = np.array([rng.choice(("residential", "commercial")) for _ in range(count)])
+    energy, fixed, vat, env, rate, total = (col.tolist() for col in calculate_bills(units, types))
+    months = [f"2026-{rng.randint(1, 12):02d}" for _ in range(count)]
+    return [
+        {"account": f"{i:08d}", "name": f"Customer {i}", "address": f"{i % 997} Rizal St, Barangay {i % 89}",
+         "type": types[i].item(), "month": months[i], "kwh": units[i].item(), "rate": rate[i], "fixed": fixed[i],
+         "base": energy[i], "env": env[i], "vat": vat[i], "total": total[i]}
+        for i in range(count)
+    ]
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main(count=500_000):
+    rows = make_bills(count)
+
+    # each representation is rebuilt from a serialized copy so the strings
+    # are not shared with `rows` and every byte is counted
+    encoded = [tuple(row.values()) for row in rows]
+    keys = tuple(rows[0])
+    dicts, dict_bytes, t_dict = measure(lambda: [dict(zip(keys, map(_copy, r))) for r in encoded])
+    records, record_bytes, t_rec = measure(lambda: [Bill(*map(_copy, r)) for r in encoded])
+    table, table_bytes, t_table = measure(lambda: BillTable.from_bills(dict(zip(keys, r)) for r in encoded))
+
+    for i in (0, count // 2, count - 1):
+        assert records[i] == dicts[i] and table[i] == dicts[i], f"bill {i} differs"
+    expected = sum(row["total"] for row in dicts)
+    assert abs(table.sum("total") - expected) < 1e-6 * max(1.0, abs(expected)), "total mismatch"
+
+    print(f"{count:,} bills")
+    for label, size, elapsed in (("list of dicts", dict_bytes, t_dict),
+                                 ("list of Bill records", record_bytes, t_rec),
+                                 ("BillTable", table_bytes, t_table)):
+        print(f"{label:<22} {size / 2**20:9.1f} MiB  {size / count:7.1f} B/bill  built in {elapsed:.2f}s")
+    print(f"BillTable uses {dict_bytes / table_bytes:.1f}x less memory than dicts, "
+          f"Bill records {dict_bytes / record_bytes:.1f}x less")
+
+    start = time.perf_counter()
+    by_type = {}
+    for row in dicts:
+        by_type[row["type"]] = by_type.get(row["type"], 0.0) + row["total"]
+    t_loop = time.perf_counter() - start
+    start = time.perf_counter()
+    table.totals_by("type")
+    t_vec = time.perf_counter() - start
+    print(f"totals by type: dict loop {t_loop * 1000:.1f} ms, BillTable {t_vec * 1000:.1f} ms")
+
+
+def _copy(value):
+    # fresh string objects, as they would be when read from a file or database
+    return (value + ".")[:-1] if isinstance(value, str) else value
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
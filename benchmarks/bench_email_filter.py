@@ -0,0 +1,90 @@
+"""bench_email_filter.py
+
+Measures the `db_utils.user_exists` check that `create_account` makes,
+with and without the email Bloom filter (Database/email_filter.py), on an
+enrollment-drive mix: mostly new emails with some already registered.
+Checks the filter never hides an existing account, that the observed
+false-positive rate is near the target, and that an account created by
+another connection is found at once by the default (querying) check.
+
+Run from the project root:
+    python benchmarks/bench_email_filter.py [accounts] [--checks 200000] [--new 0.9] [--fp-rate 0.01]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Database import db_utils, email_filter
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Email existence filter benchmark.")
+    parser.add_argument("accounts", nargs="?", type=int, default=200_000)
+    parser.add_argument("--checks", type=int, default=200_000)
+    parser.add_argument("--new", type=float, default=0.9, help="share of checked emails that are not registered")
+    parser.add_argument("--fp-rate", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_email_filter_")
+    db_path = os.path.join(workdir, "accounts.db")
+    try:
+        registered = [f"user{i}@enroll.ph" for i in range(args.accounts)]
+        with db_utils.connection(db_path) as conn:
+            # the stored password is irrelevant here; skip the slow hash
+            for i in range(0, len(registered), 50_000):
+                db_utils.bulk_create_accounts(conn, [("F", "L", e, "x") for e in registered[i:i + 50_000]])
+
+        rng = random.Random(7)
+        emails = [f"new{i}@enroll.ph" if rng.random() < args.new else rng.choice(registered)
+                  for i in range(args.checks)]
+        existing = set(registered)
+
+        email_filter.set_enabled(False)
+        with db_utils.connection(db_path) as conn:
+            start = time.perf_counter()
+            plain = [db_utils.user_exists(conn, e, trust_filter=True) for e in emails]
+            t_plain = time.perf_counter() - start
+
+        email_filter.set_enabled(True)
+        email_filter.set_false_positive_rate(args.fp_rate)
+        start = time.perf_counter()
+        email_filter.preload(db_path)
+        t_load = time.perf_counter() - start
+        with db_utils.connection(db_path) as conn:
+            start = time.perf_counter()
+            filtered = [db_utils.user_exists(conn, e, trust_filter=True) for e in emails]
+            t_filtered = time.perf_counter() - start
+
+            # another process registers an email the loaded filter has not seen yet
+            other = sqlite3.connect(db_path)
+            other.execute("INSERT INTO AccountDB (FirstName, LastName, Email, Password) "
+                          "VALUES ('F', 'L', 'late@enroll.ph', 'x')")
+            other.commit()
+            other.close()
+            assert db_utils.user_exists(conn, "late@enroll.ph"), "an account from another process was missed"
+
+        assert plain == filtered == [e in existing for e in emails], "filter changed an answer"
+        stats = email_filter.stats()[db_path]
+        print(f"{args.accounts:,} accounts, {args.checks:,} checks ({args.new:.0%} new emails)")
+        print(f"filter load      {t_load:7.3f}s  {stats['filter_bytes'] / 1024:,.0f} KiB")
+        print(f"without filter   {t_plain:7.3f}s  {args.checks / t_plain:>10,.0f} checks/s")
+        print(f"with filter      {t_filtered:7.3f}s  {args.checks / t_filtered:>10,.0f} checks/s  "
+              f"({t_plain / t_filtered:.1f}x)")
+        print(f"bypass rate      {stats['bypass_rate']:.1%} of checks skipped SQLite")
+        print(f"false positives  {stats['false_positives']:,} of {stats['checks'] - stats['bypassed']:,} maybes; "
+              f"{stats['false_positives'] / max(1, args.checks - stats['confirmed']):.3%} of absent emails "
+              f"(target {args.fp_rate:.3%})")
+    finally:
+        db_utils.close_pools()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
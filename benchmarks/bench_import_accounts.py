@@ -0,0 +1,99 @@
+"""bench_import_accounts.py
+
+Throughput of import_accounts.py, split into its two costs:
+  * hashing: PBKDF2 on the thread pool at the import work factor, with
+    the login default measured on a small sample and extrapolated,
+  * inserting: `db_utils.bulk_create_accounts` with pre-hashed passwords,
+    i.e. the database path alone,
+then a full end-to-end import, which must report every duplicate with
+its CSV line.
+
+Run from the project root:
+    python benchmarks/bench_import_accounts.py [accounts] [--hash-workers 4]
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import import_accounts
+from Database import db_utils, passwords
+
+DUPLICATE_EVERY = 100
+DEFAULT_SAMPLE = 20
+
+
+def write_csv(path, count):
+    """count rows; every DUPLICATE_EVERY-th row repeats an earlier email. Returns the duplicate lines."""
+    duplicate_lines = []
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["first_name", "last_name", "email", "password"])
+        for i in range(count):
+            n = i - 1 if i and i % DUPLICATE_EVERY == 0 else i
+            if n != i:
+                duplicate_lines.append(i + 2)
+            writer.writerow([f"First{i}", f"Last{i}", f"user{n}@example.com", f"secret-{i}"])
+    return duplicate_lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk account import: hashing vs database time.")
+    parser.add_argument("accounts", nargs="?", type=int, default=5_000)
+    parser.add_argument("--hash-workers", type=int, default=import_accounts.HASH_WORKERS)
+    parser.add_argument("--work-factor", type=int, default=import_accounts.IMPORT_WORK_FACTOR)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_import_")
+    try:
+        csv_path = os.path.join(workdir, "accounts.csv")
+        duplicate_lines = write_csv(csv_path, args.accounts)
+        rows = [(f"First{i}", f"Last{i}", f"user{i}@example.com", f"secret-{i}") for i in range(args.accounts)]
+        print(f"{args.accounts:,} accounts, {args.hash_workers} hash workers")
+
+        sample = rows[:DEFAULT_SAMPLE]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.hash_workers) as pool:
+            list(pool.map(lambda row: import_accounts._hash(row, passwords.iterations), sample))
+        per_row = (time.perf_counter() - start) / len(sample)
+        print(f"hash at login default ({passwords.iterations:,} it.)  "
+              f"{1 / per_row:>10,.0f} rows/s  -> {per_row * args.accounts / 60:,.1f} min for this import")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.hash_workers) as pool:
+            hashed = list(pool.map(lambda row: import_accounts._hash(row, args.work_factor), rows))
+        hash_s = time.perf_counter() - start
+        print(f"hash at import factor ({args.work_factor:,} it.)   {args.accounts / hash_s:>10,.0f} rows/s  "
+              f"({hash_s:.1f}s)")
+
+        with db_utils.connection(os.path.join(workdir, "insert.db")) as conn:
+            start = time.perf_counter()
+            for i in range(0, len(hashed), import_accounts.DEFAULT_BATCH_SIZE):
+                db_utils.bulk_create_accounts(conn, hashed[i:i + import_accounts.DEFAULT_BATCH_SIZE])
+            insert_s = time.perf_counter() - start
+        print(f"insert only (pre-hashed)             {args.accounts / insert_s:>10,.0f} rows/s  ({insert_s:.2f}s)")
+
+        rejected = []
+        stats = import_accounts.import_accounts(
+            csv_path, os.path.join(workdir, "import.db"), hash_workers=args.hash_workers,
+            on_reject=lambda line, email, reason: rejected.append(line), progress=None,
+            work_factor=args.work_factor)
+        print(f"end to end                           {stats['rows_per_sec']:>10,.0f} rows/s  "
+              f"(hash {stats['hash_seconds']:.1f}s, insert {stats['insert_seconds']:.2f}s)")
+        assert rejected == duplicate_lines, "duplicates not reported with their CSV lines"
+        expected_below = stats["inserted"] if args.work_factor < passwords.iterations else 0
+        assert stats["below_default"] == expected_below, "accounts below the login default not counted"
+        print(f"{stats['duplicates']:,} duplicates reported with their CSV line numbers")
+    finally:
+        db_utils.close_pools()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
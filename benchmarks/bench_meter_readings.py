@@ -0,0 +1,153 @@
+"""bench_meter_readings.py
+
+Writes a month of 15-minute readings for many meters as CSV, then
+compares:
+  * parsing the CSV with csv.reader into arrays (what every billing run
+    used to pay),
+  * converting it once to the binary format (`meter_readings.convert_csv`),
+  * opening the memory-mapped file and billing from the mapping.
+
+Bills from the mapped grid are checked against `time_of_use.interval_bills`
+on the parsed arrays, and the ragged path (`reading_bills`) against the
+grid path on a shuffled copy of the same readings. Known UTC instants
+written as epoch seconds, ISO with "Z" and naive Philippine time must
+convert to the same timestamps and fall in the periods of their local
+hour.
+
+Run from the project root:
+    python benchmarks/bench_meter_readings.py [meters] [--days 30] [--keep DIR]
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meter_readings import RECORD_DTYPE, bill_readings, convert_csv, open_readings
+from time_of_use import get_schedule, interval_bills, reading_bills
+
+INTERVALS_PER_DAY = 96
+
+# 2026-09-01 (a Tuesday) 00:00 and 09:00 UTC are 08:00 and 17:00 in Manila
+KNOWN_UTC = ((1788220800, "2026-09-01T00:00:00Z", "2026-09-01T08:00", "shoulder"),
+             (1788253200, "2026-09-01T09:00:00Z", "2026-09-01T17:00", "peak"))
+
+
+def write_csv(path, meters, days, seed=2026):
+    rng = np.random.default_rng(seed)
+    intervals = days * INTERVALS_PER_DAY
+    stamps = (np.datetime64("2026-09-01T00:00") + np.arange(intervals) * np.timedelta64(15, "m"))
+    stamps = [str(ts) for ts in stamps]
+    types = rng.choice(["residential", "commercial"], size=meters)
+    with open(path, "w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["account", "timestamp", "kwh"])
+        for meter in range(meters):
+            kwh = np.round(rng.uniform(0.0, 0.5, size=intervals), 3)
+            account = f"ACC{meter:07d}"
+            writer.writerows(zip([account] * intervals, stamps, kwh.tolist()))
+    return types
+
+
+def parse_csv(path):
+    """Baseline: text parse of the whole file into NumPy arrays."""
+    accounts, stamps, kwh = [], [], []
+    with open(path, newline="") as fh:
+        reader = csv.reader(fh)
+        next(reader)
+        for account, ts, value in reader:
+            accounts.append(account)
+            stamps.append(ts)
+            kwh.append(float(value))
+    return accounts, np.array(stamps, dtype="datetime64[s]"), np.array(kwh)
+
+
+def check_utc(workdir, schedule):
+    """Epoch, UTC ISO and naive local ISO spellings of KNOWN_UTC convert alike and bill by local hour."""
+    converted = []
+    for column in range(3):
+        csv_path = os.path.join(workdir, f"utc{column}.csv")
+        with open(csv_path, "w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["account", "timestamp", "kwh"])
+            writer.writerows(("ACC1", row[column], 1.0) for row in KNOWN_UTC)
+        convert_csv(csv_path, csv_path + ".mrd", utc_offset_hours=8)
+        converted.append(open_readings(csv_path + ".mrd").timestamps.tolist())
+    expected = [row[0] for row in KNOWN_UTC]
+    assert converted == [expected] * 3, f"UTC conversion: {converted}"
+    periods = [schedule.periods[code] for code in schedule.period_codes(np.array(expected, dtype=np.uint32))]
+    assert periods == [row[3] for row in KNOWN_UTC], f"UTC timestamps billed as {periods}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("meters", type=int, nargs="?", default=2000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--keep", help="write the files here and keep them")
+    args = parser.parse_args()
+
+    workdir = args.keep or tempfile.mkdtemp(prefix="mrd_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    csv_path = os.path.join(workdir, "readings.csv")
+    mrd_path = os.path.join(workdir, "readings.mrd")
+    try:
+        start = time.perf_counter()
+        types = write_csv(csv_path, args.meters, args.days)
+        intervals = args.days * INTERVALS_PER_DAY
+        print(f"{args.meters:,} meters x {intervals:,} intervals, CSV {os.path.getsize(csv_path) / 2**20:.0f} MiB "
+              f"written in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        _, stamps, kwh = parse_csv(csv_path)
+        parse_s = time.perf_counter() - start
+        print(f"CSV parse              {parse_s:7.2f}s")
+
+        start = time.perf_counter()
+        stats = convert_csv(csv_path, mrd_path)
+        convert_s = time.perf_counter() - start
+        print(f"convert to .mrd (once) {convert_s:7.2f}s  {os.path.getsize(mrd_path) / 2**20:.0f} MiB, "
+              f"grid {stats['grid'][0]:,} x {stats['grid'][1]:,}")
+
+        start = time.perf_counter()
+        readings = open_readings(mrd_path)
+        open_s = time.perf_counter() - start
+        start = time.perf_counter()
+        mapped = bill_readings(readings, types)
+        bill_s = time.perf_counter() - start
+        print(f"mmap open              {open_s * 1000:7.2f}ms")
+        print(f"bill from mapping      {bill_s:7.2f}s  (CSV parse is {parse_s / (open_s + bill_s):.0f}x that)")
+
+        schedule = get_schedule()
+        grid = kwh.reshape(args.meters, intervals)
+        expected = interval_bills(grid, stamps[:intervals], types, schedule)
+        for got, want in zip(mapped, expected):
+            np.testing.assert_array_equal(got, want)
+        print(f"mapped grid bills identical to interval_bills on parsed arrays ({args.meters:,} meters)")
+
+        grid_view, _ = readings.grid()
+        assert not grid_view.flags.owndata and np.shares_memory(grid_view, readings.records)
+        print("grid view shares memory with the mapping (no copy)")
+
+        order = np.random.default_rng(7).permutation(readings.record_count)
+        shuffled = np.asarray(readings.records)[order]
+        ragged = reading_bills(shuffled["account"], shuffled["timestamp"], shuffled["kwh"], types, schedule)
+        np.testing.assert_allclose(ragged[6], mapped[6], rtol=1e-12)
+        np.testing.assert_allclose(ragged[5], mapped[5], atol=0.01)
+        print(f"ragged path on shuffled readings matches the grid path "
+              f"({readings.record_count:,} x {RECORD_DTYPE.itemsize} B records)")
+
+        check_utc(workdir, schedule)
+        print("known UTC timestamps: epoch, ISO Z and naive UTC+8 convert alike and bill by local hour")
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
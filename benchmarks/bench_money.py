@@ -0,0 +1,103 @@
+"""bench_money.py
+
+Checks the integer-centavo engine in `money` against an exact Decimal
+reference with the same rounding rules on a large random corpus (readings
+with up to 6 decimals and half-milli-kWh ties included), checks that
+`billing.calculate_bill` (which bills through it) returns the same amounts
+in pesos, then times the float (`tariffs.Tariff.bill`), Decimal and
+integer paths.
+
+Run from the project root:
+    python benchmarks/bench_money.py [count]
+"""
+import os
+import random
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from billing import calculate_bill
+from money import bill_cents, bill_pesos, bills_cents
+from tariffs import get_tariff
+
+CENT = Decimal("0.01")
+
+
+def bill_decimal(units, customer_type):
+    """Reference: exact Decimal math with money.py's rounding rules, in centavos."""
+    tariff = get_tariff(customer_type)
+    u = Decimal(str(units)).quantize(Decimal("0.001"), rounding=ROUND_HALF_UP)
+    cost = Decimal(0)
+    applied = Decimal(0)
+    for limit, rate in tariff.tiers:
+        if u <= 0:
+            break
+        use = u if limit == float("inf") else min(u, Decimal(str(limit)))
+        cost += use * Decimal(str(rate))
+        applied = Decimal(str(rate))
+        u -= use
+    energy = cost.quantize(CENT, rounding=ROUND_HALF_UP)
+    vat = (energy * Decimal(str(tariff.vat_rate))).quantize(CENT, rounding=ROUND_HALF_UP)
+    env = (energy * Decimal(str(tariff.env_fee_rate))).quantize(CENT, rounding=ROUND_HALF_UP)
+    fixed = Decimal(str(tariff.fixed)).quantize(CENT)
+    cents = [int(v * 100) for v in (energy, fixed, vat, env)]
+    return (cents[0], cents[1], cents[2], cents[3], int(applied * 100_000), sum(cents))
+
+
+def make_corpus(count, seed=2026):
+    rng = random.Random(seed)
+    # up to 6 decimals: readings with more than 3 are rounded to the milli-kWh
+    units = [round(rng.uniform(0, 5000), rng.randint(0, 6)) for _ in range(count)]
+    # half-milli-kWh ties, several of which sit just below .5 as binary floats
+    ties = [round(rng.randint(0, 5_000_000) / 1000 + 0.0005, 4) for _ in range(count // 20)]
+    units[1:1 + len(ties)] = ties
+    units[:16] = [0, 50, 100, 200, 300, 800, 0.001, 49.999,
+                  0.0005, 2.0015, 49.9995, 99.9995, 1.0005, 0.0004999, 1234.5675, 4999.99951][:count]
+    types = [rng.choice(("residential", "commercial")) for _ in range(count)]
+    return units, types
+
+
+def timed(label, count, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:7.3f}s  {count / elapsed:>12,.0f} bills/s")
+    return elapsed
+
+
+def main(count=200_000):
+    units, types = make_corpus(count)
+    arr_units, arr_types = np.array(units), np.array(types)
+
+    batch = bills_cents(arr_units, arr_types)
+    float_drift = 0
+    for i, (u, t) in enumerate(zip(units, types)):
+        expected = bill_decimal(u, t)
+        if bill_cents(u, t) != expected:
+            raise AssertionError(f"scalar mismatch for {u!r} {t}: {bill_cents(u, t)} != {expected}")
+        if tuple(int(col[i]) for col in batch) != expected:
+            raise AssertionError(f"batch mismatch for {u!r} {t}")
+        if calculate_bill(u, t) != bill_pesos(expected):
+            raise AssertionError(f"calculate_bill mismatch for {u!r} {t}")
+        if round(get_tariff(t).bill(u)[5] * 100) != expected[5]:
+            float_drift += 1
+    print(f"exact: {count:,} bills match the Decimal reference, calculate_bill included "
+          f"(the float Tariff.bill total differs on {float_drift:,}; it rounds the total "
+          f"separately from its parts and accumulates float error)")
+
+    pairs = list(zip(units, types))
+    t_float = timed("float Tariff.bill", count, lambda: [get_tariff(t).bill(u) for u, t in pairs])
+    timed("calculate_bill", count, lambda: [calculate_bill(u, t) for u, t in pairs])
+    t_dec = timed("Decimal reference", count, lambda: [bill_decimal(u, t) for u, t in pairs])
+    t_int = timed("integer scalar", count, lambda: [bill_cents(u, t) for u, t in pairs])
+    t_batch = timed("integer batch", count, lambda: bills_cents(arr_units, arr_types))
+    print(f"integer scalar is {t_dec / t_int:.1f}x Decimal and {t_float / t_int:.2f}x float; "
+          f"batch is {t_float / t_batch:.0f}x float")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
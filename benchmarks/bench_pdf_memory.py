@@ -0,0 +1,114 @@
+"""bench_pdf_memory.py
+
+Peak resident memory of `pdf_maker.generate_bills_pdf` as the batch
+grows. Every batch size runs in a fresh interpreter, once with the
+default part size and once with all pages on a single canvas (the old
+behaviour), and reports the peak RSS of that process. Bills are
+generated lazily, so the numbers are the PDF writer's alone; with parts
+they should stay flat, with a single canvas they grow with the batch.
+
+Every output is also checked structurally: each xref offset points at
+its "N 0 obj", every reference outside a stream resolves, and the page
+tree's /Count and /Kids match the number of bills. If pypdf is
+installed the file is also opened with it and its pages counted.
+
+Run from the project root:
+    python benchmarks/bench_pdf_memory.py [sizes ...]
+"""
+import argparse
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_maker
+
+DEFAULT_SIZES = (250, 1_000, 2_000, 4_000)
+
+
+def bills(count):
+    for i in range(count):
+        kwh = 100 + i % 900
+        yield {"account": f"{i:08d}", "name": f"Customer {i}", "address": f"{i % 997} Rizal St, Manila",
+               "type": "residential", "month": "2026-09", "kwh": kwh, "rate": 11.5, "fixed": 40.0,
+               "base": kwh * 11.5, "env": kwh * 0.0025, "vat": kwh * 1.38, "total": kwh * 12.88 + 40.0}
+
+
+def check_structure(path, count):
+    """Raise AssertionError unless path is a well-formed PDF with `count` pages."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    xref = int(data[data.rindex(b"startxref") + 9:].split()[0])
+    assert data[xref:xref + 5] == b"xref\n", "startxref does not point at the xref table"
+    size = int(re.search(rb"/Size (\d+)", data[xref:]).group(1))
+    table = data[data.index(b"\n", data.index(b"\n", xref) + 1) + 1:]
+    offsets = [int(table[n * 20:n * 20 + 10]) for n in range(1, size)]
+    for number, offset in enumerate(offsets, 1):
+        assert data.startswith(b"%d 0 obj" % number, offset), f"xref offset of object {number} is wrong"
+    bounds = sorted(offsets) + [xref]
+    for start, end in zip(bounds, bounds[1:]):
+        head = data[start:end].partition(b"stream")[0]
+        for ref in re.findall(rb"(\d+) 0 R", head):
+            assert 0 < int(ref) < size, f"dangling reference {int(ref)} 0 R at offset {start}"
+    root = int(re.search(rb"/Root (\d+) 0 R", data[xref:]).group(1))
+    catalog = data[offsets[root - 1]:]
+    tree = int(re.search(rb"/Pages (\d+) 0 R", catalog).group(1))
+    tree_body = data[offsets[tree - 1]:data.index(b"endobj", offsets[tree - 1])]
+    kids = re.findall(rb"(\d+) 0 R", re.search(rb"/Kids \[(.*?)\]", tree_body, re.S).group(1))
+    assert int(re.search(rb"/Count (\d+)", tree_body).group(1)) == len(kids) == count, "page count mismatch"
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return
+    assert len(PdfReader(path, strict=True).pages) == count, "pypdf page count mismatch"
+
+
+def run_one(count, pages_per_part):
+    """Child process: render `count` bills and print pages, seconds and peak RSS (KiB)."""
+    with tempfile.TemporaryDirectory(prefix="bench_pdf_") as workdir:
+        path = os.path.join(workdir, "bills.pdf")
+        start = time.perf_counter()
+        pages = pdf_maker.generate_bills_pdf(bills(count), path, pages_per_part=pages_per_part)
+        elapsed = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        assert pages == count, "page count mismatch"
+        check_structure(path, count)
+    print(pages, elapsed, peak)
+
+
+def measure(count, pages_per_part):
+    out = subprocess.run([sys.executable, __file__, "--child", str(count), str(pages_per_part)],
+                         check=True, capture_output=True, text=True).stdout.split()
+    return float(out[1]), int(out[2]) / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peak RSS of generate_bills_pdf by batch size.")
+    parser.add_argument("sizes", nargs="*", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--child", nargs=2, type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        run_one(*args.child)
+        return
+
+    print(f"{'bills':>7} {'parts of ' + str(pdf_maker.PAGES_PER_PART):>22} {'single canvas':>22}")
+    parts, single = [], []
+    for count in args.sizes:
+        part_s, part_mb = measure(count, pdf_maker.PAGES_PER_PART)
+        single_s, single_mb = measure(count, count)
+        parts.append(part_mb)
+        single.append(single_mb)
+        print(f"{count:>7,} {part_mb:>10.1f} MiB {part_s:>7.1f}s {single_mb:>10.1f} MiB {single_s:>7.1f}s")
+    if len(args.sizes) > 1:
+        span = (max(args.sizes) - min(args.sizes)) / 1000
+        print(f"\npeak RSS growth per 1,000 bills: parts {(parts[-1] - parts[0]) / span:.1f} MiB, "
+              f"single canvas {(single[-1] - single[0]) / span:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""bench_sharding.py
+
+Write throughput of Database/sharding.py as the shard count grows.
+Several writer threads record batches of bills concurrently, as the
+bulk jobs, the service and the billing screens do; with one file they
+queue on SQLite's single writer lock, with N files they mostly don't.
+
+Also checks that every bill lands on exactly one shard and that the
+merged revenue report matches a single-file ledger.
+
+Run from the project root:
+    python benchmarks/bench_sharding.py [bills] [--shards 1,2,4,8] [--writers 8]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from billing import calculate_bill
+from Database import db_utils, sharding
+
+
+def make_bills(count, seed=2026):
+    rng = random.Random(seed)
+    bills = []
+    for i in range(count):
+        customer_type = rng.choice(("residential", "commercial"))
+        kwh = round(rng.uniform(0, 1500), 2)
+        energy, fixed, vat, env, rate, total = calculate_bill(kwh, customer_type)
+        # i * odd constant (coprime to 10**8) scatters accounts without repeating one
+        bills.append({"account": f"{i * 2654435761 % 10**8:08d}", "name": f"Customer {i}", "address": "1 Rizal St",
+                      "type": customer_type, "month": f"2026-{rng.randint(1, 12):02d}", "kwh": kwh, "rate": rate,
+                      "fixed": fixed, "base": energy, "env": env, "vat": vat, "total": total})
+    return bills
+
+
+def run(bills, shard_count, writers, batch_size, workdir):
+    paths = sharding.shard_paths(os.path.join(workdir, f"s{shard_count}"), shard_count)
+    os.makedirs(os.path.dirname(paths[0]), exist_ok=True)
+    batches = [bills[i:i + batch_size] for i in range(0, len(bills), batch_size)]
+    with sharding.ShardedStore(paths) as store:
+        store.fan_out(lambda conn: None)  # open and create every shard before timing
+
+        def writer(my_batches):
+            for batch in my_batches:
+                store.record_bills(batch)
+
+        threads = [threading.Thread(target=writer, args=(batches[i::writers],)) for i in range(writers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        assert store.count_bills() == len(bills), "bill count mismatch"
+        report = store.revenue_report()
+    return elapsed, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded write throughput.")
+    parser.add_argument("bills", nargs="?", type=int, default=200_000)
+    parser.add_argument("--shards", default="1,2,4,8")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    bills = make_bills(args.bills)
+    workdir = tempfile.mkdtemp(prefix="bench_sharding_")
+    try:
+        baseline = None
+        reference = None
+        for shard_count in (int(n) for n in args.shards.split(",")):
+            elapsed, report = run(bills, shard_count, args.writers, args.batch_size, workdir)
+            rate = len(bills) / elapsed
+            baseline = baseline or rate
+            if reference is None:
+                reference = report
+            elif report != reference:
+                raise AssertionError(f"merged report on {shard_count} shards differs from the first run")
+            print(f"{shard_count:>2} shard(s)  {elapsed:7.2f}s  {rate:>10,.0f} bills/s  {rate / baseline:5.2f}x")
+    finally:
+        db_utils.close_pools()
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(f"{args.writers} writers, batches of {args.batch_size}; merged revenue reports identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""bench_startup.py
+
+Measures cold-start time of the account system and fails when it goes
+over budget:
+
+- import: time to `import accountsystem` in a fresh interpreter
+- first frame: time from process start until the login screen has been
+  built and drawn (skipped when no display is available)
+
+It also fails if modules that should only load on demand (ReportLab,
+pandas) are imported before the first frame.
+
+Run from the project root:
+    python benchmarks/bench_startup.py [--runs 5] [--import-budget 0.5] [--frame-budget 2.0]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = ("reportlab", "pandas")
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+import accountsystem
+imported = time.perf_counter() - start
+result = {"import": imported, "frame": None, "error": None}
+try:
+    from tkinter import Tk
+    root = Tk()
+except Exception as exc:
+    result["error"] = str(exc)
+else:
+    accountsystem.build_app(root)
+    root.update()
+    result["frame"] = time.perf_counter() - start
+    root.destroy()
+result["loaded"] = sorted(name for name in sys.modules if name.split(".")[0] in %r)
+print(json.dumps(result))
+""" % (LAZY_MODULES,)
+
+
+def measure():
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, capture_output=True,
+                         text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget", type=float, default=0.5, help="seconds")
+    parser.add_argument("--frame-budget", type=float, default=2.0, help="seconds")
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.runs)]
+    import_time = statistics.median(r["import"] for r in runs)
+    frames = [r["frame"] for r in runs if r["frame"] is not None]
+    loaded = sorted({name.split(".")[0] for r in runs for name in r["loaded"]})
+
+    failures = []
+    print(f"import accountsystem: {import_time * 1000:.0f} ms (budget {args.import_budget * 1000:.0f} ms)")
+    if import_time > args.import_budget:
+        failures.append("import time over budget")
+    if frames:
+        frame_time = statistics.median(frames)
+        print(f"first frame:          {frame_time * 1000:.0f} ms (budget {args.frame_budget * 1000:.0f} ms)")
+        if frame_time > args.frame_budget:
+            failures.append("first frame over budget")
+    else:
+        print(f"first frame:          skipped ({runs[0]['error']})")
+    if loaded:
+        failures.append(f"loaded eagerly: {', '.join(loaded)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""bench_time_of_use.py
+
+Bills a month of 15-minute interval data for many meters with
+`time_of_use.interval_bills` and checks it against:
+  * the monthly-total path (`batch_billing.calculate_bills`) with every
+    multiplier set to 1.0, which must match exactly, and
+  * a plain-Python reference loop for a sample of meters.
+
+Run from the project root:
+    python benchmarks/bench_time_of_use.py [meters] [--days 30] [--chunk-size 10000]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_billing import calculate_bills
+from tariffs import DEFAULT_TARIFF_PATH, get_tariff, load_config
+from time_of_use import DEFAULT_SCHEDULE, TouSchedule, get_schedule, interval_bills
+
+INTERVALS_PER_DAY = 96
+
+
+def make_month(meters, days, seed=2026):
+    """float32 readings (meters, intervals) with a daily load curve, and shared timestamps."""
+    rng = np.random.default_rng(seed)
+    intervals = days * INTERVALS_PER_DAY
+    timestamps = np.datetime64("2026-09-01T00:00") + np.arange(intervals) * np.timedelta64(15, "m")
+    hour = (np.arange(intervals) % INTERVALS_PER_DAY) / 4.0
+    curve = (0.6 + 0.5 * np.exp(-((hour - 19.5) / 2.5) ** 2) + 0.3 * np.exp(-((hour - 8) / 2.0) ** 2)).astype(np.float32)
+    readings = np.empty((meters, intervals), dtype=np.float32)
+    scale = rng.uniform(0.02, 0.6, size=meters).astype(np.float32)
+    for start in range(0, meters, 10_000):
+        stop = min(start + 10_000, meters)
+        noise = rng.random((stop - start, intervals), dtype=np.float32)
+        readings[start:stop] = scale[start:stop, None] * curve * (0.5 + noise)
+    readings[::997, ::131] = np.nan  # a few meters with missing intervals
+    types = rng.choice(np.array(["residential", "commercial"]), size=meters, p=[0.85, 0.15])
+    return readings, timestamps, types
+
+
+def reference_bill(readings, timestamps, customer_type, config):
+    """Plain-Python time-of-use bill for one meter."""
+    periods = config["periods"]
+    kwh = {name: 0.0 for name in periods}
+    for value, ts in zip(np.nan_to_num(readings).tolist(), timestamps.astype("datetime64[s]").astype(datetime)):
+        spans = config["weekend" if ts.weekday() >= 5 else "weekday"]
+        period = next((name for name, ranges in spans.items()
+                       if any(start <= ts.hour < end for start, end in ranges)), config["default_period"])
+        kwh[period] += value
+    total = sum(kwh.values())
+    tariff = get_tariff(customer_type)
+    energy, rate = tariff.energy(total)
+    if total > 0:
+        energy *= sum(kwh[name] * periods[name] for name in periods) / total
+    vat, env = energy * tariff.vat_rate, energy * tariff.env_fee_rate
+    return round(energy + tariff.fixed + vat + env, 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time-of-use interval billing benchmark.")
+    parser.add_argument("meters", nargs="?", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    readings, timestamps, types = make_month(args.meters, args.days)
+    print(f"{args.meters:,} meters x {readings.shape[1]:,} intervals ({readings.nbytes / 2**30:.2f} GiB float32), "
+          f"generated in {time.perf_counter() - start:.1f}s")
+
+    schedule = get_schedule()
+    start = time.perf_counter()
+    *bills, by_period = interval_bills(readings, timestamps, types, schedule, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+    values = readings.size
+    print(f"time-of-use billing  {elapsed:6.2f}s  {args.meters / elapsed:>10,.0f} meters/s  "
+          f"{values / elapsed / 1e6:,.0f}M readings/s")
+    shares = by_period.sum(axis=0) / by_period.sum()
+    print("kWh share: " + ", ".join(f"{name} {share:.1%}" for name, share in zip(schedule.periods, shares)))
+
+    flat = TouSchedule(dict(DEFAULT_SCHEDULE, periods={name: 1.0 for name in DEFAULT_SCHEDULE["periods"]}))
+    sample = slice(0, min(args.meters, 20_000))
+    flat_bills = interval_bills(readings[sample], timestamps, types[sample], flat)
+    monthly = calculate_bills(flat_bills[6].sum(axis=1), types[sample])
+    for got, expected in zip(flat_bills[:6], monthly):
+        if not np.array_equal(got, expected):
+            raise AssertionError("flat schedule does not match the monthly-total bill")
+    print(f"flat schedule: {len(monthly[0]):,} bills identical to calculate_bills on the monthly totals")
+
+    config = load_config(DEFAULT_TARIFF_PATH).get("time_of_use", DEFAULT_SCHEDULE)
+    for i in np.linspace(0, args.meters - 1, 25).astype(int):
+        expected = reference_bill(readings[i].astype(np.float64), timestamps, types[i], config)
+        if abs(bills[5][i] - expected) > 0.011:
+            raise AssertionError(f"meter {i}: {bills[5][i]} != reference {expected}")
+    print("reference loop: 25 sampled meters match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""load_test_service.py
+
+Load test for billing_service.py. Opens --concurrency keep-alive
+connections, sends --requests requests in total and reports p50/p99
+latency and requests/sec.
+
+By default it starts its own service on a free port; pass --port to test
+one that is already running.
+
+Run from the project root:
+    python benchmarks/load_test_service.py --requests 20000 --concurrency 64
+    python benchmarks/load_test_service.py --port 8080 --endpoint verify
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _payload(endpoint, rng):
+    if endpoint == "quote":
+        return {"kwh": round(rng.uniform(0, 1500), 2), "type": rng.choice(["residential", "commercial"])}
+    if endpoint == "verify":
+        return {"email": f"user{rng.randrange(1000)}@bench.local", "password": "secret"}
+    return {"name": "Load Test", "account": "000001", "address": "1 Test St", "type": "Residential",
+            "month": "10/18/26", "kwh": round(rng.uniform(0, 1500), 2)}
+
+
+async def _client(host, port, endpoint, count, latencies, errors, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            body = json.dumps(_payload(endpoint, rng)).encode()
+            request = (f"POST /{endpoint} HTTP/1.1\r\nHost: {host}\r\n"
+                       f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.decode("latin-1").split("\r\n"):
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors.append(head.split(b"\r\n", 1)[0].decode())
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, endpoint, total, concurrency):
+    latencies, errors = [], []
+    per_client = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, endpoint, n, latencies, errors, i)
+                           for i, n in enumerate(per_client) if n))
+    return latencies, errors, time.perf_counter() - start
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(port, timeout=15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit("service did not start")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the billing service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="test a running service instead of starting one")
+    parser.add_argument("--endpoint", choices=("quote", "verify", "pdf"), default="quote")
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--db", default="Database/AccountSystem.db", help="database for a started service")
+    args = parser.parse_args(argv)
+
+    proc = None
+    port = args.port
+    if port is None:
+        port = _free_port()
+        proc = subprocess.Popen([sys.executable, "billing_service.py", "--port", str(port), "--db", args.db],
+                                cwd=ROOT, stdout=subprocess.DEVNULL)
+        _wait_until_up(port)
+    try:
+        latencies, errors, elapsed = asyncio.run(
+            run_load(args.host, port, args.endpoint, args.requests, args.concurrency))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"endpoint      /{args.endpoint}")
+    print(f"requests      {len(latencies):,} ({len(errors):,} errors) with {args.concurrency} connections")
+    print(f"p50 latency   {statistics.median(latencies) * 1000:.2f} ms")
+    print(f"p99 latency   {p99 * 1000:.2f} ms")
+    print(f"throughput    {len(latencies) / elapsed:,.0f} req/s")
+    if errors:
+        print(f"first error   {errors[0]}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""run_benchmarks.py
+
+Headless benchmark suite with regression thresholds.
+
+Covers:
+- calculate_bill / tiered throughput (bills per second)
+- db_utils create_account / verify_user / update_password latency on a
+  temporary SQLite file pre-filled with 1k, 100k and 1M accounts
+- generate_bill_pdf render time and output size
+
+Results are written as JSON. When a baseline file exists, every metric is
+compared against it and the run fails if any metric is worse by more than
+--threshold percent. Save a baseline on the release machine with
+--save-baseline; baselines are machine specific and are not committed.
+
+Password hashing is set to a low work factor (--work-factor) so the
+database numbers measure SQLite, not PBKDF2.
+
+Run from the project root:
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --threshold 15
+    python benchmarks/run_benchmarks.py --sizes 1000 --quick
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from billing import calculate_bill, tiered
+from Database import db_utils, passwords
+from tariffs import get_tariff
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DB_OPS = 200
+
+
+def metric(value, unit, better):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def bench_billing(count):
+    rng = random.Random(42)
+    readings = [(rng.uniform(0, 2000), rng.choice(("residential", "commercial"))) for _ in range(count)]
+    results = {}
+
+    start = time.perf_counter()
+    for units, customer_type in readings:
+        calculate_bill(units, customer_type)
+    results["calculate_bill.throughput"] = metric(count / (time.perf_counter() - start), "bills/s", "higher")
+
+    tiers = get_tariff("residential").tiers
+    start = time.perf_counter()
+    for units, _ in readings:
+        tiered(units, tiers)
+    results["tiered.throughput"] = metric(count / (time.perf_counter() - start), "calls/s", "higher")
+    return results
+
+
+def _seed_accounts(conn, size):
+    stored = passwords.hash_password("secret")
+    batch = 50_000
+    for first in range(0, size, batch):
+        rows = [("Bench", "User", f"user{i}@bench.local", stored)
+                for i in range(first, min(size, first + batch))]
+        db_utils.bulk_create_accounts(conn, rows)
+
+
+def _time_ops(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def bench_db(size, ops=DB_OPS):
+    results = {}
+    rng = random.Random(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        pool = db_utils.ConnectionPool(db_path, size=1)
+        with pool.connection() as conn:
+            _seed_accounts(conn, size)
+            existing = [f"user{rng.randrange(size)}@bench.local" for _ in range(ops)]
+            ops_by_name = {
+                "create_account": _time_ops(db_utils.create_account, [
+                    (conn, "New", "User", f"new{i}@bench.local", "secret") for i in range(ops)]),
+                "verify_user": _time_ops(db_utils.verify_user, [
+                    (conn, email, "secret") for email in existing]),
+                "update_password": _time_ops(db_utils.update_password, [
+                    (conn, email, "changed") for email in existing]),
+            }
+        pool.close()
+    for name, samples in ops_by_name.items():
+        results[f"db.{name}.{size}.p50"] = metric(statistics.median(samples), "ms", "lower")
+        results[f"db.{name}.{size}.p95"] = metric(_percentile(samples, 95), "ms", "lower")
+    return results
+
+
+def bench_pdf(count):
+    from pdf_maker import generate_bill_pdf
+
+    energy, fixed, vat, env_fee, rate, total = calculate_bill(321.5, "residential")
+    data = {"name": "Bench User", "account": "000123", "address": "1 Bench St", "type": "Residential",
+            "month": "10/18/26", "kwh": 321.5, "rate": rate, "fixed": fixed, "base": energy,
+            "env": env_fee, "vat": vat, "total": total}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.pdf")
+        generate_bill_pdf(data, path)  # warm-up: fonts and styles
+        samples = _time_ops(generate_bill_pdf, [(data, path)] * count)
+        size = os.path.getsize(path)
+    return {
+        "pdf.render.p50": metric(statistics.median(samples), "ms", "lower"),
+        "pdf.size": metric(size, "bytes", "lower"),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (name, baseline, current, change%) for regressed metrics."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or not base["value"]:
+            continue
+        change = (current["value"] - base["value"]) / base["value"] * 100
+        worse = change if current["better"] == "lower" else -change
+        if worse > threshold:
+            regressions.append((name, base["value"], current["value"], worse))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and check for regressions.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated account counts for the database benchmarks")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for smoke runs")
+    parser.add_argument("--work-factor", type=int, default=1_000)
+    parser.add_argument("--output", default=None, help="write results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed regression in percent")
+    args = parser.parse_args(argv)
+
+    passwords.set_work_factor(args.work_factor)
+    results = {}
+    results.update(bench_billing(20_000 if args.quick else 200_000))
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        print(f"database benchmark with {size:,} accounts...", file=sys.stderr)
+        results.update(bench_db(size, ops=50 if args.quick else DB_OPS))
+    results.update(bench_pdf(5 if args.quick else 30))
+
+    for name, m in sorted(results.items()):
+        print(f"{name:<40} {m['value']:>14,.3f} {m['unit']}")
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+              "metrics": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)["metrics"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, base, current, worse in regressions:
+        print(f"REGRESSION {name}: {base:,.3f} -> {current:,.3f} ({worse:.1f}% worse)")
+    if regressions:
+        return 1
+    print(f"no metric regressed by more than {args.threshold:g}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
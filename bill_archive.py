@@ -0,0 +1,328 @@
+"""bill_archive.py
+
+Compressed columnar archive of computed bills.
+
+Bills are written to one directory per billing month and customer type,
+
+    <root>/month=2026-09/type=residential/part-00000.npz
+
+each part an `np.savez_compressed` file with one member per column
+(month and type are implied by the partition and not stored). A
+manifest.json at the root lists every part with its row count and
+account range, so a query opens only the parts for the months, types and
+accounts it asks for, and decompresses only the columns it needs.
+Reading or writing an archive needs nothing beyond NumPy.
+
+    archive_ledger(conn, "archive")                     # BillDB -> archive
+    query("archive", "2026-01", "2026-06", customer_type="residential")
+    query("archive", accounts=["00012345"])             # one customer's history
+    totals("archive", by="month")                       # reads the total column only
+
+Only one process should write to an archive at a time. Readers can run
+alongside it: parts are complete before the manifest (replaced
+atomically) lists them.
+
+Usage:
+    python bill_archive.py export --db Database/AccountSystem.db --out archive [--from 2024-01] [--to 2024-12]
+    python bill_archive.py query archive --from 2026-01 --to 2026-03 [--type residential] [--account 00012345] [--csv out.csv]
+    python bill_archive.py info archive
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+from bill_records import NUMERIC_COLUMNS, TEXT_COLUMNS, BillTable
+from Database import bill_ledger, db_utils
+from Database.bill_ledger import BILL_COLUMNS, normalize_month
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+PARTITION_COLUMNS = ("month", "type")
+STORED_COLUMNS = tuple(name for name in BILL_COLUMNS if name not in PARTITION_COLUMNS)
+EXPORT_BATCH_SIZE = 100_000  # BillDB rows read per batch by archive_ledger
+
+
+def load_manifest(root):
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return {"version": FORMAT_VERSION, "parts": []}
+    with open(path, encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{root}: unsupported archive version {manifest.get('version')}")
+    return manifest
+
+
+def _save_manifest(root, manifest):
+    path = os.path.join(root, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def _write_part(root, month, customer_type, columns):
+    """Write one partition's rows (sorted by account) as a new part file; returns its manifest entry."""
+    rel_dir = f"month={quote(month, safe='')}/type={quote(customer_type, safe='')}"
+    directory = os.path.join(root, rel_dir)
+    os.makedirs(directory, exist_ok=True)
+    taken = set(os.listdir(directory))
+    number = 0
+    while f"part-{number:05d}.npz" in taken:
+        number += 1
+    rel_path = f"{rel_dir}/part-{number:05d}.npz"
+    path = os.path.join(root, rel_path)
+    with open(path + ".tmp", "wb") as fh:
+        np.savez_compressed(fh, **columns)
+    os.replace(path + ".tmp", path)
+    accounts = columns["account"]
+    return {"path": rel_path, "month": month, "type": customer_type, "rows": len(accounts),
+            "bytes": os.path.getsize(path), "account_min": str(accounts[0]), "account_max": str(accounts[-1])}
+
+
+def _as_columns(bills):
+    """{name: array} for a BillTable, a mapping of columns, or an iterable of bill dicts."""
+    if isinstance(bills, dict):
+        columns = bills
+    else:
+        if not isinstance(bills, BillTable):
+            bills = BillTable.from_bills(bills)
+        columns = {name: bills.column(name) for name in BILL_COLUMNS}
+    out = {}
+    for name in TEXT_COLUMNS + PARTITION_COLUMNS:
+        values = columns[name]
+        if not isinstance(values, np.ndarray):
+            values = ["" if value is None else value for value in values]
+        out[name] = np.asarray(values).astype(str)
+    for name in NUMERIC_COLUMNS:
+        out[name] = np.asarray(columns[name], dtype=np.float64)  # NULL amounts become NaN
+    out["type"] = np.char.lower(np.char.strip(out["type"]))
+    months, inverse = np.unique(out["month"], return_inverse=True)
+    out["month"] = np.asarray([normalize_month(month) for month in months.tolist()])[inverse.ravel()]
+    return out
+
+
+def _write_partitions(root, columns):
+    """Write one new part per (month, type) in columns; returns their manifest entries."""
+    months, month_codes = np.unique(columns["month"], return_inverse=True)
+    types, type_codes = np.unique(columns["type"], return_inverse=True)
+    keys = month_codes.ravel() * len(types) + type_codes.ravel()
+    # partition by partition, each sorted by account
+    order = np.lexsort((columns["account"], keys))
+    bounds = np.flatnonzero(np.diff(keys[order])) + 1
+    written = []
+    for rows in np.split(order, bounds):
+        month, customer_type = str(months[keys[rows[0]] // len(types)]), str(types[keys[rows[0]] % len(types)])
+        written.append(_write_part(root, month, customer_type,
+                                   {name: columns[name][rows] for name in STORED_COLUMNS}))
+    return written
+
+
+def _publish(root, manifest, written, replace_months=()):
+    """List the written parts in the manifest, dropping every part of replace_months."""
+    replaced = [part for part in manifest["parts"] if part["month"] in replace_months]
+    manifest["parts"] = [part for part in manifest["parts"] if part["month"] not in replace_months] + written
+    manifest["parts"].sort(key=lambda part: (part["month"], part["type"], part["path"]))
+    _save_manifest(root, manifest)
+    for part in replaced:
+        os.remove(os.path.join(root, part["path"]))
+
+
+def write_bills(root, bills, replace=False):
+    """Append bills to the archive, one new part per (month, type) present.
+
+    bills: a BillTable, a {column: sequence} mapping (as for
+    `BillTable.from_arrays`) or an iterable of bill dicts.
+    replace=True drops every existing part of each month written, whatever
+    its type, so re-archiving a month is idempotent. Returns the number of
+    rows written.
+    """
+    columns = _as_columns(bills)
+    if not len(columns["total"]):
+        return 0
+    os.makedirs(root, exist_ok=True)
+    manifest = load_manifest(root)
+    written = _write_partitions(root, columns)
+    _publish(root, manifest, written, set(columns["month"].tolist()) if replace else ())
+    return len(columns["total"])
+
+
+def archive_ledger(conn, root, start_month=None, end_month=None, progress=None, batch_size=EXPORT_BATCH_SIZE):
+    """Copy BillDB into the archive, one month at a time (replacing those months' partitions).
+
+    Each month is read batch_size rows at a time, one new part per type
+    and batch, and its old parts are only dropped once all the new ones
+    are written. Returns the number of bills archived. BillDB itself is
+    not modified.
+    """
+    sql = "SELECT DISTINCT BillingMonth FROM BillDB WHERE 1 = 1"
+    params = []
+    if start_month is not None:
+        sql += " AND BillingMonth >= ?"
+        params.append(normalize_month(start_month))
+    if end_month is not None:
+        sql += " AND BillingMonth <= ?"
+        params.append(normalize_month(end_month))
+    months = {}
+    for (month,) in conn.execute(sql + " ORDER BY BillingMonth", params).fetchall():
+        months.setdefault(normalize_month(month), []).append(month)
+    os.makedirs(root, exist_ok=True)
+    total = 0
+    for month, stored in sorted(months.items()):
+        cur = conn.execute(bill_ledger._SELECT + f" WHERE BillingMonth IN ({', '.join('?' * len(stored))})",
+                           stored)
+        written, count = [], 0
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            written += _write_partitions(root, _as_columns(dict(zip(BILL_COLUMNS, zip(*rows)))))
+            count += len(rows)
+        _publish(root, load_manifest(root), written, {month})
+        total += count
+        if progress:
+            print(f"{month}: {count:,} bills", file=progress)
+    return total
+
+
+def _select_parts(manifest, start_month, end_month, customer_type, accounts):
+    start = normalize_month(start_month) if start_month is not None else None
+    end = normalize_month(end_month) if end_month is not None else None
+    customer_type = customer_type.strip().lower() if customer_type is not None else None
+    for part in manifest["parts"]:
+        if start is not None and part["month"] < start:
+            continue
+        if end is not None and part["month"] > end:
+            continue
+        if customer_type is not None and part["type"] != customer_type:
+            continue
+        if accounts is not None and not any(part["account_min"] <= a <= part["account_max"] for a in accounts):
+            continue
+        yield part
+
+
+def scan(root, start_month=None, end_month=None, customer_type=None, accounts=None, columns=None):
+    """Yield (part entry, {column: array}) for every part matching the filters.
+
+    Months are inclusive "YYYY-MM" bounds; accounts is an optional
+    collection of account numbers. Only the listed columns (default: all)
+    are decompressed, plus the account column when filtering by account.
+    month and type come from the partition and cost nothing to read.
+    """
+    columns = tuple(columns or BILL_COLUMNS)
+    unknown = set(columns) - set(BILL_COLUMNS)
+    if unknown:
+        raise KeyError(f"unknown columns: {', '.join(sorted(unknown))}")
+    if accounts is not None:
+        accounts = sorted({str(account).strip() for account in accounts})
+    for part in _select_parts(load_manifest(root), start_month, end_month, customer_type, accounts):
+        with np.load(os.path.join(root, part["path"])) as npz:
+            keep = None
+            if accounts is not None:
+                # parts are sorted by account: binary search instead of a full compare
+                stored = npz["account"]
+                first = np.searchsorted(stored, accounts, side="left")
+                last = np.searchsorted(stored, accounts, side="right")
+                keep = np.concatenate([np.arange(lo, hi) for lo, hi in zip(first, last)])
+                if not keep.size:
+                    continue
+            data = {}
+            for name in columns:
+                if name in PARTITION_COLUMNS:
+                    continue
+                values = npz[name]
+                data[name] = values if keep is None else values[keep]
+        rows = part["rows"] if keep is None else keep.size
+        for name in PARTITION_COLUMNS:
+            if name in columns:
+                data[name] = np.full(rows, part[name])
+        yield part, data
+
+
+def query(root, start_month=None, end_month=None, customer_type=None, accounts=None, columns=None):
+    """Bills matching the filters, oldest month first.
+
+    With columns=None the result is a BillTable; otherwise a {column: array}
+    dict of just those columns, which reads much less of the archive.
+    """
+    wanted = tuple(columns or BILL_COLUMNS)
+    chunks = [data for _, data in scan(root, start_month, end_month, customer_type, accounts, wanted)]
+    if chunks:
+        merged = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in wanted}
+    else:
+        merged = {name: np.empty(0, dtype=np.float64 if name in NUMERIC_COLUMNS else str) for name in wanted}
+    return BillTable.from_arrays(merged) if columns is None else merged
+
+
+def totals(root, by="month", value="total", start_month=None, end_month=None, customer_type=None, accounts=None):
+    """{month or type: sum of value} reading a single column per part."""
+    if by not in PARTITION_COLUMNS:
+        raise ValueError(f"totals can be grouped by {' or '.join(PARTITION_COLUMNS)}")
+    sums = {}
+    for part, data in scan(root, start_month, end_month, customer_type, accounts, (value,)):
+        sums[part[by]] = sums.get(part[by], 0.0) + float(data[value].sum())
+    ndigits = 3 if value == "kwh" else 2
+    return {key: round(total, ndigits) for key, total in sorted(sums.items())}
+
+
+def partitions(root):
+    """[(month, type, parts, rows, bytes)] summarizing the archive."""
+    summary = {}
+    for part in load_manifest(root)["parts"]:
+        entry = summary.setdefault((part["month"], part["type"]), [0, 0, 0])
+        entry[0] += 1
+        entry[1] += part["rows"]
+        entry[2] += part["bytes"]
+    return [(month, customer_type, *entry) for (month, customer_type), entry in sorted(summary.items())]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar bill archive partitioned by month and customer type.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="copy BillDB into an archive")
+    export.add_argument("--db", default="Database/AccountSystem.db")
+    export.add_argument("--out", required=True, help="archive directory")
+    export.add_argument("--from", dest="start_month", default=None)
+    export.add_argument("--to", dest="end_month", default=None)
+    find = sub.add_parser("query", help="print or export archived bills")
+    find.add_argument("root")
+    find.add_argument("--from", dest="start_month", default=None)
+    find.add_argument("--to", dest="end_month", default=None)
+    find.add_argument("--type", dest="customer_type", default=None)
+    find.add_argument("--account", action="append", default=None, help="repeat for several accounts")
+    find.add_argument("--csv", default=None, help="write the bills to a CSV file")
+    info = sub.add_parser("info", help="list partitions")
+    info.add_argument("root")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "export":
+        with db_utils.connection(args.db) as conn:
+            count = archive_ledger(conn, args.out, args.start_month, args.end_month, progress=sys.stdout)
+        print(f"archived {count:,} bills in {time.perf_counter() - start:.1f}s")
+    elif args.command == "query":
+        table = query(args.root, args.start_month, args.end_month, args.customer_type, args.account)
+        if args.csv:
+            with open(args.csv, "w", newline="", encoding="utf-8") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(BILL_COLUMNS)
+                writer.writerows([bill[name] for name in BILL_COLUMNS] for bill in table)
+        else:
+            for bill in table:
+                print(f"{bill.month} {bill.account:<12} {bill.type:<12} {bill.kwh:>10,.2f} kWh {bill.total:>12,.2f}")
+        print(f"{len(table):,} bills, total {table.sum('total'):,.2f} ({time.perf_counter() - start:.2f}s)")
+    else:
+        rows = partitions(args.root)
+        print(f"{'month':<9} {'type':<12} {'parts':>5} {'bills':>10} {'bytes':>12}")
+        for month, customer_type, parts, count, size in rows:
+            print(f"{month:<9} {customer_type:<12} {parts:>5} {count:>10,} {size:>12,}")
+        print(f"{sum(r[3] for r in rows):,} bills in {sum(r[4] for r in rows) / 2**20:,.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
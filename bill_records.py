@@ -0,0 +1,247 @@
+"""bill_records.py
+
+Compact bill storage for large runs.
+
+`Bill` is a fixed-layout record with the same keys as the bill dicts
+used elsewhere (`bill["total"]` works on both), at a fraction of a
+dict's size. `BillTable` keeps a whole run column by column: amounts
+in float64 arrays, customer type and month as small integer codes, and
+names, accounts and addresses packed into one UTF-8 buffer per column.
+Rows are only turned into `Bill` objects when they are read.
+
+    table = BillTable.from_bills(bills)      # any iterable of dicts/Bills
+    table.sum("total"), table.totals_by("type")
+    table[table.column("kwh") > 500]         # filtered BillTable
+    generate_bills_pdf(table[:100], "first_100.pdf")
+"""
+from array import array
+
+import numpy as np
+
+from Database.bill_ledger import BILL_COLUMNS
+
+TEXT_COLUMNS = ("account", "name", "address")
+CODED_COLUMNS = ("type", "month")
+NUMERIC_COLUMNS = ("kwh", "rate", "fixed", "base", "env", "vat", "total")
+
+
+class Bill:
+    """One bill; reads like the bill dicts (`bill["kwh"]`, `bill.get`, `dict(bill)`)."""
+
+    __slots__ = BILL_COLUMNS
+
+    def __init__(self, account="", name="", address="", type="", month="",
+                 kwh=0.0, rate=0.0, fixed=0.0, base=0.0, env=0.0, vat=0.0, total=0.0):
+        self.account = account
+        self.name = name
+        self.address = address
+        self.type = type
+        self.month = month
+        self.kwh = kwh
+        self.rate = rate
+        self.fixed = fixed
+        self.base = base
+        self.env = env
+        self.vat = vat
+        self.total = total
+
+    @classmethod
+    def from_dict(cls, bill):
+        return cls(**{key: bill[key] for key in BILL_COLUMNS})
+
+    def __getitem__(self, key):
+        if key not in BILL_COLUMNS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in BILL_COLUMNS else default
+
+    def keys(self):
+        return BILL_COLUMNS
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in BILL_COLUMNS}
+
+    def __eq__(self, other):
+        if isinstance(other, (Bill, dict)):
+            return all(self[key] == other[key] for key in BILL_COLUMNS)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Bill(account={self.account!r}, month={self.month!r}, kwh={self.kwh!r}, total={self.total!r})"
+
+
+class TextColumn:
+    """Strings packed into one UTF-8 buffer with an offsets array."""
+
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values):
+        data = bytearray()
+        offsets = array("q", [0])
+        for value in values:
+            data += str(value).encode("utf-8")
+            offsets.append(len(data))
+        return cls(bytes(data), np.frombuffer(offsets, dtype=np.int64))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def take(self, indices):
+        return TextColumn.from_strings(self[int(i)] for i in indices)
+
+    def tolist(self):
+        return [self[i] for i in range(len(self))]
+
+    @property
+    def nbytes(self):
+        return len(self.data) + self.offsets.nbytes
+
+
+class BillTable:
+    """Column-oriented collection of bills.
+
+    Supports len(), iteration (yields `Bill`), integer indexing, slicing
+    and boolean-mask / index-array selection (both return a BillTable),
+    and vectorized aggregates over the numeric columns.
+    """
+
+    def __init__(self, text, codes, categories, numbers):
+        self._text = text              # name -> TextColumn
+        self._codes = codes            # name -> int32 array of category codes
+        self._categories = categories  # name -> list of category strings
+        self._numbers = numbers        # name -> float64 array
+
+    @classmethod
+    def from_bills(cls, bills):
+        """Build a table from an iterable of bill dicts or Bill records, in one pass."""
+        text = {name: (bytearray(), array("q", [0])) for name in TEXT_COLUMNS}
+        codes = {name: array("i") for name in CODED_COLUMNS}
+        lookup = {name: {} for name in CODED_COLUMNS}
+        numbers = {name: array("d") for name in NUMERIC_COLUMNS}
+        for bill in bills:
+            for name in TEXT_COLUMNS:
+                data, offsets = text[name]
+                data += str(bill[name]).encode("utf-8")
+                offsets.append(len(data))
+            for name in CODED_COLUMNS:
+                known = lookup[name]
+                codes[name].append(known.setdefault(str(bill[name]), len(known)))
+            for name in NUMERIC_COLUMNS:
+                numbers[name].append(float(bill[name]))
+        return cls(
+            {name: TextColumn(bytes(data), np.frombuffer(offsets, dtype=np.int64))
+             for name, (data, offsets) in text.items()},
+            {name: np.frombuffer(values, dtype=np.int32) for name, values in codes.items()},
+            {name: list(known) for name, known in lookup.items()},
+            {name: np.frombuffer(values, dtype=np.float64) for name, values in numbers.items()},
+        )
+
+    @classmethod
+    def from_arrays(cls, columns):
+        """Build a table from whole columns, e.g. the arrays of `batch_billing.calculate_bills`.
+
+        columns: mapping of every name in BILL_COLUMNS to a sequence/array
+        """
+        text = {name: TextColumn.from_strings(columns[name]) for name in TEXT_COLUMNS}
+        codes, categories = {}, {}
+        for name in CODED_COLUMNS:
+            labels, inverse = np.unique(np.asarray(columns[name]).astype(str), return_inverse=True)
+            codes[name] = inverse.astype(np.int32).ravel()
+            categories[name] = labels.tolist()
+        numbers = {name: np.asarray(columns[name], dtype=np.float64) for name in NUMERIC_COLUMNS}
+        return cls(text, codes, categories, numbers)
+
+    def __len__(self):
+        return len(self._numbers["total"])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._record(i)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            index = int(key)
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("bill index out of range")
+            return self._record(index)
+        if isinstance(key, slice):
+            indices = range(*key.indices(len(self)))
+            if indices.step == 1:
+                return self._slice(indices.start, indices.stop)
+            key = np.arange(indices.start, indices.stop, indices.step)
+        return self._take(np.asarray(key))
+
+    def _record(self, i):
+        return Bill(
+            *(self._text[name][i] for name in TEXT_COLUMNS),
+            *(self._categories[name][self._codes[name][i]] for name in CODED_COLUMNS),
+            *(self._numbers[name][i].item() for name in NUMERIC_COLUMNS),
+        )
+
+    def _slice(self, start, stop):
+        stop = max(start, stop)
+        text = {}
+        for name, column in self._text.items():
+            # views share the parent buffer; offsets stay absolute
+            text[name] = TextColumn(column.data, column.offsets[start:stop + 1])
+        return BillTable(
+            text,
+            {name: codes[start:stop] for name, codes in self._codes.items()},
+            self._categories,
+            {name: values[start:stop] for name, values in self._numbers.items()},
+        )
+
+    def _take(self, key):
+        indices = np.flatnonzero(key) if key.dtype == bool else key.astype(np.int64)
+        return BillTable(
+            {name: column.take(indices) for name, column in self._text.items()},
+            {name: codes[indices] for name, codes in self._codes.items()},
+            self._categories,
+            {name: values[indices] for name, values in self._numbers.items()},
+        )
+
+    def column(self, name):
+        """A numeric column as a float64 array; a text or coded column as an array of str."""
+        if name in self._numbers:
+            return self._numbers[name]
+        if name in self._codes:
+            return np.asarray(self._categories[name])[self._codes[name]]
+        if name in self._text:
+            return np.asarray(self._text[name].tolist())
+        raise KeyError(name)
+
+    def sum(self, name="total"):
+        return float(self._numbers[name].sum())
+
+    def mean(self, name="total"):
+        return float(self._numbers[name].mean()) if len(self) else 0.0
+
+    def totals_by(self, key="type", value="total"):
+        """{category: sum of value} for a coded column (type or month), via bincount."""
+        sums = np.bincount(self._codes[key], weights=self._numbers[value],
+                           minlength=len(self._categories[key]))
+        counts = np.bincount(self._codes[key], minlength=len(self._categories[key]))
+        return {label: float(total) for label, total, count
+                in zip(self._categories[key], sums, counts) if count}
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column buffers (slices report their parent's text buffers)."""
+        return (sum(column.nbytes for column in self._text.values())
+                + sum(codes.nbytes for codes in self._codes.values())
+                + sum(values.nbytes for values in self._numbers.values()))
+
+    def __repr__(self):
+        return f"BillTable({len(self):,} bills)"
@@ -0,0 +1,28 @@
+"""billing.py
+
+Billing math shared by the calculator UI and the headless tools.
+Kept free of tkinter/ReportLab imports so it can be used without a display.
+Bills are computed in integer centavos by `money` (rates from the compiled
+tariff schedules in `tariffs`) and returned in pesos.
+"""
+import metrics
+from money import bill_cents, bill_pesos
+
+
+def tiered(u, tiers):
+    cost = 0
+    applied_rates = 0
+    for limits, rate in tiers:
+        if u <= 0:
+            break
+        use = min(u, limits)
+        cost += use * rate
+        applied_rates = rate
+        u -= use
+    return cost, applied_rates
+
+
+@metrics.timed("billing.calculate_bill")
+def calculate_bill(units, customer_type):
+    """(energy, fixed, vat, env_fee, applied_rates, total) in pesos; see money.py for the rounding."""
+    return bill_pesos(bill_cents(units, customer_type))
@@ -0,0 +1,294 @@
+"""billing_service.py
+
+Headless asyncio HTTP/JSON service for the portal and IVR systems.
+
+Endpoints (localhost only by default):
+    POST /quote   {"kwh": 250, "type": "residential"}
+                  -> {"energy", "fixed", "vat", "env_fee", "rate", "total"}
+    POST /verify  {"email": ..., "password": ...} -> {"ok": true|false}
+    POST /pdf     bill dict (name, account, address, type, month, kwh)
+                  -> application/pdf
+    GET  /health  -> {"status": "ok"}
+
+Quote requests are collected for up to BATCH_WINDOW seconds (or
+MAX_BATCH requests) and billed together with
+`batch_billing.calculate_bills`. SQLite work runs on a thread pool and
+ReportLab rendering on a process pool, so the event loop never blocks.
+
+Usage:
+    python billing_service.py --port 8080 --db Database/AccountSystem.db
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from batch_billing import calculate_bills
+from billing import calculate_bill
+from Database import db_utils
+
+MAX_BATCH = 256
+BATCH_WINDOW = 0.002
+MAX_BODY = 1 << 20
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _render_pdf(bill):
+    # runs in a worker process
+    from pdf_maker import generate_bill_pdf
+
+    buf = io.BytesIO()
+    generate_bill_pdf(bill, buf)
+    return buf.getvalue()
+
+
+def _verify(db_path, email, password):
+    with db_utils.connection(db_path) as conn:
+        return db_utils.verify_user(conn, email, password)
+
+
+class QuoteBatcher:
+    """Groups concurrent quote requests into one vectorized billing call."""
+
+    def __init__(self, max_batch=MAX_BATCH, window=BATCH_WINDOW):
+        self.max_batch = max_batch
+        self.window = window
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.quotes = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def quote(self, units, customer_type):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((units, customer_type, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._bill(batch)
+
+    def _bill(self, batch):
+        self.batches += 1
+        self.quotes += len(batch)
+        try:
+            columns = calculate_bills(np.array([b[0] for b in batch], dtype=np.float64),
+                                      np.array([b[1] for b in batch]))
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for i, (_, _, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(tuple(float(col[i]) for col in columns))
+
+
+class BillingService:
+    def __init__(self, db_path, pdf_workers=None, db_workers=4):
+        self.db_path = db_path
+        self.batcher = QuoteBatcher()
+        self.db_pool = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix="service-db")
+        self.pdf_pool = ProcessPoolExecutor(max_workers=pdf_workers or os.cpu_count() or 1)
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("POST", "/quote"): self.quote,
+            ("POST", "/verify"): self.verify,
+            ("POST", "/pdf"): self.pdf,
+        }
+
+    async def health(self, body):
+        return 200, {"status": "ok", "batches": self.batcher.batches, "quotes": self.batcher.quotes}
+
+    async def quote(self, body):
+        try:
+            units = float(body["kwh"])
+            customer_type = str(body.get("type", "residential")).strip().lower()
+        except (KeyError, TypeError, ValueError):
+            raise HttpError(400, "expected {\"kwh\": number, \"type\": string}")
+        if not math.isfinite(units):
+            raise HttpError(400, "kwh must be a finite number")
+        energy, fixed, vat, env_fee, rate, total = await self.batcher.quote(units, customer_type)
+        return 200, {"kwh": units, "type": customer_type, "energy": energy, "fixed": fixed,
+                     "vat": vat, "env_fee": env_fee, "rate": rate, "total": total}
+
+    async def verify(self, body):
+        email, password = body.get("email"), body.get("password")
+        if not (isinstance(email, str) and isinstance(password, str)):
+            raise HttpError(400, "expected {\"email\": string, \"password\": string}")
+        loop = asyncio.get_running_loop()
+        ok = await loop.run_in_executor(self.db_pool, _verify, self.db_path, email.strip(), password)
+        return 200, {"ok": ok}
+
+    async def pdf(self, body):
+        try:
+            units = float(body["kwh"])
+            customer_type = str(body["type"])
+        except (KeyError, TypeError, ValueError):
+            raise HttpError(400, "expected a bill with at least kwh and type")
+        if not math.isfinite(units):
+            raise HttpError(400, "kwh must be a finite number")
+        energy, fixed, vat, env_fee, rate, total = calculate_bill(units, customer_type.strip().lower())
+        bill = {
+            "name": body.get("name", ""),
+            "account": body.get("account", ""),
+            "address": body.get("address", ""),
+            "type": customer_type,
+            "month": body.get("month", ""),
+            "kwh": units,
+            "rate": rate,
+            "fixed": fixed,
+            "base": energy,
+            "env": env_fee,
+            "vat": vat,
+            "total": total,
+        }
+        loop = asyncio.get_running_loop()
+        return 200, await loop.run_in_executor(self.pdf_pool, _render_pdf, bill)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as exc:
+                    # the rest of the stream cannot be framed: answer, then close
+                    self._write_response(writer, exc.status, {"error": str(exc)}, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                status, payload = await self._dispatch(method, path, body)
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, raw):
+        handler = self.routes.get((method, path))
+        if handler is None:
+            allowed = any(p == path for _, p in self.routes)
+            return (405, {"error": "method not allowed"}) if allowed else (404, {"error": "not found"})
+        try:
+            body = json.loads(raw) if raw else {}
+            if not isinstance(body, dict):
+                raise HttpError(400, "expected a JSON object")
+            return await handler(body)
+        except json.JSONDecodeError:
+            return 400, {"error": "invalid JSON"}
+        except HttpError as exc:
+            return exc.status, {"error": str(exc)}
+        except Exception as exc:
+            return 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+    async def _read_request(self, reader):
+        """(method, path, body, keep_alive), None at end of stream; HttpError for a bad request."""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(400, "request head too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        length = headers.get("content-length", "0") or "0"
+        if not (length.isascii() and length.isdigit()):
+            raise HttpError(400, "invalid Content-Length")
+        length = int(length)
+        if length > MAX_BODY:
+            raise HttpError(413, f"request body over {MAX_BODY} bytes")
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method.upper(), path.split("?", 1)[0], body, keep_alive
+
+    def _write_response(self, writer, status, payload, keep_alive):
+        if isinstance(payload, bytes):
+            body, content_type = payload, "application/pdf"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+    async def serve(self, host="127.0.0.1", port=8080, ready=None):
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready is not None:
+            ready.set_result(server.sockets[0].getsockname()[1])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+            self.db_pool.shutdown(wait=False)
+            self.pdf_pool.shutdown(wait=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve bill quotes, account checks and PDFs over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--db", default="Database/AccountSystem.db")
+    parser.add_argument("--pdf-workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    service = BillingService(args.db, pdf_workers=args.pdf_workers)
+    print(f"billing service listening on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""bulk_billing.py
+
+Headless bulk billing for meter-reading files.
+
+Streams a CSV of readings (account, name, address, type, month, kwh) in
+fixed-size chunks, bills every row with `billing.calculate_bill` (the
+same function the calculator UI uses) and streams the bills to an output
+CSV or to the BillDB table. Memory use is bounded by the chunk size.
+
+Progress is checkpointed after every chunk so an interrupted run can be
+resumed with --resume.
+
+Usage:
+    python bulk_billing.py readings.csv --out bills.csv
+    python bulk_billing.py readings.csv --db Database/AccountSystem.db --resume
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+
+from billing import calculate_bill
+from Database import bill_ledger
+
+INPUT_FIELDS = ("account", "name", "address", "type", "month", "kwh")
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def bill_row(row):
+    """Bill one reading row and return the bill dict used by generate_bill_pdf.
+
+    Raises ValueError for a kWh value that is not a finite number.
+    """
+    units = float(row["kwh"])
+    if not math.isfinite(units):
+        raise ValueError(f"kwh must be a finite number, got {row['kwh']!r}")
+    energy, fixed, vat, env_fee, applied_rates, total = calculate_bill(units, row["type"].strip().lower())
+    return {
+        "account": row["account"],
+        "name": row["name"],
+        "address": row["address"],
+        "type": row["type"],
+        "month": row["month"],
+        "kwh": units,
+        "rate": applied_rates,
+        "fixed": fixed,
+        "base": energy,
+        "env": env_fee,
+        "vat": vat,
+        "total": total,
+    }
+
+
+def read_chunks(fh, fieldnames, chunk_size, first_line=2):
+    """Yield (bills, rejected, input_offset) for each chunk of the open input.
+
+    Reads through readline() rather than iteration so fh.tell() stays
+    usable as a resume point. first_line is the file line of the next row
+    and is only used in reject messages.
+    """
+    reader = csv.DictReader(iter(fh.readline, ""), fieldnames=fieldnames)
+    while True:
+        bills = []
+        rejected = []
+        for row in reader:
+            try:
+                bills.append(bill_row(row))
+            except (KeyError, TypeError, ValueError, AttributeError) as exc:
+                rejected.append((first_line - 1 + reader.line_num, str(exc)))
+            if len(bills) + len(rejected) >= chunk_size:
+                break
+        if not bills and not rejected:
+            return
+        yield bills, rejected, fh.tell()
+
+
+class CsvSink:
+    """Writes bills to a CSV file; the checkpoint lives in <out>.checkpoint."""
+
+    def __init__(self, path, input_path, resume):
+        self.path = path
+        self.input_path = os.path.abspath(input_path)
+        self.checkpoint_path = path + ".checkpoint"
+        state = self._load_checkpoint() if resume else None
+        if state:
+            self.fh = open(path, "r+", newline="", encoding="utf-8")
+            self.fh.truncate(state["output_offset"])
+            self.fh.seek(state["output_offset"])
+        else:
+            self.fh = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.fh, fieldnames=bill_ledger.BILL_COLUMNS)
+        if not state:
+            self.writer.writeheader()
+        self.state = state
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as fh:
+                state = json.load(fh)
+        except FileNotFoundError:
+            return None
+        if state.get("input") != self.input_path:
+            raise SystemExit(f"checkpoint {self.checkpoint_path} belongs to {state.get('input')}")
+        return state
+
+    def write(self, bills, rows_done, input_offset):
+        self.writer.writerows(bills)
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+        state = {"input": self.input_path, "rows_done": rows_done,
+                 "input_offset": input_offset, "output_offset": self.fh.tell()}
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+        os.replace(tmp, self.checkpoint_path)
+
+    def finish(self):
+        self.fh.close()
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+
+class DbSink:
+    """Writes bills to BillDB; the checkpoint is committed with each chunk."""
+
+    def __init__(self, db_path, input_path, resume):
+        self.conn = sqlite3.connect(db_path)
+        self.input_path = os.path.abspath(input_path)
+        bill_ledger.ensure_table(self.conn)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS BulkRunDB (InputPath TEXT PRIMARY KEY, RowsDone INTEGER, InputOffset INTEGER)"
+        )
+        self.conn.commit()
+        self.state = None
+        if resume:
+            row = self.conn.execute(
+                "SELECT RowsDone, InputOffset FROM BulkRunDB WHERE InputPath = ?", (self.input_path,)
+            ).fetchone()
+            if row:
+                self.state = {"rows_done": row[0], "input_offset": row[1]}
+
+    def write(self, bills, rows_done, input_offset):
+        with self.conn:
+            bill_ledger.insert_bills(self.conn, bills, commit=False)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO BulkRunDB (InputPath, RowsDone, InputOffset) VALUES (?, ?, ?)",
+                (self.input_path, rows_done, input_offset),
+            )
+
+    def finish(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM BulkRunDB WHERE InputPath = ?", (self.input_path,))
+        self.conn.close()
+
+
+def run(input_path, sink, chunk_size=DEFAULT_CHUNK_SIZE, progress=sys.stderr):
+    """Bill every row of input_path into sink. Returns a stats dict."""
+    total_bytes = os.path.getsize(input_path)
+    state = sink.state or {}
+    rows_done = state.get("rows_done", 0)
+    billed = rejected_count = 0
+    start = time.perf_counter()
+
+    with open(input_path, newline="", encoding="utf-8") as fh:
+        header = next(csv.reader([fh.readline()]))
+        fieldnames = [name.strip().lower() for name in header]
+        missing = set(INPUT_FIELDS) - set(fieldnames)
+        if missing:
+            raise SystemExit(f"input is missing columns: {', '.join(sorted(missing))}")
+        if state:
+            fh.seek(state["input_offset"])
+            if progress:
+                print(f"resuming after {rows_done} rows", file=progress)
+
+        # rows already done are lines 2 .. rows_done + 1 of the input
+        for bills, rejected, offset in read_chunks(fh, fieldnames, chunk_size, first_line=rows_done + 2):
+            rows_done += len(bills) + len(rejected)
+            billed += len(bills)
+            rejected_count += len(rejected)
+            sink.write(bills, rows_done, offset)
+            if progress:
+                for line_no, reason in rejected:
+                    print(f"  skipped input line {line_no}: {reason}", file=progress)
+                elapsed = time.perf_counter() - start
+                pct = 100.0 * offset / total_bytes if total_bytes else 100.0
+                print(f"{rows_done:>12,} rows  {pct:5.1f}%  {billed / elapsed if elapsed else 0:,.0f} rows/s",
+                      file=progress)
+
+    sink.finish()
+    elapsed = time.perf_counter() - start
+    stats = {
+        "rows": rows_done,
+        "billed": billed,
+        "rejected": rejected_count,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(billed / elapsed, 1) if elapsed else 0.0,
+    }
+    if progress:
+        print(f"done: {billed:,} billed, {rejected_count:,} rejected in {elapsed:.2f}s "
+              f"({stats['rows_per_sec']:,.0f} rows/s)", file=progress)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bill a CSV of meter readings without the GUI.")
+    parser.add_argument("input", help="CSV with columns account,name,address,type,month,kwh")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", help="write bills to this CSV file")
+    target.add_argument("--db", help="write bills to the BillDB table of this SQLite file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--resume", action="store_true", help="continue from the last checkpoint")
+    parser.add_argument("--quiet", action="store_true", help="only print the final stats")
+    args = parser.parse_args(argv)
+
+    if args.out:
+        sink = CsvSink(args.out, args.input, args.resume)
+    else:
+        sink = DbSink(args.db, args.input, args.resume)
+    stats = run(args.input, sink, args.chunk_size, progress=None if args.quiet else sys.stderr)
+    if args.quiet:
+        print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,36 @@
 ﻿from tkinter import *
 from tkinter import ttk
-from tkcalendar import DateEntry
-import pandas as pd
-from pdf_maker import generate_bill_pdf
 from tkinter import filedialog
+from tkinter import messagebox
+import math
 import os
 
+from billing import tiered, calculate_bill
+from ledger_writer import LedgerWriter
+from pdf_export import ExportQueue
+import metrics
 
-def tiered(u, tiers):
-    cost = 0
-    applied_rates = 0
-    for limits, rate in tiers:
-        if u <= 0:
-            break
-        use = min(u, limits)
-        cost += use * rate
-        applied_rates = rate
-        u -= use
-    return cost, applied_rates
-
-
-def calculate_bill(units, customer_type):
-    if customer_type == "residential":
-        tiers = [
-            (50, 5.0),
-            (50, 6.5),
-            (100, 8.0),
-            (float("inf"), 10.0),
-        ]
-        fixed = 40
-    else:
-        tiers = [
-            (100, 3.5),
-            (200, 5.0),
-            (500, 6.5),
-            (float("inf"), 7.5),
-        ]
-        fixed = 100
-
-    energy, applied_rates = tiered(units, tiers)
-    vat = energy * 0.12
-    env_fee = energy * 0.0025
-    total = energy + fixed + vat + env_fee
-    return round(energy, 2), round(fixed, 2), round(vat, 2), round(env_fee, 2), round(applied_rates, 2), round(total, 2)
-
-
-def open_main_app(parent=None, on_logout=None):
+
+def open_main_app(parent=None, on_logout=None, db_path=None):
     """
     Open the main electric bill calculator application.
     If parent is None, creates a root Tk and runs mainloop (standalone).
     If parent is provided, creates a Frame within parent (for use with account orchestrator).
     on_logout: callback function to call when logout button is clicked (only works in orchestrator mode).
+    db_path: if given, every generated bill is saved to the BillDB ledger in this database
+        (one bill per account and month; generating again replaces it).
     Returns the Frame containing the app.
     """
+    # Heavy imports are deferred so the login screen does not pay for them:
+    # tkcalendar until this screen is built, ReportLab until the first export renders.
+    from tkcalendar import DateEntry
+
     if parent is None:
         # Standalone mode: create root and own the event loop
         win = Tk()
         owns_root = True
         win.title("Electric Bill Calculator")
-        win.geometry("400x550")
+        win.geometry("400x720")
         frame = Frame(win)
         frame.pack(fill='both', expand=True)
     else:
@@ -106,6 +78,15 @@ def open_main_app(parent=None, on_logout=None):
     output_box.pack(pady=10)
 
     # Local callback functions
+    def read_units():
+        """kWh from the entry, or None unless it is a finite number."""
+        try:
+            units = float(units_entry.get())
+        except ValueError:
+            return None
+        return units if math.isfinite(units) else None
+
+    @metrics.timed("ui.generate_bill")
     def generate_bill():
         name = name_entry.get()
         account = acc_entry.get()
@@ -113,9 +94,8 @@ def open_main_app(parent=None, on_logout=None):
         customer_type = type_box.get().lower()
         billing_month = month_entry.get()
 
-        try:
-            units = float(units_entry.get())
-        except Exception:
+        units = read_units()
+        if units is None:
             output_box.config(state='normal')
             output_box.delete("1.0", END)
             output_box.insert(END, "Invalid kWh input.\n")
@@ -124,6 +104,25 @@ def open_main_app(parent=None, on_logout=None):
 
         energy, fixed, vat, env_fee, applied_rates, total = calculate_bill(units, customer_type)
 
+        if db_path:
+            bill = {
+                "name": name,
+                "account": account,
+                "address": address,
+                "type": customer_type,
+                "month": billing_month,
+                "kwh": units,
+                "rate": applied_rates,
+                "fixed": fixed,
+                "base": energy,
+                "env": env_fee,
+                "vat": vat,
+                "total": total
+            }
+            # saved on the ledger worker; generating again for the same
+            # account and month replaces the saved bill
+            ledger.save(bill, callback=bill_saved)
+
         # Display Output
         output_box.config(state='normal')
         output_box.delete("1.0", END)
@@ -145,6 +144,7 @@ def open_main_app(parent=None, on_logout=None):
         output_box.insert(END, "=" * 50 + "\n")
         output_box.config(state='disabled')
 
+    @metrics.timed("ui.download_pdf")
     def download_pdf():
         file = filedialog.asksaveasfilename(
             defaultextension=".pdf",
@@ -153,9 +153,8 @@ def open_main_app(parent=None, on_logout=None):
         if not file:
             return
 
-        try:
-            units = float(units_entry.get())
-        except Exception:
+        units = read_units()
+        if units is None:
             output_box.config(state='normal')
             output_box.insert(END, "\nInvalid kWh input for PDF.\n")
             output_box.config(state='disabled')
@@ -179,11 +178,71 @@ def open_main_app(parent=None, on_logout=None):
             "total": total
         }
 
-        generate_bill_pdf(data, file)
+        # Rendered on the export worker; the window stays usable meanwhile
+        exports.submit(data, file, callback=export_finished)
+
+    def bill_saved(bill, error):
+        if error is not None and frame.winfo_exists():
+            messagebox.showerror("Save Bill", f"Could not save the bill for account {bill['account']}:\n{error}")
+
+    def export_finished(job, error):
+        if not frame.winfo_exists():
+            return
+        if error is not None:
+            messagebox.showerror("PDF Export", f"Could not save {os.path.basename(job.path)}:\n{error}")
+
+    def show_export(job):
+        if not frame.winfo_exists():
+            return
+        label = f"#{job.id} {os.path.basename(job.path)} - {job.state}"
+        if job.id in export_ids:
+            index = export_ids.index(job.id)
+            export_list.delete(index)
+            export_list.insert(index, label)
+        else:
+            export_ids.append(job.id)
+            export_list.insert(END, label)
+        pending = exports.pending
+        rendering = sum(1 for j in pending if j.state == "rendering")
+        if pending:
+            export_status.config(text=f"PDF exports: {rendering} rendering, {len(pending) - rendering} queued")
+            export_progress.start(15)
+        else:
+            export_status.config(text="PDF exports: idle")
+            export_progress.stop()
+
+    def cancel_export():
+        selection = export_list.curselection()
+        if not selection:
+            return
+        job_id = export_ids[selection[0]]
+        for job in exports.jobs:
+            if job.id == job_id and not exports.cancel(job):
+                messagebox.showinfo("PDF Export", "That export has already started or finished.")
 
     # Buttons
     Button(frame, text="Generate Bill", command=generate_bill, bg="lightgreen").pack(pady=10)
     Button(frame, text="Download PDF", command=download_pdf).pack(pady=5)
+
+    # Background PDF exports
+    export_status = Label(frame, text="PDF exports: idle")
+    export_status.pack()
+    export_progress = ttk.Progressbar(frame, mode="indeterminate", length=200)
+    export_progress.pack(pady=2)
+    export_list = Listbox(frame, width=50, height=4)
+    export_list.pack()
+    export_ids = []  # job id of each list row
+    Button(frame, text="Cancel Selected Export", command=cancel_export).pack(pady=2)
+    exports = ExportQueue(frame, on_update=show_export)
+    ledger = LedgerWriter(frame, db_path) if db_path else None
+
+    def on_destroy(event):
+        if event.widget is frame:
+            exports.shutdown()
+            if ledger is not None:
+                ledger.shutdown()
+
+    frame.bind("<Destroy>", on_destroy)
     
     # Logout button (only shown in orchestrator mode)
     if not owns_root and callable(on_logout):
@@ -0,0 +1,191 @@
+"""import_accounts.py
+
+Bulk account import for onboarding a new franchise area.
+
+Reads a CSV with columns first_name, last_name, email, password
+(FirstName/LastName/Email/Password also work), validates each row,
+hashes passwords on a thread pool and inserts the accounts in large
+batches, one transaction per batch, with
+`db_utils.bulk_create_accounts`. Rows that fail validation or clash
+with an existing email are reported with their CSV line, not fatal.
+
+Imported passwords are hashed at the login default (passwords.iterations)
+unless a lower work factor is asked for: at 600,000 iterations a large
+import takes hours, so --fast-hash uses IMPORT_WORK_FACTOR instead.
+`db_utils.verify_user` sees a lower work factor through
+`passwords.needs_rehash` and re-hashes the password at full strength on
+the account's first login. The stats report how many imported accounts
+are below the login default ("below_default") until then.
+
+Usage:
+    python import_accounts.py customers.csv --db Database/AccountSystem.db --rejects rejects.csv
+    python import_accounts.py customers.csv --fast-hash
+"""
+import argparse
+import csv
+import itertools
+import json
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Database import db_utils, passwords
+
+DEFAULT_BATCH_SIZE = 10_000
+HASH_WORKERS = 4
+IMPORT_WORK_FACTOR = 10_000
+
+_FIELD_ALIASES = {
+    "first_name": "first", "firstname": "first", "first": "first",
+    "last_name": "last", "lastname": "last", "last": "last",
+    "email": "email",
+    "password": "password",
+}
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def validate(row):
+    """Return (first, last, email, password) or raise ValueError."""
+    first = (row.get("first") or "").strip()
+    last = (row.get("last") or "").strip()
+    email = (row.get("email") or "").strip()
+    password = row.get("password") or ""
+    if not (first and last and email and password):
+        raise ValueError("all fields are required")
+    if not _EMAIL_RE.match(email):
+        raise ValueError(f"invalid email {email!r}")
+    return first, last, email, password
+
+
+def _hash(account, rounds=None):
+    first, last, email, password = account
+    if not passwords.is_hashed(password):
+        password = passwords.hash_password(password, rounds)
+    return first, last, email, password
+
+
+def read_batches(fh, batch_size):
+    """Yield (accounts, lines, rejected) batches from an open CSV file.
+
+    lines[i] is the CSV line number of accounts[i].
+    """
+    reader = csv.DictReader(fh)
+    reader.fieldnames = [_FIELD_ALIASES.get(name.strip().lower(), name) for name in reader.fieldnames or []]
+    missing = {"first", "last", "email", "password"} - set(reader.fieldnames)
+    if missing:
+        raise SystemExit(f"input is missing columns: {', '.join(sorted(missing))}")
+
+    accounts, lines, rejected = [], [], []
+    for row in reader:
+        try:
+            accounts.append(validate(row))
+            lines.append(reader.line_num)
+        except ValueError as exc:
+            rejected.append((reader.line_num, row.get("email"), str(exc)))
+        if len(accounts) >= batch_size:
+            yield accounts, lines, rejected
+            accounts, lines, rejected = [], [], []
+    if accounts or rejected:
+        yield accounts, lines, rejected
+
+
+def import_accounts(input_path, db_path, batch_size=DEFAULT_BATCH_SIZE, hash_workers=HASH_WORKERS,
+                    on_reject=None, progress=sys.stderr, work_factor=None):
+    """Import every valid row of input_path into db_path. Returns a stats dict.
+
+    on_reject(line, email, reason) is called for every invalid or duplicate row.
+    work_factor: PBKDF2 iterations for the imported hashes, default
+    passwords.iterations (see module docstring)
+    """
+    inserted = duplicate = invalid = below_default = 0
+    hash_seconds = insert_seconds = 0.0
+    start = time.perf_counter()
+    with open(input_path, newline="", encoding="utf-8") as fh, \
+            ThreadPoolExecutor(max_workers=hash_workers) as pool, \
+            db_utils.connection(db_path) as conn:
+        for accounts, lines, rejected in read_batches(fh, batch_size):
+            invalid += len(rejected)
+            if on_reject:
+                for line, email, reason in rejected:
+                    on_reject(line, email, reason)
+
+            step = time.perf_counter()
+            hashed = list(pool.map(_hash, accounts, itertools.repeat(work_factor), chunksize=64))
+            hash_seconds += time.perf_counter() - step
+            step = time.perf_counter()
+            count, dupes = db_utils.bulk_create_accounts(conn, hashed)
+            insert_seconds += time.perf_counter() - step
+            inserted += count
+            duplicate += len(dupes)
+            # plaintext or pre-hashed input rows can be below the default too
+            skipped = {id(row) for row in dupes}
+            below_default += sum(1 for row in hashed
+                                 if id(row) not in skipped and passwords.needs_rehash(row[3]))
+            if on_reject:
+                # duplicates come back as the very tuples passed in
+                line_of = {id(row): line for row, line in zip(hashed, lines)}
+                for row in dupes:
+                    on_reject(line_of.get(id(row)), row[2], "email already registered")
+
+            if progress:
+                elapsed = time.perf_counter() - start
+                done = inserted + duplicate + invalid
+                print(f"{done:>12,} rows  {done / elapsed if elapsed else 0:,.0f} rows/s", file=progress)
+
+    elapsed = time.perf_counter() - start
+    rows = inserted + duplicate + invalid
+    return {
+        "rows": rows,
+        "inserted": inserted,
+        "duplicates": duplicate,
+        "invalid": invalid,
+        "below_default": below_default,
+        "seconds": round(elapsed, 3),
+        "hash_seconds": round(hash_seconds, 3),
+        "insert_seconds": round(insert_seconds, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-import customer accounts from a CSV file.")
+    parser.add_argument("input", help="CSV with columns first_name,last_name,email,password")
+    parser.add_argument("--db", default="Database/AccountSystem.db")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--hash-workers", type=int, default=HASH_WORKERS)
+    factor = parser.add_mutually_exclusive_group()
+    factor.add_argument("--work-factor", type=int, default=None,
+                        help="PBKDF2 iterations for the imported password hashes "
+                             "(default: the login default); lower ones are upgraded at first login")
+    factor.add_argument("--fast-hash", dest="work_factor", action="store_const", const=IMPORT_WORK_FACTOR,
+                        help=f"hash at {IMPORT_WORK_FACTOR:,} iterations to speed up large imports")
+    parser.add_argument("--rejects", help="write rejected rows to this CSV instead of stderr")
+    args = parser.parse_args(argv)
+
+    rejects_fh = open(args.rejects, "w", newline="", encoding="utf-8") if args.rejects else None
+    writer = csv.writer(rejects_fh) if rejects_fh else None
+    if writer:
+        writer.writerow(["line", "email", "reason"])
+
+    def on_reject(line, email, reason):
+        if writer:
+            writer.writerow([line, email, reason])
+        else:
+            where = f" (line {line})" if line else ""
+            print(f"  rejected {email!r}{where}: {reason}", file=sys.stderr)
+
+    try:
+        stats = import_accounts(args.input, args.db, args.batch_size, args.hash_workers, on_reject,
+                                work_factor=args.work_factor)
+    finally:
+        if rejects_fh:
+            rejects_fh.close()
+    print(json.dumps(stats))
+    if stats["below_default"]:
+        print(f"{stats['below_default']:,} imported accounts are hashed below the login default "
+              f"of {passwords.iterations:,} iterations until their first login", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
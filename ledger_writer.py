@@ -0,0 +1,75 @@
+"""ledger_writer.py
+
+Saves bills to the BillDB ledger off the Tk thread.
+
+Writes run one at a time on a single worker thread (SQLite has one
+writer anyway, and this keeps them in click order). Results are queued
+and delivered on the Tk thread by polling with after(), the same way
+auth_service and pdf_export do, so callbacks can touch widgets and show
+message boxes directly.
+"""
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from Database import bill_ledger, db_utils
+
+POLL_MS = 50
+
+
+class LedgerWriter:
+    """Bill writes for one Tk screen.
+
+    widget: any widget of the screen; its toplevel's after() delivers results
+    db_path: path to the sqlite database
+
+    save() takes `callback(bill, error)`, called on the Tk thread; error is
+    None on success, otherwise the exception raised by the worker.
+    """
+
+    def __init__(self, widget, db_path):
+        self.widget = widget.winfo_toplevel()
+        self.db_path = db_path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ledger")
+        self._results = queue.Queue()
+        self._pending = 0
+        self._polling = False
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    def save(self, bill, callback=None):
+        """Record one bill; a bill already saved for the same account and month is replaced."""
+        bill = dict(bill)
+
+        def run():
+            try:
+                with db_utils.connection(self.db_path) as conn:
+                    bill_ledger.record_bills(conn, [bill])
+                self._results.put((callback, bill, None))
+            except Exception as exc:
+                self._results.put((callback, bill, exc))
+
+        self._pending += 1
+        self._executor.submit(run)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(POLL_MS, self._poll)
+
+    def shutdown(self):
+        """Stop accepting work; writes already queued still complete."""
+        self._executor.shutdown(wait=False)
+
+    def _poll(self):
+        while True:
+            try:
+                callback, bill, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if callable(callback):
+                callback(bill, error)
+        if self._pending > 0:
+            self.widget.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
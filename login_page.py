@@ -2,9 +2,9 @@
 
 Modular login UI builder used by the main application.
 """
-from tkinter import Frame, Label, Button, Entry, PhotoImage, StringVar, messagebox, Toplevel
-import sqlite3
-from Database import db_utils
+from tkinter import Frame, Label, Button, Entry, StringVar, messagebox, Toplevel
+from auth_service import AuthService
+from asset_cache import get_image
 
 
 def build_login_frame(parent, db_path, on_login_success=None, on_show_register=None):
@@ -14,12 +14,13 @@ def build_login_frame(parent, db_path, on_login_success=None, on_show_register=N
     on_show_register: optional callable to show register screen
     """
     frame = Frame(parent, bg="#525561")
+    auth = AuthService(frame, db_path)
 
-    frame._backgroundImage = PhotoImage(file="assets/image_1.png")
+    frame._backgroundImage = get_image(frame, "image_1.png")
     bg_imageLogin = Label(frame, image=frame._backgroundImage, bg="#525561")
     bg_imageLogin.place(x=120, y=28)
 
-    frame._header_left = PhotoImage(file="assets/headerText_image.png")
+    frame._header_left = get_image(frame, "headerText_image.png")
     Label(bg_imageLogin, image=frame._header_left, bg="#272A37").place(x=60, y=45)
     Label(bg_imageLogin, text="Electric Bill Calculator", fg="#FFFFFF",
           font=("yu gothic ui bold", 20 * -1), bg="#272A37").place(x=110, y=45)
@@ -30,7 +31,7 @@ def build_login_frame(parent, db_path, on_login_success=None, on_show_register=N
     email_var = StringVar()
     pwd_var = StringVar()
 
-    frame._email_img = PhotoImage(file="assets/email.png")
+    frame._email_img = get_image(frame, "email.png")
     email_container = Label(bg_imageLogin, image=frame._email_img, bg="#272A37")
     email_container.place(x=76, y=242)
     Label(email_container, text="Email account", fg="#FFFFFF",
@@ -38,7 +39,7 @@ def build_login_frame(parent, db_path, on_login_success=None, on_show_register=N
     Entry(email_container, bd=0, bg="#3D404B", highlightthickness=0, font=("yu gothic ui SemiBold", 16 * -1),
           textvariable=email_var).place(x=8, y=17, width=354, height=27)
 
-    frame._pwd_img = PhotoImage(file="assets/email.png")
+    frame._pwd_img = get_image(frame, "email.png")
     pwd_container = Label(bg_imageLogin, image=frame._pwd_img, bg="#272A37")
     pwd_container.place(x=80, y=330)
     Label(pwd_container, text="Password", fg="#FFFFFF", font=("yu gothic ui SemiBold", 13 * -1),
@@ -46,16 +47,23 @@ def build_login_frame(parent, db_path, on_login_success=None, on_show_register=N
     Entry(pwd_container, bd=0, bg="#3D404B", highlightthickness=0, font=("yu gothic ui SemiBold", 16 * -1),
           textvariable=pwd_var, show='•').place(x=8, y=17, width=354, height=27)
 
-    frame._submit_img = PhotoImage(file="assets/button_1.png")
+    frame._submit_img = get_image(frame, "button_1.png")
 
     def login():
         if not (email_var.get().strip() and pwd_var.get()):
             messagebox.showinfo("Failed", "Please enter email and password")
             return
-        conn = sqlite3.connect(db_path)
-        ok = db_utils.verify_user(conn, email_var.get().strip(), pwd_var.get())
-        conn.close()
-        if ok:
+        if auth.busy:
+            return
+        # password hashing runs on a worker; on_verified is called back on the Tk thread
+        Login_button_1.config(state="disabled", cursor="watch")
+        auth.verify(email_var.get().strip(), pwd_var.get(), on_verified)
+
+    def on_verified(ok, error):
+        Login_button_1.config(state="normal", cursor="hand2")
+        if error is not None:
+            messagebox.showerror("Error", "Something went wrong, please try again :(")
+        elif ok:
             messagebox.showinfo("Success", "Logged in Successfully :)")
             if callable(on_login_success):
                 on_login_success()
@@ -93,14 +101,17 @@ def build_login_frame(parent, db_path, on_login_success=None, on_show_register=N
             if not email_entry3.get().strip() or not new_password_entry.get():
                 messagebox.showerror("Error", "All Fields are required")
                 return
-            conn = sqlite3.connect(db_path)
-            exists = db_utils.user_exists(conn, email_entry3.get().strip())
-            if not exists:
+            if auth.busy:
+                return
+            auth.change_password(email_entry3.get().strip(), new_password_entry.get(), on_changed)
+
+        def on_changed(changed, error):
+            if error is not None:
+                messagebox.showerror("Error", "Something went wrong, please try again :(")
+                return
+            if not changed:
                 messagebox.showerror("Error", "Email does not exist")
-                conn.close()
                 return
-            db_utils.update_password(conn, email_entry3.get().strip(), new_password_entry.get())
-            conn.close()
             messagebox.showinfo('Confirmed', "Password changed successfully :)")
             win.destroy()
 
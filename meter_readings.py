@@ -0,0 +1,337 @@
+"""meter_readings.py
+
+Fixed-width binary meter readings (.mrd) and a CSV converter.
+
+Layout (all little-endian):
+
+    header   64 bytes  magic "MTRREAD1", version, record size, record count,
+                       account count and width, grid shape, table offsets
+    records  16 bytes each: account index (u4), interval start in UTC
+             epoch seconds (u4), kWh (f8)
+    accounts account_count fixed-width ASCII account numbers
+
+`open_readings` memory-maps the file: every column is a NumPy view of
+the mapping, nothing is parsed or copied, and billing workers that open
+the same file share the operating system's page cache. When the file
+holds a regular grid (every account has the same run of timestamps, in
+order) the readings can be viewed as a (meters, intervals) array and
+passed straight to `time_of_use.interval_bills`; any file can be
+reduced to monthly totals for `batch_billing.calculate_bills`, and
+`bill_readings` picks the right time-of-use path.
+
+Timestamps are stored as UTC. Integer epoch seconds in the CSV are UTC
+already, ISO timestamps with "Z" or an explicit offset are converted,
+and naive ISO timestamps are taken as local time at the converter's UTC
+offset (by default the time-of-use schedule's, UTC+8). The schedule
+shifts them back to its local clock when it assigns periods.
+
+    python meter_readings.py convert readings.csv readings.mrd [--utc-offset 8]
+    python meter_readings.py info readings.mrd
+"""
+import argparse
+import csv
+import itertools
+import os
+import struct
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from time_of_use import get_schedule, interval_bills, reading_bills
+
+MAGIC = b"MTRREAD1"
+VERSION = 2  # version 1 stored naive ISO timestamps as local wall time
+HEADER_SIZE = 64
+# magic, version, record size, account width, record count, account count,
+# grid meters, grid intervals, records offset, accounts offset
+_HEADER = struct.Struct("<8sHHHxxQIIIxxxxQQ")
+RECORD_DTYPE = np.dtype([("account", "<u4"), ("timestamp", "<u4"), ("kwh", "<f8")])
+DEFAULT_ACCOUNT_WIDTH = 16
+DEFAULT_BLOCK_SIZE = 65_536
+INPUT_FIELDS = ("account", "timestamp", "kwh")
+
+
+class _GridCheck:
+    """Tracks, block by block, whether records form a regular account x time grid.
+
+    Accounts are numbered in order of first appearance, so a grid means
+    record r belongs to account r // T and has the r % T-th timestamp of
+    account 0, where T (the interval count) is the length of account 0's
+    run and its timestamps are strictly increasing.
+    """
+
+    def __init__(self):
+        self.regular = True
+        self.seen = 0
+        self.lead = []
+        self.clock = None
+
+    def _fix_clock(self):
+        clock = np.concatenate(self.lead) if self.lead else np.empty(0, np.uint32)
+        self.regular = clock.size > 0 and bool((np.diff(clock.astype(np.int64)) > 0).all())
+        self.clock = clock
+
+    def feed(self, accounts, timestamps):
+        if not self.regular:
+            return
+        if self.clock is None:
+            others = np.flatnonzero(accounts)
+            end = others[0] if others.size else len(accounts)
+            self.lead.append(timestamps[:end].copy())
+            if end == len(accounts):
+                self.seen += len(accounts)
+                return
+            self._fix_clock()
+            if not self.regular:
+                return
+        intervals = len(self.clock)
+        r = np.arange(self.seen, self.seen + len(accounts))
+        self.regular = bool((accounts == r // intervals).all() and (timestamps == self.clock[r % intervals]).all())
+        self.seen += len(accounts)
+
+    def shape(self):
+        """(meters, intervals) if the stream was a complete grid, else (0, 0)."""
+        if self.clock is None and self.regular:
+            self._fix_clock()
+        if not self.regular or self.seen % len(self.clock):
+            return 0, 0
+        return self.seen // len(self.clock), len(self.clock)
+
+
+def _parse_iso(value, local):
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=local)
+    return int(moment.timestamp())
+
+
+def _epoch_seconds(values, utc_offset=0):
+    """UTC epoch seconds (u4) from ISO timestamps or integer epoch strings.
+
+    utc_offset: seconds east of UTC of naive ISO timestamps. Readings
+    repeat the same interval starts for every meter, so only the distinct
+    strings of a block are parsed.
+    """
+    distinct = list(dict.fromkeys(values))
+    stripped = [value.strip() for value in distinct]
+    epoch = [value.isdigit() for value in stripped]
+    if all(epoch):
+        seconds = np.array(stripped, dtype=np.int64)
+    elif any(epoch):
+        raise ValueError("timestamps mix epoch seconds and ISO dates")
+    else:
+        local = timezone(timedelta(seconds=utc_offset))
+        try:
+            seconds = np.array([_parse_iso(value, local) for value in stripped], dtype=np.int64)
+        except ValueError as exc:
+            raise ValueError(f"bad timestamp: {exc}") from None
+    if seconds.size and (seconds.min() < 0 or seconds.max() > np.iinfo(np.uint32).max):
+        raise ValueError("timestamps must fall between 1970 and 2106")
+    lookup = dict(zip(distinct, seconds.tolist()))
+    return np.fromiter(map(lookup.__getitem__, values), dtype=np.uint32, count=len(values))
+
+
+def _kwh(values):
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        # blank cells are missing readings
+        return np.array([value.strip() or "nan" for value in values], dtype=np.float64)
+
+
+def convert_csv(csv_path, out_path, account_width=DEFAULT_ACCOUNT_WIDTH, block_size=DEFAULT_BLOCK_SIZE,
+                progress=None, utc_offset_hours=None):
+    """Stream a CSV with account, timestamp, kwh columns into an .mrd file.
+
+    Rows are read and written block_size at a time, so memory stays flat
+    whatever the input size. utc_offset_hours is the clock of naive ISO
+    timestamps (default: the time-of-use schedule's). Returns a dict with
+    records, accounts, and the grid shape (0, 0 if the readings are not a
+    regular grid).
+    """
+    if utc_offset_hours is None:
+        utc_offset = get_schedule().utc_offset
+    else:
+        utc_offset = round(utc_offset_hours * 3600)
+    accounts = {}   # account number -> index, in order of first appearance
+    codes = {}      # raw CSV cell -> index
+    grid = _GridCheck()
+    records = 0
+    start = time.perf_counter()
+    tmp_path = out_path + ".part"
+    try:
+        with open(csv_path, newline="", encoding="utf-8") as src, open(tmp_path, "wb") as out:
+            reader = csv.reader(src)
+            header = [name.strip().lower() for name in next(reader)]
+            missing = set(INPUT_FIELDS) - set(header)
+            if missing:
+                raise SystemExit(f"input is missing columns: {', '.join(sorted(missing))}")
+            col_account, col_ts, col_kwh = (header.index(name) for name in INPUT_FIELDS)
+            out.write(b"\0" * HEADER_SIZE)
+
+            while True:
+                # columns are collected as flat lists of str: keeping whole rows
+                # alive makes the cyclic GC rescan every one of them per block
+                account_col, ts_col, kwh_col = [], [], []
+                try:
+                    for row in itertools.islice(reader, block_size):
+                        if row:
+                            account_col.append(row[col_account])
+                            ts_col.append(row[col_ts])
+                            kwh_col.append(row[col_kwh])
+                except IndexError:
+                    raise ValueError(f"line {reader.line_num}: missing columns") from None
+                if not account_col:
+                    break
+                for raw in dict.fromkeys(account_col):
+                    if raw not in codes:
+                        account = raw.strip()
+                        code = accounts.get(account)
+                        if code is None:
+                            if len(account.encode("ascii")) > account_width:
+                                raise ValueError(f"account {account!r} is longer than {account_width} characters")
+                            code = accounts[account] = len(accounts)
+                        codes[raw] = code
+                block = np.empty(len(account_col), dtype=RECORD_DTYPE)
+                block["account"] = np.fromiter(map(codes.__getitem__, account_col), dtype=np.uint32,
+                                               count=len(account_col))
+                block["timestamp"] = _epoch_seconds(ts_col, utc_offset)
+                block["kwh"] = _kwh(kwh_col)
+                grid.feed(block["account"], block["timestamp"])
+                out.write(block.tobytes())
+                records += len(block)
+                if progress:
+                    print(f"\r{records:,} readings, {time.perf_counter() - start:.1f}s", end="", file=progress)
+
+            accounts_offset = HEADER_SIZE + records * RECORD_DTYPE.itemsize
+            out.write(np.array(list(accounts), dtype=f"S{account_width}").tobytes())
+            meters, intervals = grid.shape()
+            out.seek(0)
+            out.write(_HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, account_width, records, len(accounts),
+                                   meters, intervals, HEADER_SIZE, accounts_offset))
+    except BaseException:
+        # never leave a half-written file behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, out_path)
+    if progress:
+        print(file=progress)
+    return {"records": records, "accounts": len(accounts), "grid": (meters, intervals)}
+
+
+class MeterReadings:
+    """Memory-mapped view of an .mrd file. Columns are read-only views, not copies."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fh:
+            raw = fh.read(_HEADER.size)
+        if len(raw) < _HEADER.size or raw[:8] != MAGIC:
+            raise ValueError(f"{path} is not a meter readings file")
+        (_, version, record_size, account_width, self.record_count, self.account_count,
+         self.meters, self.intervals, records_offset, accounts_offset) = _HEADER.unpack(raw)
+        if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path}: unsupported format version {version}; convert the CSV again")
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=records_offset,
+                                 shape=(self.record_count,)) if self.record_count else np.empty(0, RECORD_DTYPE)
+        self.accounts = np.memmap(path, dtype=f"S{account_width}", mode="r", offset=accounts_offset,
+                                  shape=(self.account_count,)) if self.account_count else np.empty(0, "S1")
+
+    @property
+    def account_index(self):
+        return self.records["account"]
+
+    @property
+    def timestamps(self):
+        """Interval start of every record, UTC epoch seconds (u4)."""
+        return self.records["timestamp"]
+
+    @property
+    def kwh(self):
+        return self.records["kwh"]
+
+    @property
+    def is_grid(self):
+        return self.meters > 0
+
+    def grid(self):
+        """(kwh (meters, intervals), timestamps (intervals,)) views for a regular grid.
+
+        Account i of `accounts` is row i. Raises ValueError for a ragged file.
+        """
+        if not self.is_grid:
+            raise ValueError(f"{self.path} is not a regular account x interval grid")
+        kwh = self.kwh.reshape(self.meters, self.intervals)
+        return kwh, self.timestamps[:self.intervals]
+
+    def account_numbers(self):
+        return [account.decode("ascii") for account in self.accounts]
+
+    def totals(self, chunk_size=DEFAULT_BLOCK_SIZE * 64):
+        """kWh per account (accounts order), summed chunk by chunk; missing readings count as 0."""
+        totals = np.zeros(self.account_count, dtype=np.float64)
+        for start in range(0, self.record_count, chunk_size):
+            chunk = self.records[start:start + chunk_size]
+            totals += np.bincount(chunk["account"], weights=np.nan_to_num(chunk["kwh"]),
+                                  minlength=self.account_count)
+        return totals
+
+
+def open_readings(path):
+    return MeterReadings(path)
+
+
+def bill_readings(readings, customer_types, schedule=None, source=None):
+    """Time-of-use bills for every account of a MeterReadings, straight from the mapping.
+
+    customer_types: one type per account in `readings.accounts` order, or
+    a {account number: type} mapping (unknown accounts get the default
+    tariff class). Grid files go through `time_of_use.interval_bills`,
+    anything else through `time_of_use.reading_bills`; both return
+    (energy, fixed, vat, env_fee, applied_rates, total, kwh_by_period).
+    """
+    if isinstance(customer_types, dict):
+        customer_types = [customer_types.get(account, "") for account in readings.account_numbers()]
+    customer_types = np.asarray([str(t).strip().lower() for t in customer_types])
+    if readings.is_grid:
+        kwh, timestamps = readings.grid()
+        return interval_bills(kwh, timestamps, customer_types, schedule, source)
+    return reading_bills(readings.account_index, readings.timestamps, readings.kwh, customer_types,
+                         schedule, source)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert and inspect binary meter-reading files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="CSV (account, timestamp, kwh) -> .mrd")
+    convert.add_argument("input")
+    convert.add_argument("output")
+    convert.add_argument("--account-width", type=int, default=DEFAULT_ACCOUNT_WIDTH)
+    convert.add_argument("--utc-offset", type=float, default=None,
+                         help="UTC offset in hours of timestamps without one (default: the tariff schedule's)")
+    convert.add_argument("--quiet", action="store_true")
+    info = sub.add_parser("info", help="print the header of an .mrd file")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        start = time.perf_counter()
+        stats = convert_csv(args.input, args.output, args.account_width,
+                            progress=None if args.quiet else sys.stderr, utc_offset_hours=args.utc_offset)
+        meters, intervals = stats["grid"]
+        shape = f"grid {meters:,} x {intervals:,}" if meters else "ragged"
+        print(f"{stats['records']:,} readings, {stats['accounts']:,} accounts ({shape}) "
+              f"in {time.perf_counter() - start:.1f}s -> {args.output}")
+    else:
+        readings = open_readings(args.path)
+        shape = f"grid {readings.meters:,} x {readings.intervals:,}" if readings.is_grid else "ragged"
+        print(f"{args.path}: {readings.record_count:,} readings, {readings.account_count:,} accounts, {shape}")
+
+
+if __name__ == "__main__":
+    main()
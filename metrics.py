@@ -0,0 +1,196 @@
+"""metrics.py
+
+Lightweight hot-path instrumentation, off by default.
+
+Functions wrapped with @timed(name) record call counts, errors and a
+latency histogram while metrics are enabled; when disabled the wrapper
+costs one global lookup. Histograms can be dumped periodically to a
+Prometheus text-format file (for node_exporter's textfile collector) or
+to JSON.
+
+Enable from the environment before starting the app:
+    ELECTRIC_BILL_METRICS=/var/lib/node_exporter/textfile/electric_bill.prom
+    ELECTRIC_BILL_METRICS_INTERVAL=15   (seconds, optional)
+or in code with enable() and start_exporter(path).
+"""
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds; an implicit +Inf bucket follows.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_NAME = "electric_bill_call_duration_seconds"
+
+_enabled = False
+_histograms = {}
+_registry_lock = threading.Lock()
+_exporter = None
+
+
+class Histogram:
+    __slots__ = ("name", "counts", "total", "errors", "lock")
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds, failed=False):
+        i = bisect_left(BUCKETS, seconds)
+        with self.lock:
+            self.counts[i] += 1
+            self.total += seconds
+            if failed:
+                self.errors += 1
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.total, self.errors
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _registry_lock:
+        _histograms.clear()
+
+
+def histogram(name):
+    hist = _histograms.get(name)
+    if hist is None:
+        with _registry_lock:
+            hist = _histograms.setdefault(name, Histogram(name))
+    return hist
+
+
+def timed(name):
+    """Decorator recording the latency of every call under `name`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                histogram(name).observe(time.perf_counter() - start, failed)
+        return wrapper
+    return decorate
+
+
+def to_dict():
+    """All histograms as plain data: {name: {count, sum, errors, buckets}}."""
+    data = {}
+    for name, hist in sorted(_histograms.items()):
+        counts, total, errors = hist.snapshot()
+        data[name] = {
+            "count": sum(counts),
+            "sum": total,
+            "errors": errors,
+            "buckets": {str(le): c for le, c in zip(BUCKETS + ("+Inf",), counts)},
+        }
+    return data
+
+
+def to_prometheus():
+    """All histograms in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {METRIC_NAME} Latency of instrumented Electric Bill calls.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    errors = []
+    for name, hist in sorted(_histograms.items()):
+        counts, total, failed = hist.snapshot()
+        label = f'fn="{name}"'
+        cumulative = 0
+        for le, count in zip(BUCKETS + ("+Inf",), counts):
+            cumulative += count
+            lines.append(f'{METRIC_NAME}_bucket{{{label},le="{le}"}} {cumulative}')
+        lines.append(f"{METRIC_NAME}_sum{{{label}}} {total:.6f}")
+        lines.append(f"{METRIC_NAME}_count{{{label}}} {cumulative}")
+        errors.append(f"electric_bill_call_errors_total{{{label}}} {failed}")
+    if errors:
+        lines.append("# HELP electric_bill_call_errors_total Instrumented calls that raised.")
+        lines.append("# TYPE electric_bill_call_errors_total counter")
+        lines.extend(errors)
+    return "\n".join(lines) + "\n"
+
+
+def dump(path):
+    """Write the metrics to path atomically; .json gets JSON, anything else Prometheus text."""
+    if path.endswith(".json"):
+        text = json.dumps({"time": time.time(), "metrics": to_dict()}, indent=2)
+    else:
+        text = to_prometheus()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+class _Exporter(threading.Thread):
+    def __init__(self, path, interval):
+        super().__init__(name="metrics-exporter", daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self._dump()
+        self._dump()
+
+    def _dump(self):
+        # a full disk or a missing directory must not kill the exporter or stop_exporter()
+        try:
+            dump(self.path)
+        except OSError:
+            pass
+
+
+def start_exporter(path, interval=15.0):
+    """Enable metrics and dump them to path every `interval` seconds."""
+    global _exporter
+    stop_exporter()
+    enable()
+    _exporter = _Exporter(path, interval)
+    _exporter.start()
+    return _exporter
+
+
+def stop_exporter():
+    """Stop the exporter thread after a final dump."""
+    global _exporter
+    if _exporter is not None:
+        _exporter.stopped.set()
+        _exporter.join()
+        _exporter = None
+
+
+def configure_from_env():
+    """Start the exporter if ELECTRIC_BILL_METRICS names an output file."""
+    path = os.environ.get("ELECTRIC_BILL_METRICS")
+    if path:
+        start_exporter(path, float(os.environ.get("ELECTRIC_BILL_METRICS_INTERVAL", "15")))
+    return path
@@ -0,0 +1,247 @@
+"""money.py
+
+Exact fixed-point bill engine using integer centavos.
+
+Floats drift by a centavo on some inputs and Decimal is slow on bulk
+runs, so this engine does all money math in Python/NumPy integers:
+
+- kWh are scaled to integer milli-kWh (3 decimal places), rounded
+  half-up on the reading's decimal value (49.9995 -> 50.000)
+- tier rates are scaled to integer milli-centavos per kWh
+- VAT and environmental-fee rates are scaled to parts per million
+
+Rounding rules (all half-up, to the centavo):
+1. energy = exact tier cost, rounded once
+2. vat = energy * VAT rate, rounded
+3. env_fee = energy * environmental-fee rate, rounded
+4. total = energy + fixed + vat + env_fee, so the printed lines always
+   add up to the total
+
+`bill_cents` is exact for any reading (Python ints). `bills_cents` does
+int64 arithmetic up to each tariff's `batch_limit` (tens of millions of
+kWh) and bills larger readings with the scalar path, so both always
+agree. Rates come from the compiled schedules in `tariffs`.
+
+`billing.calculate_bill`, `batch_billing.calculate_bills` and time-of-use
+billing all bill through this engine and convert to pesos only at the
+end (`bill_pesos`).
+"""
+import math
+import threading
+from bisect import bisect_left
+from decimal import ROUND_HALF_UP, Decimal
+
+from tariffs import get_tariffs
+
+KWH_SCALE = 1_000          # milli-kWh
+RATE_SCALE = 100_000       # milli-centavos per peso
+PPM = 1_000_000            # parts per million for VAT / env fee
+ENERGY_DIVISOR = KWH_SCALE * RATE_SCALE // 100  # exact energy units per centavo
+_MILLI = Decimal("0.001")
+_TIE_TOLERANCE = 1e-9  # relative; scaled readings this close to .5 are rounded in Decimal
+_INT64_MAX = (1 << 63) - 1
+
+
+def _half_up(value, divisor):
+    """Round value / divisor half-up; value must be non-negative."""
+    return (value + divisor // 2) // divisor
+
+
+def to_milli_kwh(units):
+    """kWh to integer milli-kWh, rounded half-up on the decimal value of units.
+
+    units * KWH_SCALE is only off by float error, so it decides unless it
+    lies within that error of a half, e.g. 2.0015 (2001.4999999999998).
+    Those go through Decimal(str(units)), the value as written.
+    """
+    if not math.isfinite(units):
+        raise ValueError("kWh must be a finite number")
+    scaled = units * KWH_SCALE
+    low = math.floor(scaled)
+    if abs(scaled - low - 0.5) > _TIE_TOLERANCE * max(1.0, abs(scaled)):
+        return low + (scaled - low > 0.5)
+    return int(Decimal(str(units)).quantize(_MILLI, rounding=ROUND_HALF_UP) * KWH_SCALE)
+
+
+def _milli_kwh_batch(np, units):
+    """Array version of to_milli_kwh."""
+    scaled = units * KWH_SCALE
+    low = np.floor(scaled)
+    milli = (low + (scaled - low > 0.5)).astype(np.int64)
+    near_tie = np.abs(scaled - low - 0.5) <= _TIE_TOLERANCE * np.maximum(1.0, np.abs(scaled))
+    if near_tie.any():
+        idx = np.flatnonzero(near_tie)
+        milli[idx] = [to_milli_kwh(float(v)) for v in units[idx]]
+    return milli
+
+
+def to_pesos(centavos):
+    """Convert integer centavos to a float peso amount for display."""
+    return centavos / 100
+
+
+def bill_pesos(bill):
+    """A bill_cents / bills_cents result in pesos: the `billing.calculate_bill` 6-tuple.
+
+    Works on scalars and on arrays alike.
+    """
+    energy, fixed, vat, env_fee, applied_rate, total = bill
+    return energy / 100, fixed / 100, vat / 100, env_fee / 100, applied_rate / RATE_SCALE, total / 100
+
+
+def _energy_cents(exact, factor):
+    # factor weights the energy charge (time-of-use); 1 keeps it exact
+    if factor == 1:
+        return _half_up(exact, ENERGY_DIVISOR)
+    return math.floor(exact * factor / ENERGY_DIVISOR + 0.5)
+
+
+class CentTariff:
+    """Integer version of a compiled `tariffs.Tariff`."""
+
+    __slots__ = ("name", "upper_bounds", "lower_bounds", "base_costs", "rates",
+                 "fixed", "vat_ppm", "env_fee_ppm", "batch_limit")
+
+    def __init__(self, tariff):
+        self.name = tariff.name
+        inf = float("inf")
+        self.upper_bounds = [b if b == inf else to_milli_kwh(b) for b in tariff.upper_bounds]
+        self.lower_bounds = [to_milli_kwh(b) for b in tariff.lower_bounds]
+        self.rates = [int(round(rate * RATE_SCALE)) for rate in tariff.rates]
+        # exact cost (milli-kWh * milli-centavos) of every tier before tier i
+        self.base_costs = [0]
+        for i, rate in enumerate(self.rates):
+            upper = self.upper_bounds[i]
+            full = 0 if upper == inf else (upper - self.lower_bounds[i]) * rate
+            self.base_costs.append(self.base_costs[-1] + full)
+        self.fixed = int(round(tariff.fixed * 100))
+        self.vat_ppm = int(round(tariff.vat_rate * PPM))
+        self.env_fee_ppm = int(round(tariff.env_fee_rate * PPM))
+        # largest milli-kWh whose exact cost and VAT / fee products fit in int64
+        # (every tier costs at most max_rate per milli-kWh), with a 2x margin
+        max_rate = max(max(self.rates), 1)
+        max_ppm = max(self.vat_ppm, self.env_fee_ppm, 1)
+        self.batch_limit = min(_INT64_MAX // max_rate,
+                               (_INT64_MAX // max_ppm - 1) * ENERGY_DIVISOR // max_rate) // 2
+
+    def energy_exact(self, milli_kwh):
+        """Return (exact energy cost, applied rate in milli-centavos/kWh)."""
+        if milli_kwh <= 0:
+            return 0, 0
+        i = bisect_left(self.upper_bounds, milli_kwh)
+        if i == len(self.rates):
+            return self.base_costs[i], self.rates[-1]
+        return self.base_costs[i] + (milli_kwh - self.lower_bounds[i]) * self.rates[i], self.rates[i]
+
+    def bill(self, units, factor=1):
+        """Return (energy, fixed, vat, env_fee, applied_rate, total).
+
+        Money values are integer centavos; applied_rate is in
+        milli-centavos per kWh (divide by RATE_SCALE for pesos). factor
+        scales the energy charge before it is rounded (time-of-use).
+        """
+        exact, applied_rate = self.energy_exact(to_milli_kwh(units))
+        energy = _energy_cents(exact, factor)
+        vat = _half_up(energy * self.vat_ppm, PPM)
+        env_fee = _half_up(energy * self.env_fee_ppm, PPM)
+        return energy, self.fixed, vat, env_fee, applied_rate, energy + self.fixed + vat + env_fee
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def get_cent_tariffs(source=None):
+    """Return ({customer_type: CentTariff}, default_class), rebuilt when the tariffs reload."""
+    book = get_tariffs(source)
+    entry = _compiled.get(source)
+    if entry is None or entry[0] is not book:
+        with _compiled_lock:
+            entry = (book, {t.name: CentTariff(t) for t in book}, book.default_class)
+            _compiled[source] = entry
+    return entry[1], entry[2]
+
+
+def bill_cents(units, customer_type, source=None, factor=1):
+    """Scalar API: bill one reading in integer centavos (see CentTariff.bill)."""
+    tariffs, default_class = get_cent_tariffs(source)
+    tariff = tariffs.get(customer_type) or tariffs[default_class]
+    return tariff.bill(units, factor)
+
+
+def bills_cents(units, customer_types, source=None, factor=None):
+    """Batch API: bill NumPy arrays of readings in integer centavos.
+
+    factor: optional per-reading weight of the energy charge (time-of-use).
+    Returns int64 arrays (energy, fixed, vat, env_fee, applied_rate, total)
+    with the same units and rounding as bill_cents. Readings above a
+    tariff's batch_limit are billed with the scalar path; OverflowError
+    if a result does not fit in int64.
+    """
+    import numpy as np
+
+    units = np.asarray(units, dtype=np.float64)
+    customer_types = np.asarray(customer_types)
+    if customer_types.shape != units.shape:
+        raise ValueError("units and customer_types must have the same shape")
+    if not np.isfinite(units).all():
+        raise ValueError("kWh must be finite numbers")
+
+    tariffs, default_class = get_cent_tariffs(source)
+    large = np.abs(units) * KWH_SCALE > min(t.batch_limit for t in tariffs.values())
+    milli = _milli_kwh_batch(np, np.where(large, 0.0, units))
+    exact = np.zeros(units.shape, dtype=np.int64)
+    rate = np.zeros(units.shape, dtype=np.int64)
+    fixed = np.zeros(units.shape, dtype=np.int64)
+    vat_ppm = np.zeros(units.shape, dtype=np.int64)
+    env_ppm = np.zeros(units.shape, dtype=np.int64)
+
+    unmatched = np.ones(units.shape, dtype=bool)
+    for name, tariff in tariffs.items():
+        if name == default_class:
+            continue
+        mask = customer_types == name
+        if mask.any():
+            unmatched &= ~mask
+            _fill(np, mask, milli, tariff, exact, rate, fixed, vat_ppm, env_ppm)
+    if unmatched.any():
+        _fill(np, unmatched, milli, tariffs[default_class], exact, rate, fixed, vat_ppm, env_ppm)
+
+    energy = (exact + ENERGY_DIVISOR // 2) // ENERGY_DIVISOR
+    if factor is not None:
+        factor = np.broadcast_to(np.asarray(factor, dtype=np.float64), units.shape)
+        weighted = factor != 1
+        energy[weighted] = np.floor(exact[weighted] * factor[weighted] / ENERGY_DIVISOR + 0.5)
+    vat = (energy * vat_ppm + PPM // 2) // PPM
+    env_fee = (energy * env_ppm + PPM // 2) // PPM
+    columns = (energy, fixed, vat, env_fee, rate, energy + fixed + vat + env_fee)
+    for i in np.flatnonzero(large):
+        tariff = tariffs.get(str(customer_types[i])) or tariffs[default_class]
+        row = tariff.bill(float(units[i]), 1 if factor is None else float(factor[i]))
+        for column, value in zip(columns, row):
+            column[i] = value  # OverflowError past int64
+    return columns
+
+
+def _fill(np, mask, milli, tariff, exact, rate, fixed, vat_ppm, env_ppm):
+    m = milli[mask]
+    upper = np.array([np.iinfo(np.int64).max if b == float("inf") else b for b in tariff.upper_bounds],
+                     dtype=np.int64)
+    lower = np.array(tariff.lower_bounds, dtype=np.int64)
+    rates = np.array(tariff.rates, dtype=np.int64)
+    base = np.array(tariff.base_costs, dtype=np.int64)
+
+    i = np.searchsorted(upper, m, side="left")
+    capped = i == len(rates)
+    tier = np.minimum(i, len(rates) - 1)
+    cost = np.where(capped, base[i], base[tier] + (m - lower[tier]) * rates[tier])
+    applied = rates[tier]
+    idle = m <= 0
+    cost[idle] = 0
+    applied[idle] = 0
+
+    exact[mask] = cost
+    rate[mask] = applied
+    fixed[mask] = tariff.fixed
+    vat_ppm[mask] = tariff.vat_ppm
+    env_ppm[mask] = tariff.env_fee_ppm
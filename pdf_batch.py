@@ -0,0 +1,170 @@
+"""pdf_batch.py
+
+Parallel month-end statement run: renders one PDF per bill with
+`pdf_maker.generate_bill_pdf`, sharding the bills across a process pool.
+
+Each bill is retried in its worker before it is reported as failed, and
+a manifest (manifest.json in the output directory) records every file
+written, how many attempts it took and how long it took to render.
+Files are named <account>_<YYYY-MM>.pdf; a bill repeated for the same
+account and month in one run gets a _2, _3, ... suffix instead of
+overwriting the first one's file.
+
+Usage:
+    python pdf_batch.py bills.csv statements/ --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from Database.bill_ledger import normalize_month
+
+DEFAULT_SHARD_SIZE = 50
+DEFAULT_RETRIES = 2
+
+
+def pdf_name(bill, seen=None):
+    """File name for a bill's statement: account number and normalized billing month.
+
+    seen: dict shared across one run; counts the names handed out so far
+    and adds a _2, _3, ... suffix when an (account, month) repeats.
+    """
+    stem = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{bill['account']}_{normalize_month(bill.get('month', ''))}")
+    if seen is not None:
+        count = seen[stem] = seen.get(stem, 0) + 1
+        if count > 1:
+            stem = f"{stem}_{count}"
+    return stem + ".pdf"
+
+
+def _named(bills):
+    # names are handed out here in the parent, so repeats are caught across shards
+    seen = {}
+    for bill in bills:
+        yield bill, pdf_name(bill, seen)
+
+
+def _render_shard(named_bills, out_dir, retries):
+    # runs in a worker process; import here so the parent stays light
+    from pdf_maker import generate_bill_pdf
+
+    results = []
+    for bill, name in named_bills:
+        path = os.path.join(out_dir, name)
+        entry = {"account": bill.get("account"), "month": bill.get("month"), "file": path, "attempts": 0}
+        start = time.perf_counter()
+        for attempt in range(1, retries + 2):
+            entry["attempts"] = attempt
+            try:
+                generate_bill_pdf(bill, path)
+            except Exception as exc:
+                entry["status"] = "failed"
+                entry["error"] = f"{type(exc).__name__}: {exc}"
+            else:
+                entry["status"] = "ok"
+                entry.pop("error", None)
+                entry["bytes"] = os.path.getsize(path)
+                break
+        entry["seconds"] = round(time.perf_counter() - start, 4)
+        results.append(entry)
+    return results
+
+
+def _shards(bills, shard_size):
+    it = iter(bills)
+    while True:
+        shard = list(islice(it, shard_size))
+        if not shard:
+            return
+        yield shard
+
+
+def render_bills(bills, out_dir, workers=None, retries=DEFAULT_RETRIES,
+                 shard_size=DEFAULT_SHARD_SIZE, progress=None):
+    """Render every bill dict in `bills` to out_dir/<account>_<YYYY-MM>.pdf.
+
+    bills: iterable of bill dicts (the `generate_bill_pdf` layout); it is
+        consumed lazily, with at most two shards per worker in flight
+    workers: process count (default: os.cpu_count())
+    retries: extra attempts per bill after a failure
+
+    Returns the manifest dict, which is also written to out_dir/manifest.json.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    entries = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        shards = _shards(_named(bills), shard_size)
+        pending = {}
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * 2:
+                shard = next(shards, None)
+                if shard is None:
+                    exhausted = True
+                    break
+                pending[pool.submit(_render_shard, shard, out_dir, retries)] = shard
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard = pending.pop(future)
+                try:
+                    entries.extend(future.result())
+                except Exception as exc:
+                    # the worker itself died; report the whole shard as failed
+                    for bill, name in shard:
+                        entries.append({"account": bill.get("account"), "month": bill.get("month"),
+                                        "file": os.path.join(out_dir, name), "attempts": 0,
+                                        "status": "failed", "error": f"{type(exc).__name__}: {exc}",
+                                        "seconds": 0.0})
+                if progress:
+                    print(f"{len(entries):>10,} rendered", file=progress)
+
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for e in entries if e["status"] != "ok")
+    manifest = {
+        "workers": workers,
+        "rendered": len(entries) - failed,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "bills_per_sec": round(len(entries) / elapsed, 1) if elapsed else 0.0,
+        "bills": entries,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
+
+
+def read_bills_csv(path):
+    """Yield bill dicts from a CSV written by bulk_billing.py."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        yield from csv.DictReader(fh)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render one PDF statement per bill in parallel.")
+    parser.add_argument("bills", help="bills CSV (as written by bulk_billing.py --out)")
+    parser.add_argument("out_dir", help="directory for the PDFs and manifest.json")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    args = parser.parse_args(argv)
+
+    manifest = render_bills(read_bills_csv(args.bills), args.out_dir, args.workers,
+                            args.retries, args.shard_size, progress=sys.stderr)
+    print(f"rendered {manifest['rendered']:,}, failed {manifest['failed']:,} "
+          f"in {manifest['seconds']:.2f}s ({manifest['bills_per_sec']:,.1f} bills/s)")
+    return 1 if manifest["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""pdf_export.py
+
+Background PDF export queue for the billing screen.
+
+Exports are rendered one at a time on a worker thread so the Tk window
+stays responsive; any number can be queued. State changes and results
+are queued and delivered on the Tk thread by polling with after(), the
+same way auth_service does, so callbacks can update widgets directly.
+A job can be cancelled until the worker picks it up.
+
+Each PDF is written to "<path>.part" and renamed into place when
+complete, so a failed or interrupted render never leaves a truncated
+file under the requested name.
+"""
+import itertools
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+EXPORT_WORKERS = 1
+POLL_MS = 50
+
+QUEUED = "queued"
+RENDERING = "rendering"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_ids = itertools.count(1)
+
+
+def render_to_file(data, path):
+    """Render one bill to path via a temporary file."""
+    from pdf_maker import generate_bill_pdf
+
+    part = path + ".part"
+    try:
+        generate_bill_pdf(data, part)
+        os.replace(part, path)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+
+
+class ExportJob:
+    __slots__ = ("id", "data", "path", "state", "error", "callback")
+
+    def __init__(self, data, path, callback):
+        self.id = next(_ids)
+        self.data = data
+        self.path = path
+        self.state = QUEUED
+        self.error = None
+        self.callback = callback
+
+    @property
+    def finished(self):
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def __repr__(self):
+        return f"ExportJob({self.id}, {os.path.basename(self.path)!r}, {self.state})"
+
+
+class ExportQueue:
+    """Queue of PDF exports for one Tk screen.
+
+    widget: any widget of the screen; its toplevel's after() delivers updates
+    on_update: optional on_update(job), called on the Tk thread whenever a
+        job changes state (queued, rendering, done, failed, cancelled)
+    render: render(data, path) run on the worker; defaults to render_to_file
+
+    submit() takes an optional `callback(job, error)`, called on the Tk
+    thread once the job has finished; error is None on success.
+    """
+
+    def __init__(self, widget, on_update=None, render=render_to_file, workers=EXPORT_WORKERS):
+        self.widget = widget.winfo_toplevel()
+        self.on_update = on_update
+        self.render = render
+        self.jobs = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-export")
+        self._lock = threading.Lock()
+        self._events = queue.Queue()
+        self._polling = False
+
+    @property
+    def pending(self):
+        """Jobs not finished yet (queued or rendering)."""
+        return [job for job in self.jobs if not job.finished]
+
+    def submit(self, data, path, callback=None):
+        job = ExportJob(dict(data), path, callback)
+        self.jobs.append(job)
+        self._executor.submit(self._run, job)
+        self._notify(job)
+        self._start_polling()
+        return job
+
+    def cancel(self, job):
+        """Cancel a job that has not started rendering; returns True if it was cancelled."""
+        with self._lock:
+            if job.state != QUEUED:
+                return False
+            job.state = CANCELLED
+        self._finish(job)
+        return True
+
+    def cancel_all(self):
+        return sum(self.cancel(job) for job in list(self.jobs))
+
+    def clear_finished(self):
+        self.jobs = [job for job in self.jobs if not job.finished]
+
+    def shutdown(self):
+        """Cancel queued jobs and let the one rendering finish in the background."""
+        self.cancel_all()
+        self._executor.shutdown(wait=False)
+
+    def _run(self, job):
+        # worker thread: never touches Tk, only posts events
+        with self._lock:
+            if job.state != QUEUED:
+                return
+            job.state = RENDERING
+        self._events.put((job, RENDERING, None))
+        try:
+            self.render(job.data, job.path)
+        except Exception as exc:
+            self._events.put((job, FAILED, exc))
+        else:
+            self._events.put((job, DONE, None))
+
+    def _start_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                job, state, error = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if state == RENDERING:
+                self._notify(job)
+            else:
+                # the final state is only set here, so pending jobs keep polling alive
+                job.state, job.error = state, error
+                self._finish(job)
+        if self.pending:
+            self.widget.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
+
+    def _notify(self, job):
+        if callable(self.on_update):
+            self.on_update(job)
+
+    def _finish(self, job):
+        self._notify(job)
+        if callable(job.callback):
+            job.callback(job, job.error)
@@ -1,12 +1,50 @@
 # pdf_generator.py
+import os
+import re
+from itertools import islice
+
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus.frames import Frame
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
 
-def generate_bill_pdf(data, file_name="ElectricBill.pdf"):
-    pdf = SimpleDocTemplate(file_name, pagesize=letter)
-    styles = getSampleStyleSheet()
+from bill_records import BillTable
+import metrics
+
+# Stylesheet and table styles are built once and shared by every bill.
+_templates = None
+
+# A ReportLab canvas keeps every finished page until save(), so batches are
+# rendered PAGES_PER_PART pages at a time and appended to the output file.
+PAGES_PER_PART = 250
+
+_REF = re.compile(rb"(\d+) 0 R")
+
+
+def _get_templates():
+    global _templates
+    if _templates is None:
+        styles = getSampleStyleSheet()
+        customer_style = TableStyle([
+            ('BOX', (0,0), (-1,-1), 1, colors.black),
+            ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+            ('INNERGRID', (0,0), (-1,-1), 0.5, colors.black),
+        ])
+        bill_style = TableStyle([
+            ('BOX', (0,0), (-1,-1), 1, colors.black),
+            ('BACKGROUND', (0,6), (-1,6), colors.lightgrey),
+            ('FONT', (0,6), (-1,6), 'Helvetica-Bold', 12),
+            ('INNERGRID', (0,0), (-1,-1), 0.5, colors.black),
+        ])
+        _templates = (styles, customer_style, bill_style)
+    return _templates
+
+
+def _bill_elements(data):
+    styles, customer_style, bill_style = _get_templates()
     elements = []
 
     # Title
@@ -24,11 +62,7 @@ def generate_bill_pdf(data, file_name="ElectricBill.pdf"):
     ]
 
     table = Table(customer_table, colWidths=[150, 300])
-    table.setStyle(TableStyle([
-        ('BOX', (0,0), (-1,-1), 1, colors.black),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('INNERGRID', (0,0), (-1,-1), 0.5, colors.black),
-    ]))
+    table.setStyle(customer_style)
 
     elements.append(table)
     elements.append(Spacer(1, 20))
@@ -45,13 +79,171 @@ def generate_bill_pdf(data, file_name="ElectricBill.pdf"):
     ]
 
     billbox = Table(bill_table, colWidths=[200, 250])
-    billbox.setStyle(TableStyle([
-        ('BOX', (0,0), (-1,-1), 1, colors.black),
-        ('BACKGROUND', (0,6), (-1,6), colors.lightgrey),
-        ('FONT', (0,6), (-1,6), 'Helvetica-Bold', 12),
-        ('INNERGRID', (0,0), (-1,-1), 0.5, colors.black),
-    ]))
+    billbox.setStyle(bill_style)
 
     elements.append(billbox)
+    return elements
+
+
+@metrics.timed("pdf_maker.generate_bill_pdf")
+def generate_bill_pdf(data, file_name="ElectricBill.pdf"):
+    """data: a bill dict, a bill_records.Bill, or a BillTable (one bill per page)."""
+    if isinstance(data, BillTable):
+        return generate_bills_pdf(data, file_name)
+    pdf = SimpleDocTemplate(file_name, pagesize=letter)
+    pdf.build(_bill_elements(data))
+
+
+def _render_pages(bills, file_name):
+    width, height = letter
+    pdf = canvas.Canvas(file_name, pagesize=letter, pageCompression=1)
+    # same printable area as SimpleDocTemplate's default 1 inch margins
+    frame_args = (inch, inch, width - 2 * inch, height - 2 * inch)
+    for data in bills:
+        Frame(*frame_args).addFromList(_bill_elements(data), pdf)
+        pdf.showPage()
+    pdf.save()
+
+
+def _read_objects(path):
+    """(objects {number: bytes after "N 0 obj"}, root number, trailer) of a ReportLab PDF.
+
+    This is not a general PDF parser. It relies on what canvas.Canvas.save()
+    writes, and raises ValueError when a file does not look like that:
+    - one classic xref table, subsection "0 N", 20-byte entries, and no
+      /Prev, /XRefStm or /Encrypt in the trailer (no incremental updates,
+      xref or object streams, or encryption)
+    - every object is "N 0 obj ... endobj", and they are laid out in
+      xref order, so each one ends where the next begins
+    - a stream object's dictionary holds no literal "stream" text, so it
+      is everything before the first "stream" keyword
+    - the page tree is flat: the catalog's /Pages lists every page in /Kids
+    """
+    with open(path, "rb") as fh:
+        data = fh.read()
+    xref = int(data[data.rindex(b"startxref") + 9:].split()[0])
+    header = data[xref:xref + 64].split()
+    if header[:2] != [b"xref", b"0"]:
+        raise ValueError(f"{path}: expected one classic xref table")
+    trailer = data[data.index(b"trailer", xref):]
+    if re.search(rb"/(Prev|XRefStm|Encrypt)\b", trailer):
+        raise ValueError(f"{path}: incremental, hybrid or encrypted PDFs are not supported")
+    root = int(re.search(rb"/Root (\d+) 0 R", trailer).group(1))
+    count = int(header[2])
+    entries = data[data.index(b"\n", data.index(b"\n", xref) + 1) + 1:]
+    offsets = {}
+    for number in range(1, count):
+        entry = entries[number * 20:number * 20 + 20]
+        if entry[17:18] == b"n":
+            offsets[number] = int(entry[:10])
+    bounds = sorted(offsets.values()) + [xref]
+    end_of = dict(zip(bounds, bounds[1:]))
+    objects = {}
+    for number, offset in offsets.items():
+        body = data[offset:end_of[offset]]
+        if not body.startswith(b"%d 0 obj" % number) or b"/ObjStm" in body.partition(b"stream")[0]:
+            raise ValueError(f"{path}: object {number} is not where the xref table says")
+        objects[number] = body[body.index(b"obj") + 3:]
+    return objects, root, trailer
+
+
+class _PdfAppender:
+    """Writes the pages of several ReportLab PDFs into one file, one source at a time.
+
+    Object numbers are shifted so they stay unique, each source's page
+    tree and catalog are replaced by a single one written at the end, and
+    only the current source is held in memory. Sources must be files
+    written by _render_pages; see _read_objects for what that assumes.
+    References are only rewritten in object dictionaries, never inside
+    streams, and each kid must be a /Type /Page whose /Parent is the
+    source's page tree.
+    """
+
+    CATALOG, PAGES = 1, 2
+
+    def __init__(self, path):
+        self.fh = open(path, "wb")
+        self.fh.write(b"%PDF-1.4\n%\x93\x8c\x8b\x9e\n")
+        self.offsets = {}
+        self.kids = []
+        self.next_number = 3
+
+    def _write(self, number, body):
+        self.offsets[number] = self.fh.tell()
+        self.fh.write(b"%d 0 obj" % number)
+        self.fh.write(body)
+
+    def append(self, path):
+        objects, root, trailer = _read_objects(path)
+        pages = int(re.search(rb"/Pages (\d+) 0 R", objects[root]).group(1))
+        info = int(re.search(rb"/Info (\d+) 0 R", trailer).group(1))
+        kids = [int(number) for number in _REF.findall(re.search(rb"/Kids \[(.*?)\]", objects[pages], re.S).group(1))]
+        if len(kids) != int(re.search(rb"/Count (\d+)", objects[pages]).group(1)) or not all(
+                re.search(rb"/Type /Page\b", objects[kid]) for kid in kids):
+            raise ValueError(f"{path}: expected a flat page tree")
+        skip = {root, pages, info}
+        numbers = {pages: self.PAGES}
+        for number in sorted(objects):
+            if number not in skip:
+                numbers[number] = self.next_number
+                self.next_number += 1
+        renumber = lambda m: b"%d 0 R" % numbers[int(m.group(1))]
+        for number in sorted(objects):
+            if number in skip:
+                continue
+            head, stream, rest = objects[number].partition(b"stream")
+            self._write(numbers[number], _REF.sub(renumber, head) + stream + rest)
+        self.kids.extend(numbers[kid] for kid in kids)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % kid for kid in self.kids)
+        self._write(self.PAGES, b"\n<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>\nendobj\n" % (len(self.kids), kids))
+        self._write(self.CATALOG, b"\n<<\n/PageMode /UseNone /Pages %d 0 R /Type /Catalog\n>>\nendobj\n" % self.PAGES)
+        xref = self.fh.tell()
+        size = self.next_number
+        self.fh.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for number in range(1, size):
+            self.fh.write(b"%010d 00000 n \n" % self.offsets[number])
+        self.fh.write(b"trailer\n<<\n/Root %d 0 R\n/Size %d\n>>\nstartxref\n%d\n%%%%EOF\n"
+                      % (self.CATALOG, size, xref))
+        self.fh.close()
+
+
+@metrics.timed("pdf_maker.generate_bills_pdf")
+def generate_bills_pdf(bills, file_name="ElectricBills.pdf", pages_per_part=PAGES_PER_PART):
+    """Write every bill in `bills` to one PDF, one bill per page.
 
-    pdf.build(elements)
+    bills is consumed lazily, pages_per_part at a time: each part is
+    rendered to a temporary file, appended to file_name and deleted, so
+    memory use does not grow with the number of bills. Returns the number
+    of pages written.
+    """
+    bills = iter(bills)
+    part = file_name + ".part"
+    pages = 0
+    writer = None
+    try:
+        while True:
+            chunk = list(islice(bills, pages_per_part))
+            if not chunk and writer is not None:
+                break
+            _render_pages(chunk, part)
+            pages += len(chunk)
+            if writer is None and len(chunk) < pages_per_part:
+                # everything fitted in one part: it already is the finished file
+                os.replace(part, file_name)
+                return pages
+            if writer is None:
+                writer = _PdfAppender(file_name)
+            writer.append(part)
+        writer.close()
+    except BaseException:
+        # never leave a PDF with only some of the bills behind
+        if writer is not None:
+            writer.fh.close()
+            os.remove(file_name)
+        raise
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
+    return pages
@@ -0,0 +1,142 @@
+"""rebilling.py
+
+Incremental re-billing after a tariff revision.
+
+`tiered` consumes kWh in tier order, so a bill only changes if its
+consumption reaches the first tier whose rate or size changed; bills
+below that point cost exactly the same under both schedules. For each
+customer type this module works out that threshold, selects only the
+bills above it through the (CustomerType, Kwh) index, recomputes them
+with the new tariff and rewrites them in one transaction. A change to
+the fixed charge, VAT or environmental fee affects every bill of the type.
+
+Usage:
+    python rebilling.py --old tariffs_before.json --new tariffs.json \\
+        --db Database/AccountSystem.db --month 2026-10 --report delta.csv
+"""
+import argparse
+import csv
+import sys
+import time
+
+from Database import bill_ledger, db_utils
+from money import CentTariff, bill_pesos
+from tariffs import get_tariffs
+
+ALL_BILLS = float("-inf")  # threshold meaning every bill of the type is affected
+
+
+def _segments(tariff):
+    """(start, end, rate) for each consumption segment; rate None past a capped last tier."""
+    segments = list(zip(tariff.lower_bounds, tariff.upper_bounds, tariff.rates))
+    if tariff.upper_bounds[-1] != float("inf"):
+        segments.append((tariff.upper_bounds[-1], float("inf"), None))
+    return segments
+
+
+def _rate_at(segments, point):
+    for start, end, rate in segments:
+        if start <= point < end:
+            return rate
+    return None
+
+
+def change_threshold(old, new):
+    """kWh above which bills differ between two tariffs, or None if none do.
+
+    ALL_BILLS means the flat charges changed and every bill is affected.
+    """
+    if (old.fixed, old.vat_rate, old.env_fee_rate) != (new.fixed, new.vat_rate, new.env_fee_rate):
+        return ALL_BILLS
+    old_segments, new_segments = _segments(old), _segments(new)
+    points = sorted({s for s, _, _ in old_segments} | {s for s, _, _ in new_segments})
+    for point in points:
+        if _rate_at(old_segments, point) != _rate_at(new_segments, point):
+            return point
+    return None
+
+
+def affected_thresholds(old_book, new_book, customer_types):
+    """{customer_type: threshold} for every type whose bills may change."""
+    thresholds = {}
+    for customer_type in customer_types:
+        threshold = change_threshold(old_book.get(customer_type), new_book.get(customer_type))
+        if threshold is not None:
+            thresholds[customer_type] = threshold
+    return thresholds
+
+
+def rebill(conn, old_book, new_book, month=None, dry_run=False, on_delta=None):
+    """Recompute and rewrite only the bills the tariff change affects.
+
+    on_delta(bill_id, old_bill, new_bill) is called for every bill whose
+    amounts changed. Returns a summary dict per customer type.
+    """
+    thresholds = affected_thresholds(old_book, new_book, bill_ledger.customer_types(conn))
+    summary = {}
+    with conn:
+        for customer_type, threshold in thresholds.items():
+            tariff = CentTariff(new_book.get(customer_type))
+            kwh = None if threshold == ALL_BILLS else threshold
+            stats = summary[customer_type] = {"threshold_kwh": kwh, "scanned": 0, "changed": 0, "delta_total": 0.0}
+            for chunk in bill_ledger.bills_above_kwh(conn, customer_type, kwh, month):
+                updates = []
+                for bill_id, bill in chunk:
+                    energy, fixed, vat, env_fee, rate, total = bill_pesos(tariff.bill(bill["kwh"]))
+                    new_bill = dict(bill, base=energy, fixed=fixed, vat=vat, env=env_fee, rate=rate, total=total)
+                    stats["scanned"] += 1
+                    if new_bill["total"] != bill["total"] or new_bill["rate"] != bill["rate"]:
+                        updates.append((bill_id, new_bill))
+                        stats["changed"] += 1
+                        stats["delta_total"] += total - (bill["total"] or 0)
+                        if on_delta:
+                            on_delta(bill_id, bill, new_bill)
+                if updates and not dry_run:
+                    bill_ledger.update_bill_amounts(conn, updates, commit=False)
+            stats["delta_total"] = round(stats["delta_total"], 2)
+        if dry_run:
+            conn.rollback()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-bill only the bills a tariff revision affects.")
+    parser.add_argument("--old", required=True, help="tariff source the bills were computed with")
+    parser.add_argument("--new", default=None, help="revised tariff source (default: tariffs.json)")
+    parser.add_argument("--db", default="Database/AccountSystem.db")
+    parser.add_argument("--month", default=None, help="only re-bill this billing month")
+    parser.add_argument("--report", default=None, help="write a per-bill delta CSV here")
+    parser.add_argument("--dry-run", action="store_true", help="report the deltas without writing")
+    args = parser.parse_args(argv)
+
+    old_book, new_book = get_tariffs(args.old), get_tariffs(args.new)
+    report = open(args.report, "w", newline="", encoding="utf-8") if args.report else None
+    writer = csv.writer(report) if report else None
+    if writer:
+        writer.writerow(["id", "account", "month", "type", "kwh", "old_total", "new_total", "delta"])
+
+    def on_delta(bill_id, old_bill, new_bill):
+        if writer:
+            writer.writerow([bill_id, old_bill["account"], old_bill["month"], old_bill["type"], old_bill["kwh"],
+                             old_bill["total"], new_bill["total"], round(new_bill["total"] - old_bill["total"], 2)])
+
+    start = time.perf_counter()
+    try:
+        with db_utils.connection(args.db) as conn:
+            summary = rebill(conn, old_book, new_book, args.month, args.dry_run, on_delta)
+    finally:
+        if report:
+            report.close()
+    elapsed = time.perf_counter() - start
+
+    if not summary:
+        print("no customer type is affected by this tariff change")
+    for customer_type, stats in summary.items():
+        where = "all bills" if stats["threshold_kwh"] is None else f"kWh > {stats['threshold_kwh']:g}"
+        print(f"{customer_type:<14} {where:<16} scanned {stats['scanned']:>9,}  changed {stats['changed']:>9,}  "
+              f"delta {stats['delta_total']:>14,.2f}")
+    print(f"{'(dry run) ' if args.dry_run else ''}done in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,9 +3,10 @@
 Provides a function to build the registration frame so this UI can be
 embedded inside a larger application instead of running at import time.
 """
-from tkinter import Frame, Label, Button, Entry, PhotoImage, StringVar, messagebox
+from tkinter import Frame, Label, Button, Entry, StringVar, messagebox
 import sqlite3
-from Database import db_utils
+from auth_service import AuthService
+from asset_cache import get_image
 
 
 def build_register_frame(parent, db_path, on_show_login=None, on_register_success=None):
@@ -17,13 +18,14 @@ def build_register_frame(parent, db_path, on_show_login=None, on_register_succes
     on_register_success: callback when registration is successful
     """
     frame = Frame(parent, bg="#525561")
+    auth = AuthService(frame, db_path)
 
-    # Keep references to images on the frame to avoid garbage collection
-    frame._backgroundImage = PhotoImage(file="assets/image_1.png")
+    # Images come from the shared asset cache, which keeps them alive
+    frame._backgroundImage = get_image(frame, "image_1.png")
     bg_image = Label(frame, image=frame._backgroundImage, bg="#525561")
     bg_image.place(x=120, y=28)
 
-    frame._headerText_image_left = PhotoImage(file="assets/headerText_image.png")
+    frame._headerText_image_left = get_image(frame, "headerText_image.png")
     headerText_image_label1 = Label(bg_image, image=frame._headerText_image_left, bg="#272A37")
     headerText_image_label1.place(x=60, y=45)
 
@@ -51,7 +53,7 @@ def build_register_frame(parent, db_path, on_show_login=None, on_register_succes
     confirm_var = StringVar()
 
     # First / Last name inputs (compact version of original layout)
-    frame._first_img = PhotoImage(file="assets/input_img.png")
+    frame._first_img = get_image(frame, "input_img.png")
     first_container = Label(bg_image, image=frame._first_img, bg="#272A37")
     first_container.place(x=80, y=242)
     Label(first_container, text="First name", fg="#FFFFFF", font=("yu gothic ui SemiBold", 13 * -1),
@@ -67,7 +69,7 @@ def build_register_frame(parent, db_path, on_show_login=None, on_register_succes
           textvariable=last_var).place(x=8, y=17, width=140, height=27)
 
     # Email
-    frame._email_img = PhotoImage(file="assets/email.png")
+    frame._email_img = get_image(frame, "email.png")
     email_container = Label(bg_image, image=frame._email_img, bg="#272A37")
     email_container.place(x=80, y=311)
     Label(email_container, text="Email account", fg="#FFFFFF", font=("yu gothic ui SemiBold", 13 * -1),
@@ -76,7 +78,7 @@ def build_register_frame(parent, db_path, on_show_login=None, on_register_succes
           textvariable=email_var).place(x=8, y=17, width=354, height=27)
 
     # Password
-    frame._pwd_img = PhotoImage(file="assets/input_img.png")
+    frame._pwd_img = get_image(frame, "input_img.png")
     pwd_container = Label(bg_image, image=frame._pwd_img, bg="#272A37")
     pwd_container.place(x=80, y=380)
     Label(pwd_container, text="Password", fg="#FFFFFF", font=("yu gothic ui SemiBold", 13 * -1),
@@ -92,7 +94,7 @@ def build_register_frame(parent, db_path, on_show_login=None, on_register_succes
           textvariable=confirm_var, show='•').place(x=8, y=17, width=140, height=27)
 
     # Submit
-    frame._submit_img = PhotoImage(file="assets/button_1.png")
+    frame._submit_img = get_image(frame, "button_1.png")
 
     def signup():
         # basic validation
@@ -103,29 +105,36 @@ def build_register_frame(parent, db_path, on_show_login=None, on_register_succes
             messagebox.showerror("Error", "Password and Confirm Password didn't match")
             return
 
-        try:
-            conn = sqlite3.connect(db_path)
-            db_utils.create_account(conn, first_var.get().strip(), last_var.get().strip(), email_var.get().strip(), pwd_var.get())
-            conn.close()
-            # clear
-            first_var.set("")
-            last_var.set("")
-            email_var.set("")
-            pwd_var.set("")
-            confirm_var.set("")
-            messagebox.showinfo('Success', "New Account Created Successfully :)")
-            # Call success callback if provided
-            if callable(on_register_success):
-                on_register_success()
-        except Exception:
+        if auth.busy:
+            return
+        # hashing the password runs on a worker; on_created is called back on the Tk thread
+        auth.create_account(first_var.get().strip(), last_var.get().strip(), email_var.get().strip(),
+                            pwd_var.get(), on_created)
+
+    def on_created(_, error):
+        if isinstance(error, sqlite3.IntegrityError):
+            messagebox.showerror("Error", "An account with this email already exists")
+            return
+        if error is not None:
             messagebox.showerror("Error", "Something went wrong, please try again :(")
+            return
+        # clear
+        first_var.set("")
+        last_var.set("")
+        email_var.set("")
+        pwd_var.set("")
+        confirm_var.set("")
+        messagebox.showinfo('Success', "New Account Created Successfully :)")
+        # Call success callback if provided
+        if callable(on_register_success):
+            on_register_success()
 
     submit_button = Button(bg_image, image=frame._submit_img, borderwidth=0, highlightthickness=0,
                            relief="flat", activebackground="#272A37", cursor="hand2", command=signup)
     submit_button.place(x=130, y=460, width=333, height=65)
 
     # small footer
-    frame._footer_img = PhotoImage(file="assets/headerText_image.png")
+    frame._footer_img = get_image(frame, "headerText_image.png")
     Label(bg_image, image=frame._footer_img, bg="#272A37").place(x=650, y=530)
     Label(bg_image, text="Luke Ezekiel B. Abad", fg="#FFFFFF", font=("yu gothic ui bold", 20 * -1),
           bg="#272A37").place(x=700, y=530)
@@ -0,0 +1,66 @@
+"""revenue_report.py
+
+Month / customer-type revenue report from the RevenueRollupDB rollups,
+and a rebuild command that recomputes them from the raw bills.
+
+Usage:
+    python revenue_report.py report --db Database/AccountSystem.db [--from 2026-01] [--to 2026-12] [--type residential] [--csv out.csv]
+    python revenue_report.py report --monthly
+    python revenue_report.py check     # compare rollups with a full scan, exit 1 on mismatch
+    python revenue_report.py rebuild   # recompute the rollups from BillDB
+"""
+import argparse
+import csv
+import sys
+import time
+
+from Database import db_utils, revenue_rollup
+
+
+def print_report(rows, out=sys.stdout):
+    print(f"{'month':<9} {'type':<12} {'bills':>9} {'kWh':>14} {'energy':>15} {'VAT':>14} {'total':>16}", file=out)
+    for row in rows:
+        print(f"{row['month']:<9} {row['type']:<12} {row['bills']:>9,} {row['kwh']:>14,.3f} "
+              f"{row['energy']:>15,.2f} {row['vat']:>14,.2f} {row['total']:>16,.2f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Revenue rollups by billing month and customer type.")
+    parser.add_argument("command", choices=("report", "check", "rebuild"))
+    parser.add_argument("--db", default="Database/AccountSystem.db")
+    parser.add_argument("--from", dest="start_month", default=None, help="first billing month")
+    parser.add_argument("--to", dest="end_month", default=None, help="last billing month")
+    parser.add_argument("--type", dest="customer_type", default=None)
+    parser.add_argument("--monthly", action="store_true", help="sum across customer types")
+    parser.add_argument("--csv", default=None, help="write the report rows to a CSV file")
+    args = parser.parse_args(argv)
+
+    with db_utils.connection(args.db) as conn:
+        start = time.perf_counter()
+        if args.command == "rebuild":
+            groups = revenue_rollup.rebuild(conn)
+            print(f"rebuilt {groups:,} rollup rows in {time.perf_counter() - start:.2f}s")
+            return 0
+        if args.command == "check":
+            mismatches = revenue_rollup.verify(conn)
+            for month, customer_type, stored, actual in mismatches:
+                print(f"{month} {customer_type}: rollup {stored} != bills {actual}")
+            print(f"{len(mismatches)} mismatched groups ({time.perf_counter() - start:.2f}s)")
+            return 1 if mismatches else 0
+        if args.monthly:
+            rows = revenue_rollup.monthly_totals(conn, args.start_month, args.end_month)
+        else:
+            rows = revenue_rollup.revenue_report(conn, args.start_month, args.end_month, args.customer_type)
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.DictWriter(fh, fieldnames=revenue_rollup.REPORT_KEYS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        print_report(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""shard_admin.py
+
+Administration for the sharded account/bill storage (Database/sharding.py).
+
+Usage:
+    python shard_admin.py route --shards 4 --dir Database/shards --email ana@example.com
+    python shard_admin.py rebalance --dir Database/shards --from-shards 4 --to-shards 6
+    python shard_admin.py report --dir Database/shards --shards 6 [--from 2026-01] [--to 2026-12]
+    python shard_admin.py count --dir Database/shards --shards 6
+"""
+import argparse
+import sys
+import time
+
+from Database import sharding
+from revenue_report import print_report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the sharded account/bill databases.")
+    parser.add_argument("command", choices=("route", "rebalance", "report", "count"))
+    parser.add_argument("--dir", default="Database/shards", help="directory holding the shard files")
+    parser.add_argument("--shards", type=int, default=4, help="current number of shards")
+    parser.add_argument("--from-shards", type=int, default=None, help="rebalance: shard count before")
+    parser.add_argument("--to-shards", type=int, default=None, help="rebalance: shard count after")
+    parser.add_argument("--email", default=None)
+    parser.add_argument("--account", default=None)
+    parser.add_argument("--from", dest="start_month", default=None)
+    parser.add_argument("--to", dest="end_month", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "rebalance":
+        if not args.from_shards or not args.to_shards or args.to_shards <= args.from_shards:
+            parser.error("rebalance needs --from-shards N --to-shards M with M > N")
+        start = time.perf_counter()
+        stats = sharding.rebalance(sharding.shard_paths(args.dir, args.from_shards),
+                                   sharding.shard_paths(args.dir, args.to_shards), progress=sys.stderr)
+        print(f"moved {stats['accounts']:,} accounts and {stats['bills']:,} bills "
+              f"in {time.perf_counter() - start:.1f}s")
+        return 0
+
+    with sharding.ShardedStore(sharding.shard_paths(args.dir, args.shards)) as store:
+        if args.command == "route":
+            if args.email:
+                print(f"email {args.email} -> {store.shard_for_email(args.email)}")
+            if args.account:
+                print(f"account {args.account} -> {store.shard_for_account(args.account)}")
+        elif args.command == "count":
+            for path, count in zip(store.paths, store.fan_out(
+                    lambda conn: conn.execute("SELECT COUNT(*) FROM BillDB").fetchone()[0])):
+                print(f"{path}: {count:,} bills")
+        else:
+            print_report(store.revenue_report(args.start_month, args.end_month))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""tariffs.py
+
+Tariff schedules loaded from a JSON config file or the tariff tables in
+an SQLite database, compiled once into cumulative breakpoints so a bill
+needs one bisect and one multiply instead of a walk over every tier.
+
+Compiled schedules are cached per source and only reloaded when the
+source file changes on disk.
+
+Usage:
+    python tariffs.py import tariffs.json --db Database/AccountSystem.db
+    python tariffs.py export --db Database/AccountSystem.db [--out tariffs.json]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+
+DEFAULT_TARIFF_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tariffs.json")
+
+# How often (seconds) a cached source is re-stat'ed for changes.
+CHECK_INTERVAL = 1.0
+
+# Built-in schedules, used when no config file exists.
+DEFAULT_CONFIG = {
+    "default_class": "commercial",
+    "vat_rate": 0.12,
+    "env_fee_rate": 0.0025,
+    "classes": {
+        "residential": {
+            "fixed": 40,
+            "tiers": [[50, 5.0], [50, 6.5], [100, 8.0], [None, 10.0]],
+        },
+        "commercial": {
+            "fixed": 100,
+            "tiers": [[100, 3.5], [200, 5.0], [500, 6.5], [None, 7.5]],
+        },
+    },
+}
+
+
+class Tariff:
+    """A compiled tariff schedule for one customer class.
+
+    tiers: list of (limit, rate) in consumption order, like `billing.tiered`
+    upper_bounds[i]: cumulative kWh at the end of tier i
+    base_costs[i]: energy cost of every tier before tier i
+    """
+
+    __slots__ = ("name", "tiers", "fixed", "vat_rate", "env_fee_rate",
+                 "lower_bounds", "upper_bounds", "base_costs", "rates")
+
+    def __init__(self, name, tiers, fixed, vat_rate, env_fee_rate):
+        if not tiers:
+            raise ValueError(f"tariff {name!r} has no tiers")
+        self.name = name
+        self.tiers = [(float("inf") if limit is None else limit, rate) for limit, rate in tiers]
+        self.fixed = fixed
+        self.vat_rate = vat_rate
+        self.env_fee_rate = env_fee_rate
+
+        self.lower_bounds = []
+        self.upper_bounds = []
+        self.base_costs = []
+        self.rates = []
+        bound = 0
+        cost = 0
+        for limit, rate in self.tiers:
+            if limit < 0:
+                raise ValueError(f"tariff {name!r} has a negative tier limit")
+            self.lower_bounds.append(bound)
+            self.base_costs.append(cost)
+            self.rates.append(rate)
+            bound = bound + limit
+            self.upper_bounds.append(bound)
+            cost += limit * rate
+        # cost of consuming every tier; only reachable when the last tier is finite
+        self.base_costs.append(cost)
+
+    def energy(self, units):
+        """Return (energy cost, applied rate), same as `billing.tiered`."""
+        if units <= 0:
+            return 0, 0
+        i = bisect_left(self.upper_bounds, units)
+        if i == len(self.rates):
+            return self.base_costs[i], self.rates[-1]
+        return self.base_costs[i] + (units - self.lower_bounds[i]) * self.rates[i], self.rates[i]
+
+    def bill(self, units):
+        """Return (energy, fixed, vat, env_fee, applied_rates, total), rounded."""
+        energy, applied_rates = self.energy(units)
+        vat = energy * self.vat_rate
+        env_fee = energy * self.env_fee_rate
+        total = energy + self.fixed + vat + env_fee
+        return (round(energy, 2), round(self.fixed, 2), round(vat, 2), round(env_fee, 2),
+                round(applied_rates, 2), round(total, 2))
+
+
+class TariffBook:
+    """All compiled tariffs from one source, with a fallback class."""
+
+    def __init__(self, tariffs, default_class):
+        if default_class not in tariffs:
+            raise ValueError(f"default class {default_class!r} is not defined")
+        self.tariffs = tariffs
+        self.default_class = default_class
+
+    def get(self, customer_type):
+        tariff = self.tariffs.get(customer_type)
+        if tariff is None:
+            tariff = self.tariffs[self.default_class]
+        return tariff
+
+    def __contains__(self, customer_type):
+        return customer_type in self.tariffs
+
+    def __iter__(self):
+        return iter(self.tariffs.values())
+
+
+def compile_config(config):
+    """Compile a config dict (the JSON file layout) into a TariffBook."""
+    vat_rate = config.get("vat_rate", 0.12)
+    env_fee_rate = config.get("env_fee_rate", 0.0025)
+    tariffs = {}
+    for name, spec in config["classes"].items():
+        name = name.lower()
+        tariffs[name] = Tariff(
+            name,
+            [tuple(tier) for tier in spec["tiers"]],
+            spec.get("fixed", 0),
+            spec.get("vat_rate", vat_rate),
+            spec.get("env_fee_rate", env_fee_rate),
+        )
+    return TariffBook(tariffs, config.get("default_class", "commercial").lower())
+
+
+def load_config(source):
+    """Read a tariff config from a .json file or an SQLite database file."""
+    if source.endswith(".json"):
+        with open(source, encoding="utf-8") as fh:
+            return json.load(fh)
+
+    from Database import tariff_store
+
+    conn = sqlite3.connect(source)
+    try:
+        return tariff_store.load_config(conn)
+    finally:
+        conn.close()
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _signature(source):
+    try:
+        st = os.stat(source)
+    except FileNotFoundError:
+        return None
+    signature = (st.st_mtime_ns, st.st_size)
+    if not source.endswith(".json"):
+        # in WAL mode a commit only touches the -wal file until the next checkpoint
+        try:
+            wal = os.stat(source + "-wal")
+            signature += (wal.st_mtime_ns, wal.st_size)
+        except FileNotFoundError:
+            pass
+    return signature
+
+
+def get_compiled(source, build):
+    """Return build(config of `source`), cached like `get_tariffs`.
+
+    Used for anything else built from the tariff config (e.g. the
+    time-of-use schedule), so it is reloaded on the same schedule and
+    falls back to DEFAULT_CONFIG the same way.
+    """
+    source = source or DEFAULT_TARIFF_PATH
+    key = (source, build)
+    now = time.monotonic()
+    entry = _cache.get(key)
+    if entry is not None and now - entry[2] < CHECK_INTERVAL:
+        return entry[0]
+
+    with _lock:
+        entry = _cache.get(key)
+        signature = _signature(source)
+        if entry is not None and entry[1] == signature:
+            _cache[key] = (entry[0], signature, now)
+            return entry[0]
+
+        if signature is None:
+            if source != DEFAULT_TARIFF_PATH:
+                raise FileNotFoundError(source)
+            compiled = build(DEFAULT_CONFIG)
+        else:
+            compiled = build(load_config(source))
+        _cache[key] = (compiled, signature, now)
+        return compiled
+
+
+def get_tariffs(source=None):
+    """Return the compiled TariffBook for `source` (default tariffs.json).
+
+    The result is cached; the source is re-stat'ed at most once every
+    CHECK_INTERVAL seconds and recompiled only when it has changed. A
+    missing default file falls back to the built-in schedules.
+    """
+    return get_compiled(source, compile_config)
+
+
+def get_tariff(customer_type, source=None):
+    """Return the compiled Tariff for a customer class (or the default class)."""
+    return get_tariffs(source).get(customer_type)
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Copy tariff schedules between tariffs.json and TariffDB.")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("config", nargs="?", default=DEFAULT_TARIFF_PATH, help="import: JSON config to store")
+    parser.add_argument("--db", default="Database/AccountSystem.db")
+    parser.add_argument("--out", default=None, help="export: write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    from Database import tariff_store
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command == "import":
+            config = load_config(args.config)
+            book = compile_config(config)  # reject a broken config before replacing the stored one
+            tariff_store.save_config(conn, config)
+            print(f"stored {len(list(book))} customer classes from {args.config} in {args.db}")
+        else:
+            text = json.dumps(tariff_store.load_config(conn), indent=4)
+            if args.out:
+                with open(args.out, "w", encoding="utf-8") as fh:
+                    fh.write(text + "\n")
+            else:
+                print(text)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
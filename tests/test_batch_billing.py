@@ -0,0 +1,58 @@
+"""Array billing must match the scalar calculator bill for bill.
+
+Run from the project root:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_billing import calculate_bills
+from billing import calculate_bill
+from money import get_cent_tariffs
+from tariffs import get_tariffs
+
+KNOWN_TYPES = [tariff.name for tariff in get_tariffs()]
+UNKNOWN_TYPES = ["industrial", "", "RESIDENTIAL"]
+
+
+def edge_readings():
+    readings = [0.0, -0.0, -5.0, 1e-9, 0.0004, 0.0005, 0.001, 2.0015, 49.9995, 123.4565,
+                1e7, 1e10, 4.6e9, 1e12]
+    for tariff in get_tariffs():
+        for bound in tariff.upper_bounds[:-1]:
+            readings += [bound + delta for delta in (-1e-9, -0.0005, -0.001, 0.0, 1e-9, 0.0005, 0.001)]
+    # either side of the batch path's int64 limit, where readings switch to the scalar path
+    limit = min(t.batch_limit for t in get_cent_tariffs()[0].values()) / 1000
+    readings += [limit - 1, limit, limit + 1]
+    return readings
+
+
+@pytest.mark.parametrize("customer_type", KNOWN_TYPES + UNKNOWN_TYPES)
+def test_calculate_bills_matches_calculate_bill(customer_type):
+    readings = edge_readings()
+    types = [customer_type] * len(readings)
+    columns = calculate_bills(readings, types)
+    for i, units in enumerate(readings):
+        assert tuple(column[i] for column in columns) == calculate_bill(units, customer_type), units
+
+
+def test_mixed_types_in_one_batch():
+    readings = edge_readings()
+    all_types = KNOWN_TYPES + UNKNOWN_TYPES
+    types = [all_types[i % len(all_types)] for i in range(len(readings))]
+    columns = calculate_bills(readings, types)
+    for i, (units, customer_type) in enumerate(zip(readings, types)):
+        assert tuple(column[i] for column in columns) == calculate_bill(units, customer_type), units
+
+
+@pytest.mark.parametrize("units", [float("inf"), float("-inf"), float("nan")])
+def test_non_finite_readings_are_rejected(units):
+    with pytest.raises(ValueError):
+        calculate_bill(units, "residential")
+    with pytest.raises(ValueError):
+        calculate_bills([1.0, units], ["residential", "residential"])
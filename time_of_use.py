@@ -0,0 +1,184 @@
+"""time_of_use.py
+
+Time-of-use billing from smart-meter interval data.
+
+Each interval reading is assigned a period (peak, shoulder, off-peak) by
+the hour of the week it starts in, on the tariff's local clock:
+datetime64 timestamps are taken as local wall time, integer epoch
+seconds as UTC and shifted by the schedule's "utc_offset_hours". The
+month's kWh is billed through the customer's usual tiers, and the
+energy charge is then weighted by the period multipliers, in proportion
+to the kWh used in each period:
+
+    energy = tiered_energy(total_kwh) * sum(kwh[p] * multiplier[p]) / total_kwh
+
+VAT, the environmental fee and the fixed charge follow as in
+`billing.calculate_bill`, so with every multiplier at 1.0 the bill is
+exactly the monthly-total bill. The schedule is read from the
+"time_of_use" section of the tariff config (see tariffs.json), falling
+back to DEFAULT_SCHEDULE.
+
+Everything is vectorized over meters x intervals; meters are processed
+chunk_size at a time to bound memory. Readings that are not a regular
+grid (gaps, mixed clocks, any order) go through `reading_bills`, which
+sums kWh per meter and period with a single bincount.
+"""
+import numpy as np
+
+from money import bill_pesos, bills_cents
+from tariffs import get_compiled
+
+DEFAULT_SCHEDULE = {
+    "periods": {"peak": 1.25, "shoulder": 1.0, "off_peak": 0.8},
+    "default_period": "off_peak",
+    # [start_hour, end_hour) ranges per period; other hours use default_period
+    "weekday": {"peak": [[17, 22]], "shoulder": [[8, 17], [22, 23]]},
+    "weekend": {"shoulder": [[17, 22]]},
+    # local clock of the schedule; epoch-second timestamps are UTC (Philippine time is UTC+8)
+    "utc_offset_hours": 8,
+}
+
+DEFAULT_CHUNK_SIZE = 10_000
+HOURS_PER_WEEK = 168
+_EPOCH_HOUR_OF_WEEK = 72  # 1970-01-01 00:00 is Thursday, hour 72 of a Monday-based week
+
+
+class TouSchedule:
+    """Compiled schedule: period names, multipliers and an hour-of-week lookup table."""
+
+    __slots__ = ("periods", "multipliers", "hour_of_week", "utc_offset")
+
+    def __init__(self, config):
+        self.periods = list(config["periods"])
+        self.multipliers = np.array([config["periods"][name] for name in self.periods], dtype=np.float64)
+        default = self.periods.index(config.get("default_period", self.periods[-1]))
+        table = np.full(HOURS_PER_WEEK, default, dtype=np.int8)
+        for day in range(7):
+            ranges = config.get("weekend" if day >= 5 else "weekday", {})
+            for name, spans in ranges.items():
+                code = self.periods.index(name)
+                for start, end in spans:
+                    table[day * 24 + start:day * 24 + end] = code
+        self.hour_of_week = table
+        self.utc_offset = round(config.get("utc_offset_hours", DEFAULT_SCHEDULE["utc_offset_hours"]) * 3600)
+
+    def period_codes(self, timestamps):
+        """Period index for every timestamp (datetime64 of local wall time, or UTC epoch seconds)."""
+        ts = np.asarray(timestamps)
+        if np.issubdtype(ts.dtype, np.datetime64):
+            seconds = ts.astype("datetime64[s]").astype(np.int64)
+        else:
+            seconds = ts.astype(np.int64) + self.utc_offset
+        return self.hour_of_week[(seconds // 3600 + _EPOCH_HOUR_OF_WEEK) % HOURS_PER_WEEK]
+
+
+def _compile_schedule(config):
+    return TouSchedule(config.get("time_of_use", DEFAULT_SCHEDULE))
+
+
+def get_schedule(source=None):
+    """TouSchedule from the "time_of_use" section of a tariff source, or the default.
+
+    Cached and reloaded together with `tariffs.get_tariffs`; a missing
+    default tariffs.json gives DEFAULT_SCHEDULE.
+    """
+    return get_compiled(source, _compile_schedule)
+
+
+def period_kwh(readings, timestamps, schedule):
+    """kWh per meter and period, shape (meters, periods).
+
+    readings: (meters, intervals); missing readings (NaN) count as 0
+    timestamps: (intervals,) shared by every meter, or (meters, intervals)
+    """
+    readings = np.asarray(readings, dtype=np.float64)
+    codes = schedule.period_codes(timestamps)
+    out = _sum_by_period(readings, codes, len(schedule.periods))
+    # NaN only survives into the sums of meters with gaps; redo just those rows
+    gaps = np.isnan(out).any(axis=1)
+    if gaps.any():
+        out[gaps] = _sum_by_period(np.nan_to_num(readings[gaps]), codes if codes.ndim == 1 else codes[gaps],
+                                   len(schedule.periods))
+    return out
+
+
+def _sum_by_period(readings, codes, periods):
+    if codes.ndim == 1:
+        # one shared clock: a single matrix product against a one-hot period matrix
+        onehot = np.zeros((codes.shape[0], periods), dtype=np.float64)
+        onehot[np.arange(codes.shape[0]), codes] = 1.0
+        return readings @ onehot
+    out = np.empty((readings.shape[0], periods), dtype=np.float64)
+    for p in range(periods):
+        out[:, p] = np.where(codes == p, readings, 0.0).sum(axis=1)
+    return out
+
+
+def interval_bills(readings, timestamps, customer_types, schedule=None, source=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE):
+    """Time-of-use bills for many meters at once.
+
+    readings: (meters, intervals) kWh per interval
+    timestamps: interval starts (local datetime64 or UTC epoch seconds), (intervals,) or (meters, intervals)
+    customer_types: (meters,) lower-case customer type strings
+    schedule: TouSchedule; defaults to get_schedule(source)
+    source: optional tariff source passed to `tariffs.get_tariffs`
+
+    Returns (energy, fixed, vat, env_fee, applied_rates, total, kwh_by_period)
+    where the first six are (meters,) arrays as from
+    `batch_billing.calculate_bills` and kwh_by_period is (meters, periods)
+    in schedule.periods order.
+    """
+    readings = np.asarray(readings)
+    if readings.ndim != 2:
+        raise ValueError("readings must be a (meters, intervals) array")
+    timestamps = np.asarray(timestamps)
+    customer_types = np.asarray(customer_types)
+    if customer_types.shape != readings.shape[:1]:
+        raise ValueError("customer_types must have one entry per meter")
+    schedule = schedule or get_schedule(source)
+
+    meters = readings.shape[0]
+    kwh_by_period = np.empty((meters, len(schedule.periods)), dtype=np.float64)
+    for start in range(0, meters, chunk_size):
+        stop = min(start + chunk_size, meters)
+        clock = timestamps if timestamps.ndim == 1 else timestamps[start:stop]
+        kwh_by_period[start:stop] = period_kwh(readings[start:stop], clock, schedule)
+    return period_bills(kwh_by_period, customer_types, schedule, source)
+
+
+def reading_bills(account_index, timestamps, kwh, customer_types, schedule=None, source=None,
+                  chunk_size=DEFAULT_CHUNK_SIZE * 100):
+    """Time-of-use bills from a flat list of readings, in any order and with any gaps.
+
+    account_index, timestamps, kwh: (readings,) arrays; account_index is
+    the meter's row in customer_types. This is the path for readings that
+    do not form a regular meters x intervals grid (see
+    `meter_readings.MeterReadings`). Returns the same 7-tuple as
+    `interval_bills`.
+    """
+    customer_types = np.asarray(customer_types)
+    schedule = schedule or get_schedule(source)
+    periods = len(schedule.periods)
+    meters = customer_types.shape[0]
+    kwh_by_period = np.zeros(meters * periods, dtype=np.float64)
+    for start in range(0, len(kwh), chunk_size):
+        stop = start + chunk_size
+        cells = account_index[start:stop].astype(np.int64) * periods + schedule.period_codes(timestamps[start:stop])
+        kwh_by_period += np.bincount(cells, weights=np.nan_to_num(kwh[start:stop]), minlength=meters * periods)
+    return period_bills(kwh_by_period.reshape(meters, periods), customer_types, schedule, source)
+
+
+def period_bills(kwh_by_period, customer_types, schedule, source=None):
+    """Bills from per-period kWh, (meters, periods); returns the `interval_bills` 7-tuple."""
+    total_kwh = kwh_by_period.sum(axis=1)
+    weighted = (kwh_by_period * schedule.multipliers).sum(axis=1)
+    factor = np.divide(weighted, total_kwh, out=np.ones_like(total_kwh), where=total_kwh > 0)
+    bills = bills_cents(total_kwh, np.asarray(customer_types), source, factor=factor)
+    return (*bill_pesos(bills), kwh_by_period)
+
+
+def interval_bill(readings, timestamps, customer_type, schedule=None, source=None):
+    """Time-of-use bill for one meter; returns the same 6-tuple as `billing.calculate_bill`."""
+    result = interval_bills(np.asarray(readings)[np.newaxis, :], timestamps, [customer_type], schedule, source)
+    return tuple(float(column[0]) for column in result[:6])